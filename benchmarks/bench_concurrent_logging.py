@@ -0,0 +1,71 @@
+# coding: utf-8
+#
+# BSD 2-Clause License
+#
+# Copyright (c) 2018, Dylan Perry <dylan.perry@gmail.com>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+"""
+Parallel ``whatdo`` runs against one CSV timesheet, checking none of their events are lost
+
+Run with the package importable, e.g. ``PYTHONPATH=src python benchmarks/bench_concurrent_logging.py``. Each process
+logs its events through Cli.run, which holds the storage lock for the run, in a temporary directory.
+"""
+
+import os
+import subprocess
+import sys
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from whatdo.adaptor import CsvStorage
+
+RUNS = 200
+PROCESSES = (1, 2, 4, 8)
+CODE = f"""
+from whatdo.entry import Cli
+cli = Cli()
+for i in range({RUNS}):
+    cli.run(['Task', str(i)])
+"""
+
+
+def main() -> None:
+    os.environ['PYTHONPATH'] = os.pathsep.join(sys.path)
+    print("processes\truns/s\tevents lost")
+    for processes in PROCESSES:
+        with TemporaryDirectory() as directory:
+            os.chdir(directory)
+            start = perf_counter()
+            running = [subprocess.Popen([sys.executable, '-c', CODE]) for _ in range(processes)]
+            for process in running:
+                process.wait()
+            seconds = perf_counter() - start
+            lost = processes * RUNS - len(list(CsvStorage().retrieve()))
+            print(f"{processes}\t{processes * RUNS / seconds:.0f}\t{lost}")
+
+
+if __name__ == '__main__':
+    main()
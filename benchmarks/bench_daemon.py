@@ -0,0 +1,93 @@
+# coding: utf-8
+#
+# BSD 2-Clause License
+#
+# Copyright (c) 2018, Dylan Perry <dylan.perry@gmail.com>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+"""
+Latency of logging and reporting through a running daemon, against a whatdo process per command
+
+Run with the package importable, e.g. ``PYTHONPATH=src python benchmarks/bench_daemon.py``. The daemon serves a
+temporary directory holding 100k events in CSV storage.
+"""
+
+import os
+import subprocess
+import sys
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from io import StringIO
+from statistics import median
+from tempfile import TemporaryDirectory
+from timeit import repeat
+
+from whatdo.adaptor import CsvStorage
+from whatdo.client import Client
+
+EVENTS = 10 ** 5
+REQUESTS = 1000
+PROCESSES = 20
+
+
+def process_ms(code: str) -> float:
+    times = []
+    for _ in range(PROCESSES):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], stdout=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    return median(times) * 1000
+
+
+def main() -> None:
+    now = datetime.now()
+    with TemporaryDirectory() as directory:
+        os.chdir(directory)
+        os.environ['PYTHONPATH'] = os.pathsep.join(sys.path)
+        CsvStorage().store((now - timedelta(minutes=EVENTS - i), f"Task {i % 100}") for i in range(EVENTS))
+        print("command\tin process ms")
+        for command in ('Eat a potato', 'today'):
+            code = f"import sys; from whatdo.entry import cli; sys.argv = ['whatdo'] + {command.split()!r}; cli()"
+            print(f"whatdo {command}\t{process_ms(code):.1f}")
+
+        daemon = subprocess.Popen([sys.executable, '-c', "from whatdo.entry import daemon; daemon()"])
+        try:
+            while not os.path.exists(Client().path):
+                time.sleep(0.01)
+            client = Client()
+            print("command\tclient process ms\tround trip us")
+            for command in ('Eat a potato', 'today'):
+                code = f"import sys; from whatdo.client import cli; sys.argv = ['whatdo'] + {command.split()!r}; cli()"
+                with redirect_stdout(StringIO()):
+                    round_trip = min(repeat(lambda: client(command.split()), number=REQUESTS, repeat=3)) / REQUESTS
+                print(f"whatdo {command}\t{process_ms(code):.1f}\t{round_trip * 10 ** 6:.0f}")
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+
+if __name__ == '__main__':
+    main()
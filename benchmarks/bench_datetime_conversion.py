@@ -0,0 +1,70 @@
+# coding: utf-8
+#
+# BSD 2-Clause License
+#
+# Copyright (c) 2018, Dylan Perry <dylan.perry@gmail.com>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+"""
+DatetimeConversionMixin against the strptime/astimezone conversion it replaced, over 1M rows
+
+Run with the package importable, e.g. ``PYTHONPATH=src python benchmarks/bench_datetime_conversion.py``.
+"""
+
+from datetime import datetime, timedelta, timezone
+from timeit import timeit
+
+from whatdo.adaptor import DatetimeConversionMixin
+
+ROWS = 10 ** 6
+
+
+def reference_to_datetime(in_: str) -> datetime:
+    return datetime.strptime(in_, DatetimeConversionMixin.P_FMT).replace(tzinfo=timezone.utc).astimezone(
+        tz=None).replace(tzinfo=None)
+
+
+def reference_from_datetime(out: datetime) -> str:
+    return out.astimezone(tz=timezone.utc).replace(tzinfo=None).isoformat(timespec='microseconds')
+
+
+def main() -> None:
+    conversion = DatetimeConversionMixin()
+    # Roughly four years of events, ten minutes apart
+    times = [datetime(2016, 1, 1) + timedelta(minutes=10 * i, microseconds=i) for i in range(ROWS)]
+    strings = [conversion.from_datetime(when) for when in times]
+
+    print("conversion\treference s\tmixin s\tspeedup")
+    for name, reference, mixin, data in (
+            ('to_datetime', reference_to_datetime, conversion.to_datetime, strings),
+            ('from_datetime', reference_from_datetime, conversion.from_datetime, times),
+    ):
+        before = timeit(lambda: [reference(x) for x in data], number=1)
+        after = timeit(lambda: [mixin(x) for x in data], number=1)
+        print(f"{name}\t{before:.2f}\t{after:.2f}\t{before / after:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+# coding: utf-8
+#
+# BSD 2-Clause License
+#
+# Copyright (c) 2018, Dylan Perry <dylan.perry@gmail.com>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+"""
+Events per second imported from 1M record files by ``whatdo --import``, including restoring and persisting CSV storage
+
+Run with the package importable, e.g. ``PYTHONPATH=src python benchmarks/bench_import.py``. Files are written to a
+temporary directory.
+"""
+
+import csv
+import json
+import os
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from io import StringIO
+from tempfile import TemporaryDirectory
+from timeit import timeit
+
+from whatdo.adaptor import CsvStorage
+from whatdo.entry import Cli
+
+RECORDS = 10 ** 6
+DESCRIPTIONS = 1000
+
+
+def main() -> None:
+    start = datetime(2016, 1, 1)
+    times = [(start + timedelta(minutes=10 * i)).isoformat(timespec='microseconds') for i in range(RECORDS)]
+    with TemporaryDirectory() as directory:
+        os.chdir(directory)
+        with open('events.csv', 'w', newline='') as output_file:
+            csv.writer(output_file).writerows((when, f"Task {i % DESCRIPTIONS}") for i, when in enumerate(times))
+        with open('events.jsonl', 'w') as output_file:
+            for i, when in enumerate(times):
+                output_file.write(json.dumps({'when': when, 'what': f"Task {i % DESCRIPTIONS}"}) + '\n')
+        history = [(start + timedelta(minutes=10 * i + 5), 'History') for i in range(RECORDS)]
+        print("import\thistory\tevents/s")
+        for path in ('events.csv', 'events.jsonl'):
+            for existing in ([], history):
+                CsvStorage().store(iter(existing))
+                with redirect_stdout(StringIO()):
+                    seconds = timeit(lambda: Cli().run(['--import', path]), number=1)
+                print(f"{path}\t{len(existing)}\t{RECORDS / seconds:.0f}")
+
+
+if __name__ == '__main__':
+    main()
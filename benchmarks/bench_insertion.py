@@ -0,0 +1,63 @@
+# coding: utf-8
+#
+# BSD 2-Clause License
+#
+# Copyright (c) 2018, Dylan Perry <dylan.perry@gmail.com>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+"""
+Cost of keeping timesheets in chronological order: appending in order, back-dating single events and merging batches
+
+Run with the package importable, e.g. ``PYTHONPATH=src python benchmarks/bench_insertion.py``.
+"""
+
+from datetime import datetime, timedelta
+from random import Random
+from timeit import timeit
+
+from whatdo.model import ColumnarTimesheet, Event, Timesheet
+
+EVENTS = 10 ** 6
+BACK_DATED = 1000
+
+
+def main() -> None:
+    random = Random(1985)
+    start = datetime(2016, 1, 1)
+    events = [Event(start + timedelta(minutes=10 * i), f"Task {i % 1000}") for i in range(EVENTS)]
+    late = [Event(start + timedelta(minutes=10 * random.randrange(EVENTS) + 5), 'Late') for _ in range(BACK_DATED)]
+    # Two interleaved sorted runs
+    batch = [Event(event.when + timedelta(minutes=5), event.what) for event in events[::2]]
+    print("timesheet\tappend in order s\tback-dated per event us\tmerge batch s")
+    for timesheet_type in (Timesheet, ColumnarTimesheet):
+        timesheet = timesheet_type()
+        in_order = timeit(lambda: [timesheet.append(event) for event in events], number=1)
+        back_dated = timeit(lambda: [timesheet.append(event) for event in late], number=1)
+        merged = timeit(lambda: timesheet.merge(batch), number=1)
+        print(f"{timesheet_type.__name__}\t{in_order:.2f}\t{back_dated / BACK_DATED * 10 ** 6:.1f}\t{merged:.2f}")
+
+
+if __name__ == '__main__':
+    main()
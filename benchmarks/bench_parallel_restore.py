@@ -0,0 +1,67 @@
+# coding: utf-8
+#
+# BSD 2-Clause License
+#
+# Copyright (c) 2018, Dylan Perry <dylan.perry@gmail.com>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+"""
+Time to read and restore 1M CSV rows as the number of worker processes grows
+
+Run with the package importable, e.g. ``PYTHONPATH=src python benchmarks/bench_parallel_restore.py``. Files are
+written to a temporary directory. Workers parse chunks of the file, the records are still decoded and added to the
+timesheet in one process, which bounds the speed up.
+"""
+
+import os
+from datetime import datetime, timedelta
+from tempfile import TemporaryDirectory
+from timeit import timeit
+
+from whatdo.adaptor import CsvStorage
+from whatdo.model import Timesheet
+from whatdo.port import Storage
+
+ROWS = 10 ** 6
+DESCRIPTIONS = 1000
+
+
+def main() -> None:
+    start = datetime(2016, 1, 1)
+    records = [(start + timedelta(minutes=10 * i), f"Task {i % DESCRIPTIONS}") for i in range(ROWS)]
+    with TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'timesheet.csv')
+        CsvStorage(path).store(iter(records))
+        print(f"cpus\t{os.cpu_count()}")
+        print("workers\tretrieve s\trestore s")
+        for workers in (1, 2, 4, 8):
+            storage_interface = CsvStorage(path, workers=workers)
+            retrieve = timeit(lambda: list(storage_interface.retrieve()), number=1)
+            restore = timeit(lambda: Storage(Timesheet(), storage_interface).restore(), number=1)
+            print(f"{workers}\t{retrieve:.2f}\t{restore:.2f}")
+
+
+if __name__ == '__main__':
+    main()
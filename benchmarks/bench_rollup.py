@@ -0,0 +1,62 @@
+# coding: utf-8
+#
+# BSD 2-Clause License
+#
+# Copyright (c) 2018, Dylan Perry <dylan.perry@gmail.com>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+"""
+Time to summarise ranges of 1M events by scanning them against combining rollup period totals
+
+Run with the package importable, e.g. ``PYTHONPATH=src python benchmarks/bench_rollup.py``.
+"""
+
+from datetime import datetime, timedelta
+from timeit import timeit
+
+from whatdo.model import ColumnarTimesheet, Event, Rollup
+
+EVENTS = 10 ** 6
+DESCRIPTIONS = 1000
+
+
+def main() -> None:
+    timesheet = ColumnarTimesheet()
+    start = datetime(2000, 1, 1)
+    for i in range(EVENTS):
+        timesheet.append(Event(start + timedelta(minutes=10 * i), f"Task {i % DESCRIPTIONS}"))
+    build = timeit(lambda: Rollup(timesheet), number=1)
+    rollup = Rollup(timesheet)
+    print(f"rollup build s\t{build:.2f}")
+    print("range\tscan s\trollup s")
+    for days in (1, 30, 365, 5 * 365):
+        end = start + timedelta(days=days, hours=12)
+        scan = timeit(lambda: timesheet.find_in_range(start, end).summarise(), number=1)
+        combined = timeit(lambda: rollup.summarise(start, end), number=1)
+        print(f"{days} days\t{scan:.4f}\t{combined:.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# coding: utf-8
+#
+# BSD 2-Clause License
+#
+# Copyright (c) 2018, Dylan Perry <dylan.perry@gmail.com>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+"""
+Cold start of ``whatdo <what>`` and ``whatdo today``, wall time per process and import time from ``-X importtime``
+
+Run with the package importable, e.g. ``PYTHONPATH=src python benchmarks/bench_startup.py``. Each command runs in a
+new interpreter in a temporary directory, against a small timesheet. The slowest imports of the last run are listed.
+"""
+
+import os
+import subprocess
+import sys
+from statistics import median
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import List, Tuple
+
+RUNS = 20
+SLOWEST = 8
+COMMANDS = {
+    'python': "pass",
+    'whatdo <what>': "import sys; from whatdo.entry import cli; sys.argv = ['whatdo', 'Eat', 'a', 'potato']; cli()",
+    'whatdo today': "import sys; from whatdo.entry import cli; sys.argv = ['whatdo', 'today']; cli()",
+}
+
+
+def run(code: str) -> Tuple[float, List[Tuple[int, str]]]:
+    """
+    Wall seconds of one process, with the cumulative microseconds of each top level import
+    """
+    start = perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    seconds = perf_counter() - start
+    imports = []
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and not line.startswith('import time: self'):
+            _, cumulative, name = line[len('import time:'):].split('|')
+            # Only imports made directly by the command, nested imports are counted within them
+            if not name.startswith('  '):
+                imports.append((int(cumulative), name.strip()))
+    return seconds, imports
+
+
+def main() -> None:
+    path = os.pathsep.join(sys.path)
+    with TemporaryDirectory() as directory:
+        os.chdir(directory)
+        os.environ['PYTHONPATH'] = path
+        print("command\twall ms\timport ms")
+        for command, code in COMMANDS.items():
+            # Writes bytecode caches and the timesheet
+            run(code)
+            runs = [run(code) for _ in range(RUNS)]
+            wall = median(seconds for seconds, _ in runs)
+            imported = median(sum(cumulative for cumulative, _ in imports) for _, imports in runs)
+            print(f"{command}\t{wall * 1000:.1f}\t{imported / 1000:.1f}")
+            for cumulative, name in sorted(runs[-1][1], reverse=True)[:SLOWEST]:
+                print(f"\t{name}\t{cumulative / 1000:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# coding: utf-8
+#
+# BSD 2-Clause License
+#
+# Copyright (c) 2018, Dylan Perry <dylan.perry@gmail.com>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+"""
+Time to summarise one day from 1M stored rows, CsvStorage filtering everything against shards and adaptors that seek
+
+Run with the package importable, e.g. ``PYTHONPATH=src python benchmarks/bench_storage_range.py``. Files are
+written to a temporary directory.
+"""
+
+import os
+from datetime import datetime, timedelta
+from tempfile import TemporaryDirectory
+from timeit import timeit
+
+from whatdo.adaptor import CsvStorage, BinaryStorage, SqliteStorage, MonthlyCsvStorage, YearlyCsvStorage
+from whatdo.model import Timesheet
+from whatdo.port import Storage, Timetracker
+
+ROWS = 10 ** 6
+DESCRIPTIONS = 1000
+
+
+def main() -> None:
+    start = datetime(2016, 1, 1)
+    records = [(start + timedelta(minutes=10 * i), f"Task {i % DESCRIPTIONS}") for i in range(ROWS)]
+    day = records[ROWS // 2][0].date()
+    with TemporaryDirectory() as directory:
+        os.chdir(directory)
+        print("storage\ttask_summary_by_day s")
+        for storage_interface in (CsvStorage(), YearlyCsvStorage(), MonthlyCsvStorage(), BinaryStorage(),
+                                  SqliteStorage()):
+            storage_interface.store(iter(records))
+            timesheet = Timesheet()
+            timetracker = Timetracker(timesheet, Storage(timesheet, storage_interface))
+            seconds = timeit(lambda: timetracker.task_summary_by_day(day), number=1)
+            print(f"{type(storage_interface).__name__}\t{seconds:.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# coding: utf-8
+#
+# BSD 2-Clause License
+#
+# Copyright (c) 2018, Dylan Perry <dylan.perry@gmail.com>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+"""
+Restore time of each storage adaptor at 1M rows
+
+Run with the package importable, e.g. ``PYTHONPATH=src python benchmarks/bench_storage_restore.py``. Files are
+written to a temporary directory.
+"""
+
+import os
+from datetime import datetime, timedelta
+from tempfile import TemporaryDirectory
+from timeit import timeit
+
+from whatdo.adaptor import CsvStorage, BinaryStorage, SqliteStorage
+from whatdo.model import Timesheet
+from whatdo.port import Storage
+
+ROWS = 10 ** 6
+DESCRIPTIONS = 1000
+
+
+def main() -> None:
+    start = datetime(2016, 1, 1)
+    records = [(start + timedelta(minutes=10 * i), f"Task {i % DESCRIPTIONS}") for i in range(ROWS)]
+    with TemporaryDirectory() as directory:
+        os.chdir(directory)
+        print("storage\tbytes\tretrieve s\trestore s")
+        for storage_interface in (CsvStorage(), BinaryStorage(), SqliteStorage()):
+            storage_interface.store(iter(records))
+            size = sum(os.path.getsize(name) for name in os.listdir(directory))
+            retrieve = timeit(lambda: list(storage_interface.retrieve()), number=1)
+            restore = timeit(lambda: Storage(Timesheet(), storage_interface).restore(), number=1)
+            print(f"{type(storage_interface).__name__}\t{size}\t{retrieve:.2f}\t{restore:.2f}")
+            for name in os.listdir(directory):
+                os.remove(name)
+
+
+if __name__ == '__main__':
+    main()
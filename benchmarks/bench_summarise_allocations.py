@@ -0,0 +1,80 @@
+# coding: utf-8
+#
+# BSD 2-Clause License
+#
+# Copyright (c) 2018, Dylan Perry <dylan.perry@gmail.com>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+"""
+Time, memory and Task objects allocated by Timesheet.summarise over 1M events
+
+Run with the package importable, e.g. ``PYTHONPATH=src python benchmarks/bench_summarise_allocations.py``.
+tracemalloc only follows blocks still alive, so short lived merge results are counted by wrapping Task.__init__.
+"""
+
+import tracemalloc
+from datetime import datetime, timedelta
+from time import perf_counter
+from typing import Any
+
+from whatdo.model import Event, Timesheet, Task
+
+EVENTS = 10 ** 6
+DESCRIPTIONS = 1000
+
+
+def main() -> None:
+    start = datetime(2016, 1, 1)
+    timesheet = Timesheet(Event(start + timedelta(minutes=10 * i), f"Task {i % DESCRIPTIONS}") for i in range(EVENTS))
+
+    began = perf_counter()
+    timesheet.summarise()
+    elapsed = perf_counter() - began
+
+    tracemalloc.start()
+    timesheet.summarise()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    created = 0
+    task_init = Task.__init__
+
+    def counting_init(self: Task, *args: Any) -> None:
+        nonlocal created
+        created += 1
+        task_init(self, *args)
+
+    setattr(Task, '__init__', counting_init)
+    try:
+        timesheet.summarise()
+    finally:
+        setattr(Task, '__init__', task_init)
+
+    print("seconds\tpeak MiB\tTask objects")
+    print(f"{elapsed:.2f}\t{peak / 2 ** 20:.1f}\t{created}")
+
+
+if __name__ == '__main__':
+    main()
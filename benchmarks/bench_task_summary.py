@@ -0,0 +1,57 @@
+# coding: utf-8
+#
+# BSD 2-Clause License
+#
+# Copyright (c) 2018, Dylan Perry <dylan.perry@gmail.com>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+"""
+TaskSummary construction time as the number of events grows
+
+Run with the package importable, e.g. ``PYTHONPATH=src python benchmarks/bench_task_summary.py``. Distinct
+descriptions grow with the number of events, so time per event stays flat only if aggregation is linear.
+"""
+
+from datetime import timedelta
+from timeit import timeit
+
+from whatdo.model import Task, TaskSummary
+
+
+def tasks(count: int, distinct: int) -> list:
+    return [Task(timedelta(minutes=i % 60), f"Task {i % distinct}") for i in range(count)]
+
+
+def main() -> None:
+    print("events\tdistinct\tseconds\tns/event")
+    for count in (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6):
+        distinct = max(count // 100, 1)
+        data = tasks(count, distinct)
+        seconds = timeit(lambda: TaskSummary(data), number=1)
+        print(f"{count}\t{distinct}\t{seconds:.3f}\t{seconds / count * 1e9:.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+# coding: utf-8
+#
+# BSD 2-Clause License
+#
+# Copyright (c) 2018, Dylan Perry <dylan.perry@gmail.com>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+"""
+Memory held by Timesheet against ColumnarTimesheet for 1M events
+
+Run with the package importable, e.g. ``PYTHONPATH=src python benchmarks/bench_timesheet_memory.py``.
+"""
+
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Type
+
+from whatdo.model import Event, Timesheet, ColumnarTimesheet, TimesheetInterface
+
+EVENTS = 10 ** 6
+DESCRIPTIONS = 1000
+
+
+def allocated(timesheet: Type[TimesheetInterface]) -> int:
+    # Descriptions as read back from storage, each event holding its own string
+    tracemalloc.start()
+    start = datetime(2016, 1, 1)
+    events = timesheet()
+    for i in range(EVENTS):
+        events.append(Event(start + timedelta(minutes=10 * i), f"Task {i % DESCRIPTIONS}"))
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current
+
+
+def main() -> None:
+    print("timesheet\tMiB\tbytes/event")
+    for timesheet in (Timesheet, ColumnarTimesheet):
+        size = allocated(timesheet)
+        print(f"{timesheet.__name__}\t{size / 2 ** 20:.1f}\t{size / EVENTS:.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# coding: utf-8
+#
+# BSD 2-Clause License
+#
+# Copyright (c) 2018, Dylan Perry <dylan.perry@gmail.com>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+"""
+Where summarising with NumPy overtakes the pure Python summaries, by number of events
+
+Run with the package and NumPy importable, e.g. ``PYTHONPATH=src python benchmarks/bench_vectorised.py``. The
+vectorised timesheet always uses NumPy here. Converting records to arrays to summarise them once takes longer than
+the pure Python summary of the records, so only timesheets already holding columns are vectorised.
+"""
+
+from datetime import datetime, timedelta
+from timeit import repeat
+
+from whatdo import vectorised
+from whatdo.model import ColumnarTimesheet, Event, Timesheet
+from whatdo.vectorised import VectorisedTimesheet
+
+DESCRIPTIONS = 100
+
+
+def best(function: object, events: int) -> float:
+    number = max(1, 10 ** 5 // events)
+    return min(repeat(function, number=number, repeat=5)) / number
+
+
+def main() -> None:
+    # Always vectorised, to find where it pays
+    vectorised.THRESHOLD = 0
+    start = datetime(2016, 1, 1)
+    print("events\tTimesheet us\tColumnarTimesheet us\tVectorisedTimesheet us")
+    for events in (10, 100, 300, 1000, 3000, 10 ** 4, 10 ** 5, 10 ** 6):
+        records = [(start + timedelta(minutes=10 * i), f"Task {i % DESCRIPTIONS}") for i in range(events)]
+        timesheets = [timesheet(Event(when, what) for when, what in records)
+                      for timesheet in (Timesheet, ColumnarTimesheet, VectorisedTimesheet)]
+        times = [best(timesheet.summarise, events) for timesheet in timesheets]
+        print(f"{events}\t" + "\t".join(f"{seconds * 10 ** 6:.1f}" for seconds in times))
+
+
+if __name__ == '__main__':
+    main()
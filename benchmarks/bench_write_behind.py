@@ -0,0 +1,78 @@
+# coding: utf-8
+#
+# BSD 2-Clause License
+#
+# Copyright (c) 2018, Dylan Perry <dylan.perry@gmail.com>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+"""
+Events per second persisted one at a time against writing behind in groups, for each sync policy
+
+Run with the package importable, e.g. ``PYTHONPATH=src python benchmarks/bench_write_behind.py``. Events are
+persisted to CSV storage in a temporary directory, a write behind storage is flushed once at the end.
+"""
+
+import os
+from datetime import datetime, timedelta
+from tempfile import TemporaryDirectory
+from timeit import timeit
+
+from whatdo.adaptor import CsvStorage
+from whatdo.model import Event, Timesheet
+from whatdo.port import Storage, WriteBehindStorage
+
+EVENTS = 10 ** 4
+
+
+def main() -> None:
+    start = datetime(2016, 1, 1)
+    events = [Event(start + timedelta(minutes=i), f"Task {i % 100}") for i in range(EVENTS)]
+    with TemporaryDirectory() as directory:
+        os.chdir(directory)
+        print("storage\tevents/s")
+
+        def persist_each(storage: Storage) -> None:
+            for event in events:
+                storage.timesheet.append(event)
+                storage.persist()
+                storage.adaptor.sync()
+
+        storage = Storage(Timesheet(), CsvStorage())
+        print(f"persist and sync each\t{EVENTS / timeit(lambda: persist_each(storage), number=1):.0f}")
+        for sync in WriteBehindStorage.SYNC:
+            os.remove('timesheet.csv')
+            write_behind = WriteBehindStorage(Timesheet(), CsvStorage(), sync=sync)
+
+            def write_behind_all() -> None:
+                for event in events:
+                    write_behind.timesheet.append(event)
+                write_behind.flush()
+
+            print(f"write behind, sync {sync}\t{EVENTS / timeit(write_behind_all, number=1):.0f}")
+            write_behind.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+# coding: utf-8
+#
+# BSD 2-Clause License
+#
+# Copyright (c) 2018, Dylan Perry <dylan.perry@gmail.com>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+"""
+Time the core operations on a synthetic timesheet, saving or comparing against JSON baselines
+
+Run with the package importable, e.g. ``PYTHONPATH=src python benchmarks/suite.py --save baselines/mine.json``,
+then after a change ``PYTHONPATH=src python benchmarks/suite.py --compare baselines/mine.json``. Comparing exits
+with status 1 if any case is slower than the baseline by more than the tolerance. Each case is the best of several
+runs, baselines record the timesheet parameters and only compare with the same ones.
+"""
+
+import json
+import os
+import platform
+import sys
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+from datetime import timedelta
+from io import StringIO
+from tempfile import TemporaryDirectory
+from timeit import repeat
+from typing import Callable, Dict, List, Optional
+
+import synthetic
+from whatdo.adaptor import CsvStorage
+from whatdo.entry import Cli
+from whatdo.model import TaskSummary
+
+
+def cases(parameters: Dict[str, int], directory: str) -> Dict[str, Callable[[], object]]:
+    records = synthetic.records(**parameters)
+    timesheet = synthetic.timesheet(**parameters)
+    tasks = [start.to_task(end) for start, end in zip(timesheet, timesheet[1:])]
+    middle = timesheet[len(timesheet) // 2].when.replace(hour=0, minute=0, second=0, microsecond=0)
+    storage = CsvStorage(os.path.join(directory, 'timesheet.csv'))
+    storage.store(iter(records))
+    # The CLI reads from its own copy, as logging adds to it
+    os.environ['WHATDO_ROOT'] = os.path.join(directory, 'cli')
+    os.mkdir(os.environ['WHATDO_ROOT'])
+    CsvStorage().store(iter(records))
+    return {
+        'find_in_range_day': lambda: timesheet.find_in_range(middle, middle + timedelta(days=1)),
+        'summarise_all': timesheet.summarise,
+        'task_summary': lambda: TaskSummary(tasks),
+        'csv_retrieve': lambda: list(storage.retrieve()),
+        'csv_store': lambda: storage.store(iter(records)),
+        'cli_log': lambda: Cli().run(['Benchmark']),
+        'cli_today': lambda: Cli().run(['today']),
+    }
+
+
+def run(parameters: Dict[str, int], number: int) -> Dict[str, float]:
+    results = {}
+    # The CLI cases print
+    with TemporaryDirectory() as directory, redirect_stdout(StringIO()):
+        for name, case in cases(parameters, directory).items():
+            results[name] = min(repeat(case, number=1, repeat=number))
+    return results
+
+
+def compare(baseline: Dict[str, object], results: Dict[str, float], tolerance: float) -> List[str]:
+    """
+    Cases slower than the baseline by more than tolerance, printing each against its baseline
+    """
+    slower = []
+    print("case\tbaseline s\tseconds\tratio")
+    baseline_results = baseline['results']
+    assert isinstance(baseline_results, dict)
+    for name, seconds in results.items():
+        before = baseline_results.get(name)
+        if before is None:
+            print(f"{name}\t-\t{seconds:.4f}\t-")
+            continue
+        ratio = seconds / before
+        print(f"{name}\t{before:.4f}\t{seconds:.4f}\t{ratio:.2f}")
+        if ratio > tolerance:
+            slower.append(name)
+    return slower
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    parser = ArgumentParser(description="Time whatdo on a synthetic timesheet")
+    parser.add_argument('--events', type=int, default=10 ** 5)
+    parser.add_argument('--descriptions', type=int, default=100)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5, help="runs of each case, the best is kept")
+    parser.add_argument('--save', metavar='PATH', help="write results as a JSON baseline")
+    parser.add_argument('--compare', metavar='PATH', help="compare results with a JSON baseline")
+    parser.add_argument('--tolerance', type=float, default=1.25, help="slowest ratio to baseline that passes")
+    arguments = parser.parse_args(args)
+    parameters = {'events': arguments.events, 'descriptions': arguments.descriptions, 'days': arguments.days,
+                  'seed': arguments.seed}
+    baseline = None
+    if arguments.compare:
+        with open(arguments.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline['parameters'] != parameters:
+            parser.error(f"baseline was run with {baseline['parameters']}")
+
+    results = run(parameters, arguments.repeat)
+
+    status = 0
+    if baseline is None:
+        print("case\tseconds")
+        for name, seconds in results.items():
+            print(f"{name}\t{seconds:.4f}")
+    else:
+        slower = compare(baseline, results, arguments.tolerance)
+        if slower:
+            print(f"Slower than baseline: {', '.join(slower)}", file=sys.stderr)
+            status = 1
+    if arguments.save:
+        with open(arguments.save, 'w') as output_file:
+            json.dump({'parameters': parameters, 'python': platform.python_version(), 'machine': platform.machine(),
+                       'results': results}, output_file, indent=2)
+            output_file.write('\n')
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
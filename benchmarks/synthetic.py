@@ -0,0 +1,80 @@
+# coding: utf-8
+#
+# BSD 2-Clause License
+#
+# Copyright (c) 2018, Dylan Perry <dylan.perry@gmail.com>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+"""
+Synthetic timesheets of a given number of events, distinct descriptions and span of days
+
+Run with the package importable to write one as CSV, e.g.
+``PYTHONPATH=src python benchmarks/synthetic.py --events 100000 timesheet.csv``. The same seed gives the same timesheet.
+Events are spread evenly through the span with some jitter, and a few descriptions are used far more than the rest.
+"""
+
+from argparse import ArgumentParser
+from datetime import datetime, timedelta
+from random import Random
+from typing import List, Optional, Tuple
+
+from whatdo.adaptor import CsvStorage
+from whatdo.model import Event, Timesheet
+
+START = datetime(2016, 1, 1)
+
+
+def records(events: int = 10 ** 5, descriptions: int = 100, days: int = 365, seed: int = 0,
+            start: datetime = START) -> List[Tuple[datetime, str]]:
+    """
+    Records in chronological order, from start through the span of days
+    """
+    random = Random(seed)
+    step = timedelta(days=days) / max(events, 1)
+    # Weighted like real work, the first descriptions come up most
+    names = [f"Task {i}" for i in range(descriptions)]
+    weights = [1 / (i + 1) for i in range(descriptions)]
+    whats = random.choices(names, weights, k=events)
+    return [(start + step * (i + random.random()), what) for i, what in enumerate(whats)]
+
+
+def timesheet(events: int = 10 ** 5, descriptions: int = 100, days: int = 365, seed: int = 0) -> Timesheet:
+    return Timesheet(Event(when, what) for when, what in records(events, descriptions, days, seed))
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    parser = ArgumentParser(description="Write a synthetic timesheet as CSV")
+    parser.add_argument('path')
+    parser.add_argument('--events', type=int, default=10 ** 5)
+    parser.add_argument('--descriptions', type=int, default=100)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--seed', type=int, default=0)
+    arguments = parser.parse_args(args)
+    CsvStorage(arguments.path).store(iter(records(arguments.events, arguments.descriptions, arguments.days,
+                                                  arguments.seed)))
+
+
+if __name__ == '__main__':
+    main()
@@ -29,12 +29,33 @@
 #
 
 import csv
-from argparse import ArgumentParser
-from datetime import datetime, timezone, date
+import fcntl
+import os
+import re
+import sys
+import time
+from array import array
+from contextlib import ExitStack, closing, contextmanager
+from bisect import bisect_right, bisect_left
+from datetime import datetime, timezone, date, timedelta
+from io import StringIO
+from itertools import chain, islice
 from math import modf
-from typing import List, Iterator, Tuple
+from threading import Lock
+from typing import TYPE_CHECKING, Any, List, Iterator, Tuple, Iterable, Callable, Dict, BinaryIO, Type, Sequence, \
+    Optional, Union, Set, TextIO, AsyncIterator, TypeVar
 
-from .port import StorageInterface, Timetracker
+from .port import StorageInterface, Timetracker, SummaryCacheInterface, AsyncStorageInterface
+
+# Slow to import or only used by some storages and commands, so only imported where used. csv and fcntl are needed to
+# log an event with the default CsvStorage.
+if TYPE_CHECKING:
+    import mmap
+    import sqlite3
+    from argparse import ArgumentParser, Namespace
+    from concurrent.futures import Executor
+
+T = TypeVar('T')
 
 
 class CommandLine(object):
@@ -44,17 +65,56 @@ class CommandLine(object):
 
     def __init__(self, timetracker: Timetracker) -> None:
         self.timetracker = timetracker
+        self.parser: Optional['ArgumentParser'] = None
+
+    def parse_options(self, arguments: List[str]) -> 'Namespace':
+        if self.parser is None:
+            from argparse import ArgumentParser
+            self.parser = ArgumentParser(description=self.__doc__)
+            self.parser.add_argument('--import', dest='import_path', metavar='PATH',
+                                     help="merge events from a CSV or JSON lines file")
+            self.parser.add_argument('what', nargs='*')
+        options = self.parser.parse_args(arguments)
+        if (options.import_path is None) == (not options.what):
+            self.parser.error("expected either what to log or --import PATH")
+        return options
+
+    def parse(self, arguments: List[str]) -> str:
+        # Words without options parse the same without building the parser
+        if arguments and not any(argument.startswith('-') for argument in arguments):
+            return ' '.join(arguments)
+        return ' '.join(self.parse_options(arguments).what)
 
-    def __call__(self, arguments: List[str]) -> int:
-        parser = ArgumentParser(description=self.__doc__)
-        parser.add_argument('what', nargs='+')
-        what: str = ' '.join(parser.parse_args(arguments).what)
+    def import_path(self, arguments: List[str]) -> Optional[str]:
+        # An option rather than a word, so events such as 'import taxes' are logged like any other
+        if not any(argument.startswith('--import') for argument in arguments):
+            return None
+        path: Optional[str] = self.parse_options(arguments).import_path
+        return path
+
+    def __call__(self, arguments: List[str], directory: str = '') -> int:
+        """
+        Run a command line, with relative paths in it found in directory rather than the current one
+        """
+        path = self.import_path(arguments)
+        if path is not None:
+            return self.import_file(os.path.join(directory, path))
+        what: str = self.parse(arguments)
         if what == 'today':
             self.output_daily_summary()
         else:
             self.timetracker.log_event(what)
         return 0
 
+    def import_file(self, path: str) -> int:
+        try:
+            count = self.timetracker.import_events(ImportFile(path))
+        except (OSError, ValueError) as error:
+            print(f"whatdo: {error}", file=sys.stderr)
+            return 1
+        print(f"Imported {count} events")
+        return 0
+
     def output_daily_summary(self) -> None:
         tasks = self.timetracker.task_summary_by_day(date.today())
         for duration, description in tasks:
@@ -68,15 +128,255 @@ class CommandLine(object):
             print(" ".join(row) + f"\t{description}")
 
 
+class OffsetCache(object):
+    """
+    Piecewise constant UTC offset of the local timezone
+
+    Each piece is found once by probing either side of a time for the nearest transitions, so the offset is only
+    recomputed when crossing one. Transitions are assumed to be on a quarter hour and at least a day apart. Pieces
+    are forgotten when time.tzset() changes the local timezone.
+    """
+
+    RESOLUTION = timedelta(minutes=15)
+    STEP = 96  # Resolutions per day
+    HORIZON = 366 * 96
+    # Local time conversions fail within a day of the limits of datetime, the offset is taken as constant beyond these
+    FIRST = datetime.min + timedelta(days=2)
+    LAST = datetime.max - timedelta(days=2)
+
+    def __init__(self, offset: Callable[[datetime], timedelta]) -> None:
+        self.offset = offset
+        self.reset()
+
+    def reset(self) -> None:
+        # tzset() replaces time.tzname, even when the names are unchanged
+        self.zone = time.tzname
+        self.starts: List[datetime] = []
+        self.pieces: List[Tuple[datetime, datetime, timedelta]] = []
+        self.last = (datetime.max, datetime.min, timedelta())
+
+    def __call__(self, when: datetime) -> timedelta:
+        start, end, offset = self.last
+        if start <= when < end and self.zone is time.tzname:
+            return offset
+        return self.piece(when)[2]
+
+    def piece(self, when: datetime) -> Tuple[datetime, datetime, timedelta]:
+        """
+        Start, end and offset of the piece containing when
+        """
+        if self.zone is not time.tzname:
+            self.reset()
+        i = bisect_right(self.starts, when) - 1
+        if i >= 0 and when < self.pieces[i][1]:
+            self.last = self.pieces[i]
+        else:
+            self.last = self.find(when)
+            i = bisect_right(self.starts, self.last[0])
+            self.starts.insert(i, self.last[0])
+            self.pieces.insert(i, self.last)
+        return self.last
+
+    def find(self, when: datetime) -> Tuple[datetime, datetime, timedelta]:
+        origin = min(max(when, self.FIRST), self.LAST)
+        origin -= timedelta(minutes=origin.minute % 15, seconds=origin.second, microseconds=origin.microsecond)
+        offset = self.offset(origin)
+        before = self.edge(origin, offset, -self.RESOLUTION)
+        after = self.edge(origin, offset, self.RESOLUTION)
+        return (datetime.min if before is None else origin - (before - 1) * self.RESOLUTION,
+                datetime.max if after is None else origin + after * self.RESOLUTION, offset)
+
+    def edge(self, origin: datetime, offset: timedelta, direction: timedelta) -> Optional[int]:
+        """
+        Resolutions from origin to the first time with a different offset, the horizon if there is none or None if
+        there is none up to the limit of datetime
+        """
+        limit = (origin - self.FIRST if direction < timedelta() else self.LAST - origin) // self.RESOLUTION
+        horizon = min(self.HORIZON, limit)
+        same = 0
+        while same < horizon:
+            probe = min(same + self.STEP, horizon)
+            if self.offset(origin + probe * direction) != offset:
+                break
+            same = probe
+        else:
+            return None if horizon == limit else self.HORIZON
+        # Bisect down to the resolution between the last probe with the same offset and the first without
+        different = probe
+        while different - same > 1:
+            mid = (same + different) // 2
+            if self.offset(origin + mid * direction) == offset:
+                same = mid
+            else:
+                different = mid
+        return different
+
+
+def utc_offset(when: datetime) -> timedelta:
+    """
+    Offset of local time from UTC at a naive UTC time
+    """
+    offset = when.replace(tzinfo=timezone.utc).astimezone(tz=None).utcoffset()
+    return offset if offset is not None else timedelta()
+
+
+def local_offset(when: datetime) -> timedelta:
+    """
+    Offset of local time from UTC at a naive local time
+    """
+    # Not astimezone(tz=None).utcoffset(), that moves times skipped by a transition
+    return when - when.astimezone(tz=timezone.utc).replace(tzinfo=None)
+
+
+def in_root(name: str) -> str:
+    """
+    Path of a file in the directory named by WHATDO_ROOT, otherwise the working directory
+    """
+    return os.path.join(os.environ.get('WHATDO_ROOT', ''), name)
+
+
+def sync_file(path: str) -> None:
+    """
+    Force a file or directory that has been written on to disk, if it exists
+    """
+    try:
+        descriptor = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+class FileLockMixin(object):
+    """
+    Advisory lock on the file at lock_path, shared while reading
+
+    Nested locks held by one instance share the outermost, taking it exclusively if any of them need to. They can be
+    held from more than one thread, such as a writer behind, which share the instance's lock in the same way.
+    """
+
+    lock_path: str
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.lock_fd: Optional[int] = None
+        self.lock_mode = fcntl.LOCK_UN
+        self.lock_depth = 0
+        # Guards the three above
+        self.lock_guard = Lock()
+
+    @contextmanager
+    def lock(self, exclusive: bool = True) -> Iterator[None]:
+        mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        with self.lock_guard:
+            if self.lock_fd is None:
+                self.lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if self.lock_mode == fcntl.LOCK_UN or (exclusive and self.lock_mode == fcntl.LOCK_SH):
+                    fcntl.flock(self.lock_fd, mode)
+                    self.lock_mode = mode
+            except BaseException:
+                if not self.lock_depth:
+                    self.unlock()
+                raise
+            self.lock_depth += 1
+        try:
+            yield
+        finally:
+            with self.lock_guard:
+                self.lock_depth -= 1
+                if not self.lock_depth:
+                    self.unlock()
+
+    def unlock(self) -> None:
+        if self.lock_fd is not None:
+            # Closing releases the lock
+            os.close(self.lock_fd)
+            self.lock_fd = None
+            self.lock_mode = fcntl.LOCK_UN
+
+
 class DatetimeConversionMixin(object):
     P_FMT = '%Y-%m-%dT%H:%M:%S.%f'
+    # P_FMT as written by from_datetime, which can be parsed without strptime
+    P_PATTERN = re.compile(r'([0-9]{4})-([0-9]{2})-([0-9]{2})T([0-9]{2}):([0-9]{2}):([0-9]{2})\.([0-9]{6})\Z')
     ISO_TIMESPEC = 'microseconds'
+    EPOCH = datetime(1970, 1, 1)
+    MICROSECOND = timedelta(microseconds=1)
+    # Shared, the local timezone belongs to the process and the caches start afresh when it changes
+    UTC_OFFSET = OffsetCache(utc_offset)
+    LOCAL_OFFSET = OffsetCache(local_offset)
 
     def to_datetime(self, in_: str) -> datetime:
-        return datetime.strptime(in_, self.P_FMT).replace(tzinfo=timezone.utc).astimezone(tz=None).replace(tzinfo=None)
+        match = self.P_PATTERN.match(in_)
+        if match is None:
+            return datetime.strptime(in_, self.P_FMT).replace(tzinfo=timezone.utc).astimezone(tz=None).replace(
+                tzinfo=None)
+        year, month, day, hour, minute, second, microsecond = map(int, match.groups())
+        when = datetime(year, month, day, hour, minute, second, microsecond)
+        return when + self.UTC_OFFSET(when)
 
     def from_datetime(self, out: datetime) -> str:
-        return out.astimezone(tz=timezone.utc).replace(tzinfo=None).isoformat(timespec=self.ISO_TIMESPEC)
+        if out.tzinfo is not None or out.fold:
+            return out.astimezone(tz=timezone.utc).replace(tzinfo=None).isoformat(timespec=self.ISO_TIMESPEC)
+        return (out - self.LOCAL_OFFSET(out)).isoformat(timespec=self.ISO_TIMESPEC)
+
+    def epoch_to_datetime(self, in_: int) -> datetime:
+        """
+        Local time from microseconds since the UTC epoch
+        """
+        when = self.EPOCH + timedelta(microseconds=in_)
+        return when + self.UTC_OFFSET(when)
+
+    def datetime_to_epoch(self, out: datetime) -> int:
+        """
+        Microseconds since the UTC epoch from local time
+        """
+        if out.tzinfo is not None or out.fold:
+            out = out.astimezone(tz=timezone.utc).replace(tzinfo=None)
+        else:
+            out = out - self.LOCAL_OFFSET(out)
+        return (out - self.EPOCH) // self.MICROSECOND
+
+    def epoch_piece(self, in_: int) -> Tuple[int, int, datetime]:
+        """
+        Start and end in microseconds since the UTC epoch of the offset piece containing in_, with the local epoch
+
+        Adding microseconds within the piece to the local epoch gives local time, as epoch_to_datetime.
+        """
+        start, end, offset = self.UTC_OFFSET.piece(self.EPOCH + timedelta(microseconds=in_))
+        return (start - self.EPOCH) // self.MICROSECOND, (end - self.EPOCH) // self.MICROSECOND, self.EPOCH + offset
+
+    def parse_epoch(self, in_: str) -> int:
+        """
+        Microseconds since the UTC epoch from UTC time in P_FMT
+        """
+        match = self.P_PATTERN.match(in_)
+        if match is None:
+            when = datetime.strptime(in_, self.P_FMT)
+        else:
+            year, month, day, hour, minute, second, microsecond = map(int, match.groups())
+            when = datetime(year, month, day, hour, minute, second, microsecond)
+        return (when - self.EPOCH) // self.MICROSECOND
+
+    def decode(self, whens: Sequence[int], whats: Sequence[int], descriptions: List[str], ordered: bool,
+               lo: int, hi: int) -> Iterator[Iterator[Tuple[datetime, str]]]:
+        """
+        Records from lo to hi, in runs sharing one UTC offset so each run can be decoded without a Python loop
+        """
+        while lo < hi:
+            start, end, local_epoch = self.epoch_piece(whens[lo])
+            if ordered:
+                stop = bisect_left(whens, end, lo, hi)
+            else:
+                stop = lo + 1
+                while stop < hi and start <= whens[stop] < end:
+                    stop += 1
+            yield zip(map(local_epoch.__add__, map(self.MICROSECOND.__mul__, whens[lo:stop])),
+                      map(descriptions.__getitem__, whats[lo:stop]))
+            lo = stop
 
 
 class MemoryStorage(DatetimeConversionMixin, StorageInterface):
@@ -97,23 +397,792 @@ class MemoryStorage(DatetimeConversionMixin, StorageInterface):
         for record in records:
             self.data.append((self.from_datetime(record[0]), record[1]))
 
+    def append(self, records: Iterable[Tuple[datetime, str]]) -> None:
+        for record in records:
+            self.data.append((self.from_datetime(record[0]), record[1]))
+
     def __len__(self) -> int:
         return len(self.data)
 
 
-class CsvStorage(DatetimeConversionMixin, StorageInterface):
+class CsvStorage(FileLockMixin, DatetimeConversionMixin, StorageInterface):
+    """
+    Rows of UTC time and description, in one file or sharded into a file per month or year
+
+    Shards are named after the file and the period their events are in by local time, e.g. timesheet-2018-09.csv.
+    Appending writes only the shards of the records appended, and retrieving a range reads only the shards it
+    overlaps.
+
+    Storing writes new files then renames them over the old ones, so an interrupted store leaves the old files whole.
+    Appending first cuts off any row left unfinished by an interrupted append. Processes take turns through an
+    advisory lock on a file beside the timesheet, shared while reading.
+    """
+
+    SHARDS: Dict[Optional[str], str] = {None: '', 'year': '%Y', 'month': '%Y-%m'}
+    SHARD_PATTERN = re.compile(r'-([0-9]{4})(?:-([0-9]{2}))?\Z')
+    SHARD: Optional[str] = None
+    BLOCK = 4096
+    # Smallest file read by more than one worker, below this starting them takes longer than reading
+    PARALLEL_SIZE = 1 << 20
+    RECORD_START = re.compile(rb'[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}:[0-9]{2}\.[0-9]{6},')
+
+    def __init__(self, path: Optional[str] = None, shard: Optional[str] = None, workers: Optional[int] = None) -> None:
+        super().__init__()
+        self.path = in_root('timesheet.csv') if path is None else path
+        # Processes reading each large file, from WHATDO_WORKERS unless given
+        self.workers = int(os.environ.get('WHATDO_WORKERS', '1')) if workers is None else workers
+        if self.workers < 1:
+            raise ValueError(f"Expected workers to be at least 1 (got {self.workers})")
+        self.shard = self.SHARD if shard is None else shard
+        if self.shard not in self.SHARDS:
+            raise ValueError(f"Expected shard to be one of {list(self.SHARDS)} (got {self.shard!r})")
+        self.lock_path = f"{self.path}.lock"
+        # Shards appended to since last forced to disk
+        self.unsynced: Set[str] = set()
+
+    def shard_path(self, when: datetime) -> str:
+        if self.shard is None:
+            return self.path
+        stem, extension = os.path.splitext(self.path)
+        return f"{stem}-{when.strftime(self.SHARDS[self.shard])}{extension}"
+
+    def shard_paths(self, start: datetime = datetime.min, end: datetime = datetime.max) -> List[str]:
+        """
+        Shards holding events from start until end, in chronological order
+        """
+        if self.shard is None:
+            return [self.path]
+        directory, name = os.path.split(self.path)
+        stem, extension = os.path.splitext(name)
+        first = (start.year, start.month if self.shard == 'month' else 0)
+        last = (end.year, end.month if self.shard == 'month' else 0)
+        paths = []
+        for shard_name in os.listdir(directory or os.curdir):
+            shard_stem, shard_extension = os.path.splitext(shard_name)
+            match = self.SHARD_PATTERN.search(shard_stem)
+            if shard_extension != extension or match is None or shard_stem[:match.start()] != stem or \
+                    (match.group(2) is None) != (self.shard == 'year'):
+                continue
+            period = (int(match.group(1)), int(match.group(2) or 0))
+            # A range ending as a shard starts does not include it
+            if first <= period <= last and not (period == last and end == self.period_start(period)):
+                paths.append((period, os.path.join(directory, shard_name)))
+        return [path for _, path in sorted(paths)]
+
+    @staticmethod
+    def period_start(period: Tuple[int, int]) -> datetime:
+        return datetime(period[0], period[1] or 1, 1)
+
+    def rows(self, records: Iterable[Tuple[datetime, str]]) -> Dict[str, StringIO]:
+        """
+        Rows to write to each shard
+        """
+        shards: Dict[str, StringIO] = {}
+        for when, what in records:
+            path = self.shard_path(when)
+            buffer = shards.get(path)
+            if buffer is None:
+                buffer = shards[path] = StringIO()
+            csv.writer(buffer).writerow([self.from_datetime(when), what])
+        return shards
+
     def store(self, records: Iterator[Tuple[datetime, str]]) -> None:
-        with open('timesheet.csv', 'w') as output_file:
-            writer = csv.writer(output_file)
-            for record in records:
-                writer.writerow([self.from_datetime(record[0]), record[1]])
+        # Written before locking, the records may be read from another storage sharing the lock file
+        temporaries = self.write_temporaries(records)
+        try:
+            with self.lock():
+                for path, temporary in temporaries.items():
+                    os.replace(temporary, path)
+                for path in self.shard_paths():
+                    if path not in temporaries:
+                        os.remove(path)
+                # The renames themselves
+                sync_file(os.path.dirname(os.path.abspath(self.path)))
+        finally:
+            self.remove_temporaries(temporaries)
+        self.unsynced.clear()
+
+    def write_temporaries(self, records: Iterable[Tuple[datetime, str]]) -> Dict[str, str]:
+        """
+        Temporary files holding the rows of each shard, forced to disk
+
+        Records are in time order, so only the current shard is open and rows are written as they are read.
+        """
+        temporaries: Dict[str, str] = {}
+        output_file: Optional[TextIO] = None
+        current = None
+        try:
+            if self.shard is None:
+                # Storing nothing still replaces the file
+                temporaries[self.path] = self.temporary(self.path)
+                open(temporaries[self.path], 'w').close()
+            for when, what in records:
+                path = self.shard_path(when)
+                if path != current:
+                    if output_file is not None:
+                        self.close_synced(output_file)
+                        output_file = None
+                    if path not in temporaries:
+                        temporaries[path] = self.temporary(path)
+                        output_file = open(temporaries[path], 'w')
+                    else:
+                        output_file = open(temporaries[path], 'a')
+                    writer = csv.writer(output_file)
+                    current = path
+                writer.writerow([self.from_datetime(when), what])
+            if output_file is not None:
+                self.close_synced(output_file)
+        except BaseException:
+            if output_file is not None:
+                output_file.close()
+            self.remove_temporaries(temporaries)
+            raise
+        return temporaries
+
+    @staticmethod
+    def temporary(path: str) -> str:
+        # Other processes may be storing beside this one until the lock is taken
+        return f"{path}.{os.getpid()}.tmp"
+
+    @staticmethod
+    def close_synced(output_file: TextIO) -> None:
+        with output_file:
+            output_file.flush()
+            os.fsync(output_file.fileno())
+
+    @staticmethod
+    def remove_temporaries(temporaries: Dict[str, str]) -> None:
+        for temporary in temporaries.values():
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    def append(self, records: Iterable[Tuple[datetime, str]]) -> None:
+        shards = self.rows(records)
+        with self.lock():
+            for path, buffer in shards.items():
+                self.unsynced.add(path)
+                self.repair(path)
+                with open(path, 'a') as output_file:
+                    # One write, so other readers see whole rows
+                    output_file.write(buffer.getvalue())
+
+    def repair(self, path: str) -> None:
+        """
+        Cut off a row left unfinished by an interrupted append
+        """
+        try:
+            with open(path, 'rb+') as data_file:
+                end = data_file.seek(0, os.SEEK_END)
+                position = end
+                while position > 0:
+                    start = max(0, position - self.BLOCK)
+                    data_file.seek(start)
+                    newline = data_file.read(position - start).rfind(b'\n')
+                    if newline >= 0:
+                        position = start + newline + 1
+                        break
+                    position = start
+                if position < end:
+                    data_file.truncate(position)
+        except FileNotFoundError:
+            pass
+
+    def sync(self) -> None:
+        # Only the shards appended to, the rest of the history is already on disk
+        for path in sorted(self.unsynced):
+            sync_file(path)
+        self.unsynced.clear()
 
     def retrieve(self) -> Iterator[Tuple[datetime, str]]:
+        return self.retrieve_range()
+
+    def retrieve_range(self, start: datetime = datetime.min,
+                       end: datetime = datetime.max) -> Iterator[Tuple[datetime, str]]:
+        with self.lock(exclusive=False), ExitStack() as stack:
+            paths = self.shard_paths(start, end)
+            sizes = self.parallel_sizes(paths)
+            # One pool for every large shard
+            executor = stack.enter_context(self.worker_pool()) if sizes else None
+            for path in paths:
+                if executor is not None and path in sizes:
+                    records = self.read_parallel(path, sizes[path], executor)
+                else:
+                    records = self.read(path)
+                # Shards between the first and last hold only events in range
+                if path == paths[0] or path == paths[-1] or self.shard is None:
+                    records = (record for record in records if start <= record[0] < end)
+                yield from records
+
+    def read(self, path: str) -> Iterator[Tuple[datetime, str]]:
         try:
-            with open('timesheet.csv', 'r') as input_file:
-                reader = csv.reader(input_file)
+            with open(path, 'r') as input_file:
+                # Only the last line can be unfinished, by an append still being written or interrupted
+                reader = csv.reader(line for line in input_file if line.endswith('\n'))
                 for record in reader:
                     yield self.to_datetime(record[0]), record[1]
         except FileNotFoundError:
             # Empty generator
             pass
+
+    def parallel_sizes(self, paths: List[str]) -> Dict[str, int]:
+        """
+        Sizes of the files large enough to be read by worker processes
+        """
+        sizes: Dict[str, int] = {}
+        if self.workers > 1:
+            for path in paths:
+                try:
+                    size = os.path.getsize(path)
+                except FileNotFoundError:
+                    continue
+                if size >= self.PARALLEL_SIZE:
+                    sizes[path] = size
+        return sizes
+
+    def worker_pool(self) -> 'Executor':
+        """
+        Processes started by a fork server, as forking the caller would copy its locks mid-use by other threads
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        from multiprocessing import get_context
+        return ProcessPoolExecutor(self.workers, get_context('forkserver'))
+
+    def read_parallel(self, path: str, size: int, executor: 'Executor') -> Iterator[Tuple[datetime, str]]:
+        """
+        Records read in chunks by worker processes, each returning times and description codes to decode in order
+        """
+        starts = self.chunk_starts(path, size)
+        ends = starts[1:] + [size]
+        for whens, whats, descriptions, ordered in executor.map(read_chunk, [path] * len(starts), starts, ends):
+            yield from chain.from_iterable(self.decode(whens, whats, descriptions, ordered, 0, len(whens)))
+
+    def chunk_starts(self, path: str, size: int) -> List[int]:
+        """
+        Offsets splitting a file into about one chunk per worker, each at the start of a row
+
+        A row starts where a line starts with a time and a comma, so a description continuing over lines is only
+        split if a line of it looks like that.
+        """
+        starts = [0]
+        with open(path, 'rb') as input_file:
+            for worker in range(1, self.workers):
+                position = max(size * worker // self.workers, starts[-1] + 1)
+                # From the byte before, so a line starting exactly there is kept whole
+                input_file.seek(position - 1)
+                input_file.readline()
+                position = input_file.tell()
+                line = input_file.readline()
+                while line and not self.RECORD_START.match(line):
+                    position = input_file.tell()
+                    line = input_file.readline()
+                if not line:
+                    break
+                starts.append(position)
+        return starts
+
+
+def read_chunk(path: str, start: int, end: int) -> Tuple['array[int]', 'array[int]', List[str], bool]:
+    """
+    Rows of a CsvStorage file from start to end as UTC microseconds, codes into descriptions and whether in order
+
+    Run in worker processes, the arrays are compact to send back.
+    """
+    from locale import getpreferredencoding
+    conversion = DatetimeConversionMixin()
+    whens: 'array[int]' = array('q')
+    whats: 'array[int]' = array('I')
+    descriptions: List[str] = []
+    description_ids: Dict[str, int] = {}
+    with open(path, 'rb') as input_file:
+        input_file.seek(start)
+        # Decoded and split into lines as by open in CsvStorage.read
+        data = StringIO(input_file.read(end - start).decode(getpreferredencoding(False)), newline=None)
+    # Only the last line can be unfinished, by an append still being written or interrupted
+    for record in csv.reader(line for line in data if line.endswith('\n')):
+        what = record[1]
+        description_id = description_ids.get(what)
+        if description_id is None:
+            description_id = description_ids[what] = len(descriptions)
+            descriptions.append(what)
+        whens.append(conversion.parse_epoch(record[0]))
+        whats.append(description_id)
+    ordered = all(map(int.__le__, whens, whens[1:]))
+    return whens, whats, descriptions, ordered
+
+
+class MonthlyCsvStorage(CsvStorage):
+    SHARD = 'month'
+
+
+class YearlyCsvStorage(CsvStorage):
+    SHARD = 'year'
+
+
+class BinaryStorage(FileLockMixin, DatetimeConversionMixin, StorageInterface):
+    """
+    Fixed width records of UTC microseconds and description id, followed by a table of descriptions
+
+    The header holds the number of records, the offset of the table and whether records are in chronological order.
+    The table runs to the end of the file, after any free space left by earlier tables. Appending writes records into
+    the free space, first writing a new table past the end of the file when there are new descriptions or too little
+    space. The header is written last, so an interrupted append leaves the records and table it points at whole.
+    Storing writes a new file then renames it over the old one. Processes take turns through an advisory lock on a
+    file beside the timesheet.
+    """
+
+    MAGIC = b'WHATDO\x00\x01'
+    # Magic, number of records, offset of description table, flags
+    HEADER = '<8sQQQ'
+    ORDERED = 1
+    RECORD = '<qq'
+    LENGTH = '<I'
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        import struct
+        super().__init__()
+        self.header = struct.Struct(self.HEADER)
+        self.record = struct.Struct(self.RECORD)
+        self.length = struct.Struct(self.LENGTH)
+        self.path = in_root('timesheet.dat') if path is None else path
+        self.lock_path = f"{self.path}.lock"
+
+    def store(self, records: Iterator[Tuple[datetime, str]]) -> None:
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary, 'wb') as output_file:
+                descriptions: List[str] = []
+                buffer, flags = self.encode(records, descriptions, self.ORDERED, None)
+                output_file.write(self.header.pack(self.MAGIC, len(buffer) // self.record.size,
+                                                   self.header.size + len(buffer), flags))
+                output_file.write(buffer)
+                output_file.write(self.encode_table(descriptions))
+                output_file.flush()
+                os.fsync(output_file.fileno())
+            with self.lock():
+                os.replace(temporary, self.path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+
+    def append(self, records: Iterable[Tuple[datetime, str]]) -> None:
+        with self.lock():
+            try:
+                output_file = open(self.path, 'r+b')
+            except FileNotFoundError:
+                self.store(iter(records))
+                return
+            if not os.fstat(output_file.fileno()).st_size:
+                # Empty, as retrieve reads it
+                output_file.close()
+                self.store(iter(records))
+                return
+            with output_file:
+                count, offset, flags = self.read_header(output_file.read(self.header.size))
+                end = output_file.seek(0, os.SEEK_END)
+                output_file.seek(offset)
+                descriptions = self.read_table(output_file.read(), 0)
+                known = len(descriptions)
+                records_end = self.records_end(count)
+                buffer, appended_flags = self.encode(records, descriptions, flags,
+                                                     self.last_epoch(output_file, records_end) if count else None)
+                if not buffer:
+                    return
+                if len(descriptions) > known or records_end + len(buffer) > offset:
+                    # Past the end of the file and the appended records, used once the header points at it. Until
+                    # then it reads as unused descriptions following the old table.
+                    offset = max(end, records_end + len(buffer))
+                    output_file.seek(offset)
+                    output_file.write(self.encode_table(descriptions))
+                    self.write_header(output_file, count, offset, flags)
+                output_file.seek(records_end)
+                output_file.write(buffer)
+                self.write_header(output_file, count + len(buffer) // self.record.size, offset, appended_flags)
+
+    def sync(self) -> None:
+        sync_file(self.path)
+
+    def encode(self, records: Iterable[Tuple[datetime, str]], descriptions: List[str], flags: int,
+               last: Optional[int]) -> Tuple[bytes, int]:
+        """
+        Records packed following the last epoch stored, adding new descriptions, and the flags once they are stored
+        """
+        description_ids: Dict[str, int] = {what: i for i, what in enumerate(descriptions)}
+        buffer = bytearray()
+        for when, what in records:
+            description_id = description_ids.get(what)
+            if description_id is None:
+                description_id = description_ids[what] = len(descriptions)
+                descriptions.append(what)
+            epoch = self.datetime_to_epoch(when)
+            if last is not None and epoch < last:
+                flags &= ~self.ORDERED
+            last = epoch
+            buffer += self.record.pack(epoch, description_id)
+        return bytes(buffer), flags
+
+    def encode_table(self, descriptions: List[str]) -> bytes:
+        table = bytearray()
+        for what in descriptions:
+            encoded = what.encode('utf-8')
+            table += self.length.pack(len(encoded)) + encoded
+        return bytes(table)
+
+    def write_header(self, output_file: BinaryIO, count: int, offset: int, flags: int) -> None:
+        output_file.seek(0)
+        output_file.write(self.header.pack(self.MAGIC, count, offset, flags))
+
+    def records_end(self, count: int) -> int:
+        return self.header.size + count * self.record.size
+
+    def last_epoch(self, output_file: BinaryIO, records_end: int) -> int:
+        output_file.seek(records_end - self.record.size)
+        epoch: int = self.record.unpack(output_file.read(self.record.size))[0]
+        return epoch
+
+    def read_header(self, data: Union[bytes, 'mmap.mmap']) -> Tuple[int, int, int]:
+        if len(data) < self.header.size:
+            raise ValueError(f"Expected {self.path} to have a header")
+        magic, count, offset, flags = self.header.unpack_from(data)
+        if magic != self.MAGIC:
+            raise ValueError(f"Expected {self.path} to be a binary timesheet (got {repr(magic)})")
+        return count, offset, flags
+
+    def read_table(self, data: Union[bytes, 'mmap.mmap'], offset: int) -> List[str]:
+        descriptions = []
+        # A table being written past this one by an interrupted append can end part way through a description
+        while offset + self.length.size <= len(data):
+            (length,) = self.length.unpack_from(data, offset)
+            offset += self.length.size
+            if offset + length > len(data):
+                break
+            descriptions.append(bytes(data[offset:offset + length]).decode('utf-8'))
+            offset += length
+        return descriptions
+
+    def read_columns(self, data: 'mmap.mmap', count: int) -> Tuple[Sequence[int], Sequence[int]]:
+        """
+        Times and description ids of all records, without copying them where the byte order allows
+        """
+        records = memoryview(data)[self.header.size:self.records_end(count)]
+        if sys.byteorder == 'little':
+            values = records.cast('q')
+            return values[0::2], values[1::2]
+        unpacked = list(self.record.iter_unpack(records))
+        return [when for when, _ in unpacked], [what for _, what in unpacked]
+
+    def map(self) -> Optional['mmap.mmap']:
+        """
+        The file mapped read only, pages are read as records are decoded, or None if there is no file or it is empty
+        """
+        import mmap
+        try:
+            with open(self.path, 'rb') as input_file:
+                # Empty files cannot be mapped, and hold no events
+                if not os.fstat(input_file.fileno()).st_size:
+                    return None
+                return mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+
+    def retrieve(self) -> Iterator[Tuple[datetime, str]]:
+        return self.retrieve_range()
+
+    def retrieve_range(self, start: datetime = datetime.min,
+                       end: datetime = datetime.max) -> Iterator[Tuple[datetime, str]]:
+        data = None
+        try:
+            # Appends leave the records and table a header points at as they are, so only reading it needs the lock
+            with self.lock(exclusive=False):
+                data = self.map()
+                if data is None:
+                    return
+                count, offset, flags = self.read_header(data)
+                descriptions = self.read_table(data, offset)
+            yield from self.select(data, count, flags, descriptions, start, end)
+        finally:
+            if data is not None:
+                # The views of the records taken by select are released once it has finished
+                data.close()
+
+    def select(self, data: 'mmap.mmap', count: int, flags: int, descriptions: List[str], start: datetime,
+               end: datetime) -> Iterator[Tuple[datetime, str]]:
+        whens, whats = self.read_columns(data, count)
+        if not flags & self.ORDERED:
+            records = chain.from_iterable(self.decode(whens, whats, descriptions, False, 0, count))
+            yield from (record for record in records if start <= record[0] < end)
+            return
+        # Binary search the time column, only records within the range are decoded
+        lo = 0 if start == datetime.min else bisect_left(whens, self.datetime_to_epoch(start), 0, count)
+        hi = count if end == datetime.max else bisect_left(whens, self.datetime_to_epoch(end), lo, count)
+        yield from chain.from_iterable(self.decode(whens, whats, descriptions, True, lo, hi))
+
+
+class SqliteStorage(DatetimeConversionMixin, StorageInterface):
+    """
+    Events in an SQLite database, as UTC microseconds indexed for range queries
+    """
+
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS event ("when" INTEGER NOT NULL, what TEXT NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS event_when ON event ("when")',
+    )
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        super().__init__()
+        self.path = in_root('timesheet.sqlite') if path is None else path
+        self.initialised = False
+
+    def connect(self) -> 'sqlite3.Connection':
+        import sqlite3
+        connection = sqlite3.connect(self.path)
+        if not self.initialised:
+            # Readers do not block the writer, and a crash cannot leave a partial write. Both the journal mode and
+            # schema persist in the database, so once per instance is enough.
+            connection.execute('PRAGMA journal_mode=WAL')
+            for statement in self.SCHEMA:
+                connection.execute(statement)
+            self.initialised = True
+        return connection
+
+    def store(self, records: Iterator[Tuple[datetime, str]]) -> None:
+        with closing(self.connect()) as connection, connection:
+            connection.execute('DELETE FROM event')
+            connection.executemany('INSERT INTO event ("when", what) VALUES (?, ?)',
+                                   ((self.datetime_to_epoch(when), what) for when, what in records))
+
+    def append(self, records: Iterable[Tuple[datetime, str]]) -> None:
+        with closing(self.connect()) as connection, connection:
+            connection.executemany('INSERT INTO event ("when", what) VALUES (?, ?)',
+                                   ((self.datetime_to_epoch(when), what) for when, what in records))
+
+    def retrieve(self) -> Iterator[Tuple[datetime, str]]:
+        return self.query('SELECT "when", what FROM event ORDER BY rowid', ())
+
+    def retrieve_range(self, start: datetime = datetime.min,
+                       end: datetime = datetime.max) -> Iterator[Tuple[datetime, str]]:
+        return self.query(*self.select_range(start, end))
+
+    def select_range(self, start: datetime, end: datetime) -> Tuple[str, List[int]]:
+        """
+        Query for events from start until end, in the order they were added, and its parameters
+        """
+        conditions = []
+        parameters = []
+        if start != datetime.min:
+            conditions.append('"when" >= ?')
+            parameters.append(self.datetime_to_epoch(start))
+        if end != datetime.max:
+            conditions.append('"when" < ?')
+            parameters.append(self.datetime_to_epoch(end))
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ''
+        return f'SELECT "when", what FROM event {where}ORDER BY rowid', parameters
+
+    def query(self, sql: str, parameters: Iterable[int]) -> Iterator[Tuple[datetime, str]]:
+        # Connecting would create the database
+        if not os.path.exists(self.path):
+            return
+        with closing(self.connect()) as connection:
+            for when, what in connection.execute(sql, tuple(parameters)):
+                yield self.epoch_to_datetime(when), what
+
+
+class ThreadedStorage(AsyncStorageInterface):
+    """
+    AsyncStorageInterface over any StorageInterface, run in a thread so the event loop carries on meanwhile
+
+    Records are retrieved in batches, each read by the thread. Adaptors are not safe to use from several threads at
+    once, so by default calls take turns in a pool of one thread, shut down on close. A given executor is left running.
+    """
+
+    BATCH = 1000
+
+    def __init__(self, adaptor: StorageInterface, executor: Optional['Executor'] = None) -> None:
+        super().__init__()
+        self.adaptor = adaptor
+        self.executor = executor
+        self.owned: Optional['Executor'] = None
+
+    async def run(self, function: Callable[..., T], *args: Any) -> T:
+        import asyncio
+        if self.executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self.executor = self.owned = ThreadPoolExecutor(1, 'whatdo-storage')
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def store(self, records: Iterable[Tuple[datetime, str]]) -> None:
+        await self.run(self.adaptor.store, iter(list(records)))
+
+    def retrieve(self) -> AsyncIterator[Tuple[datetime, str]]:
+        return self.batches(self.adaptor.retrieve)
+
+    def retrieve_range(self, start: datetime = datetime.min,
+                       end: datetime = datetime.max) -> AsyncIterator[Tuple[datetime, str]]:
+        return self.batches(self.adaptor.retrieve_range, start, end)
+
+    async def batches(self, retrieve: Callable[..., Iterator[Tuple[datetime, str]]],
+                      *args: Any) -> AsyncIterator[Tuple[datetime, str]]:
+        records = await self.run(retrieve, *args)
+        try:
+            while True:
+                batch: List[Tuple[datetime, str]] = await self.run(list, islice(records, self.BATCH))
+                if not batch:
+                    return
+                for record in batch:
+                    yield record
+        finally:
+            # Releases anything held while reading, such as a lock
+            await self.run(getattr(records, 'close', lambda: None))
+
+    async def append(self, records: Iterable[Tuple[datetime, str]]) -> None:
+        await self.run(self.adaptor.append, list(records))
+
+    async def sync(self) -> None:
+        await self.run(self.adaptor.sync)
+
+    async def close(self) -> None:
+        if self.owned is not None:
+            # Idle, as every call is awaited
+            self.owned.shutdown()
+            self.executor = self.owned = None
+
+
+STORAGE_INTERFACES: Dict[str, Type[StorageInterface]] = {
+    'csv': CsvStorage,
+    'csv-month': MonthlyCsvStorage,
+    'csv-year': YearlyCsvStorage,
+    'binary': BinaryStorage,
+    'sqlite': SqliteStorage,
+}
+
+
+class ImportFile(DatetimeConversionMixin):
+    """
+    Records read from CSV as written by CsvStorage, or from JSON lines of objects with when and what
+
+    Times are UTC in P_FMT either way. Records are checked as they are read, the first bad one raises ValueError.
+    Timetracker.import_events reads them all before merging any, so a bad record leaves the timesheet unchanged.
+    """
+
+    JSON_LINES = ('.jsonl', '.ndjson')
+
+    def __init__(self, path: str) -> None:
+        super().__init__()
+        self.path = path
+
+    def __iter__(self) -> Iterator[Tuple[datetime, str]]:
+        with open(self.path, 'r', newline='') as input_file:
+            json_lines = self.path.endswith(self.JSON_LINES)
+            # Strict, so a quote left open is an error rather than running on to the end of the file
+            rows: Iterable[Any] = input_file if json_lines else csv.reader(input_file, strict=True)
+            number = 0
+            try:
+                for number, row in enumerate(rows, 1):
+                    fields = self.json_fields(row) if json_lines else row
+                    # Blank lines are skipped
+                    if fields:
+                        yield self.record(fields)
+            except csv.Error as error:
+                # Raised reading the row after the last numbered
+                raise ValueError(f"{self.path}:{number + 1}: {error}") from None
+            except ValueError as error:
+                raise ValueError(f"{self.path}:{number}: {error}") from None
+
+    @staticmethod
+    def json_fields(line: str) -> List[object]:
+        import json
+        if not line.strip():
+            return []
+        item = json.loads(line)
+        if not isinstance(item, dict):
+            raise ValueError("expected an object with when and what")
+        return [item.get('when'), item.get('what')]
+
+    def record(self, row: Sequence[object]) -> Tuple[datetime, str]:
+        if len(row) != 2:
+            raise ValueError(f"expected when and what, got {len(row)} fields")
+        when, what = row
+        if not isinstance(when, str) or not isinstance(what, str):
+            raise ValueError("expected when and what to be strings")
+        if not what:
+            raise ValueError("expected what to be given")
+        return self.to_datetime(when), what
+
+
+class MemorySummaryCache(SummaryCacheInterface):
+    """
+    Back summary cache with dict
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.data: Dict[date, List[Tuple[float, str]]] = {}
+
+    def get(self, day: date) -> Optional[List[Tuple[float, str]]]:
+        return self.data.get(day)
+
+    def put(self, day: date, summary: List[Tuple[float, str]]) -> None:
+        self.data[day] = summary
+
+    def invalidate(self, day: date) -> None:
+        self.data.pop(day, None)
+        earlier = [cached for cached in self.data if cached < day]
+        if earlier:
+            del self.data[max(earlier)]
+
+
+class FileSummaryCache(SummaryCacheInterface):
+    """
+    Summary cache beside the timesheet, a directory with one small JSON file per day
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        super().__init__()
+        self.path = in_root('timesheet.cache') if path is None else path
+
+    def day_path(self, day: date) -> str:
+        return os.path.join(self.path, f"{day.isoformat()}.json")
+
+    def get(self, day: date) -> Optional[List[Tuple[float, str]]]:
+        import json
+        try:
+            with open(self.day_path(day), 'r') as input_file:
+                return [(duration, what) for duration, what in json.load(input_file)]
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            # Left unreadable somehow, the summary is worked out again and put over it
+            return None
+
+    def put(self, day: date, summary: List[Tuple[float, str]]) -> None:
+        import json
+        os.makedirs(self.path, exist_ok=True)
+        path = self.day_path(day)
+        # Renamed into place, so an interrupted put leaves no half written file. Not forced to disk, as a summary
+        # lost in a crash is only worked out again.
+        temporary = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary, 'w') as output_file:
+                json.dump(summary, output_file)
+            os.replace(temporary, path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+
+    def invalidate(self, day: date) -> None:
+        try:
+            names = os.listdir(self.path)
+        except FileNotFoundError:
+            return
+        # ISO dates sort as they compare
+        name = f"{day.isoformat()}.json"
+        earlier = [cached for cached in names if cached < name and cached.endswith('.json')]
+        for cached in ([name] if name in names else []) + ([max(earlier)] if earlier else []):
+            os.remove(os.path.join(self.path, cached))
+
+
+SUMMARY_CACHES: Dict[str, Type[SummaryCacheInterface]] = {
+    'memory': MemorySummaryCache,
+    'file': FileSummaryCache,
+}
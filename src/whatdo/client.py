@@ -0,0 +1,107 @@
+# coding: utf-8
+#
+# BSD 2-Clause License
+#
+# Copyright (c) 2018, Dylan Perry <dylan.perry@gmail.com>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+
+import os
+import sys
+
+
+class Client(object):
+    """
+    Forward command lines to a daemon listening on a Unix socket
+
+    Only the standard library is imported, so forwarding starts quickly. Arguments are sent NUL terminated, the reply
+    is a line holding the status and length of the output, followed by output then errors. The working directory is
+    sent ahead of the arguments, so paths in them name the same files as when run in process. Annotations are quoted,
+    as typing is slow to import.
+    """
+
+    PATH = 'whatdo.sock'
+    ENCODING = 'utf-8'
+    BUFFER = 65536
+
+    def __init__(self, path: 'str | None' = None) -> None:
+        # As adaptor.in_root, which takes longer to import than the client
+        self.path = os.path.join(os.environ.get('WHATDO_ROOT', ''), self.PATH) if path is None else path
+
+    def __call__(self, arguments: 'list[str]') -> 'int | None':
+        """
+        Status of the command line run by the daemon, or None when no daemon is listening
+        """
+        if not os.path.exists(self.path):
+            return None
+        # The socket module wrapper imports selectors and enum, which take as long as the rest of the client
+        import _socket
+        connection = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+        try:
+            try:
+                connection.connect(self.path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Left behind by a daemon that has stopped
+                return None
+            connection.sendall(self.encode_request(os.getcwd(), arguments))
+            connection.shutdown(_socket.SHUT_WR)
+            response = b''.join(iter(lambda: connection.recv(self.BUFFER), b''))
+        finally:
+            connection.close()
+        status, out, err = self.decode_response(response)
+        sys.stdout.write(out)
+        sys.stderr.write(err)
+        return status
+
+    @classmethod
+    def encode_request(cls, directory: str, arguments: 'list[str]') -> bytes:
+        return b''.join(argument.encode(cls.ENCODING) + b'\0' for argument in [directory, *arguments])
+
+    @classmethod
+    def decode_request(cls, request: bytes) -> 'tuple[str, list[str]]':
+        directory, *arguments = [argument.decode(cls.ENCODING) for argument in request.split(b'\0')[:-1]]
+        return directory, arguments
+
+    @classmethod
+    def encode_response(cls, status: int, out: str, err: str) -> bytes:
+        out_bytes = out.encode(cls.ENCODING)
+        return f"{status} {len(out_bytes)}\n".encode(cls.ENCODING) + out_bytes + err.encode(cls.ENCODING)
+
+    @classmethod
+    def decode_response(cls, response: bytes) -> 'tuple[int, str, str]':
+        header, _, body = response.partition(b'\n')
+        status, length = map(int, header.split())
+        return status, body[:length].decode(cls.ENCODING), body[length:].decode(cls.ENCODING)
+
+
+def cli() -> None:
+    """
+    Console script, forwarded to a running daemon, otherwise run in process
+    """
+    status = Client()(sys.argv[1:])
+    if status is not None:
+        sys.exit(status)
+    from .entry import cli as run
+    run()
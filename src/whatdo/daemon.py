@@ -0,0 +1,139 @@
+# coding: utf-8
+#
+# BSD 2-Clause License
+#
+# Copyright (c) 2018, Dylan Perry <dylan.perry@gmail.com>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+
+import asyncio
+import os
+import signal
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout, redirect_stderr
+from io import StringIO
+from tempfile import TemporaryDirectory
+from typing import List, Optional, Tuple
+
+from .adaptor import MemorySummaryCache
+from .client import Client
+from .entry import Cli
+from .port import WriteBehindStorage
+
+
+class DaemonCli(Cli):
+    """
+    Cli leaving added events for its storage to write behind, rather than persisting after every command line
+    """
+
+    def execute(self, args: List[str], directory: str = '') -> int:
+        result: int = self.command_line(args, directory)
+        return result
+
+
+class Daemon(object):
+    """
+    Run command lines sent by clients on a Unix socket, keeping the timesheet in memory between them
+
+    History is restored once at start, and daily summaries are kept until an event is logged. Added events are
+    written behind by the storage, which is closed when stopped. Only the user running the daemon can connect, and
+    command lines run one at a time on a thread of their own, so the loop goes on accepting clients meanwhile.
+    """
+
+    def __init__(self, cli: Optional[Cli] = None, path: Optional[str] = None) -> None:
+        self.cli = DaemonCli(storage=WriteBehindStorage, summary_cache=MemorySummaryCache) if cli is None else cli
+        self.path = Client().path if path is None else path
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.executor: Optional[ThreadPoolExecutor] = None
+
+    def execute(self, arguments: List[str], directory: str = '') -> Tuple[int, str, str]:
+        """
+        Status, output and errors of a command line run from directory, profiled as when run in process
+        """
+        out, err = StringIO(), StringIO()
+        with redirect_stdout(out), redirect_stderr(err):
+            try:
+                status = self.cli.run(arguments, directory)
+            except SystemExit as exit_:
+                # Parse errors and help
+                status = exit_.code if isinstance(exit_.code, int) else 0 if exit_.code is None else 1
+        return status, out.getvalue(), err.getvalue()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            directory, arguments = Client.decode_request(await reader.read())
+            response = await asyncio.get_running_loop().run_in_executor(self.executor, self.execute, arguments,
+                                                                        directory)
+            writer.write(Client.encode_response(*response))
+            await writer.drain()
+        finally:
+            writer.close()
+
+    def listen(self) -> socket.socket:
+        """
+        A socket bound to path that only its owner can connect to
+
+        Bound in a private directory and moved to path once restricted, so it is never open to others.
+        """
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            with TemporaryDirectory(dir=os.path.dirname(os.path.abspath(self.path))) as directory:
+                bound = os.path.join(directory, Client.PATH)
+                sock.bind(bound)
+                os.chmod(bound, 0o600)
+                os.replace(bound, self.path)
+        except BaseException:
+            sock.close()
+            raise
+        return sock
+
+    async def start(self) -> None:
+        self.cli.storage.restore()
+        # One at a time, as command lines share the timesheet and redirect output
+        self.executor = ThreadPoolExecutor(1, 'whatdo-daemon')
+        self.server = await asyncio.start_unix_server(self.handle, sock=self.listen())
+
+    async def stop(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            os.remove(self.path)
+        if self.executor is not None:
+            self.executor.shutdown()
+        self.cli.storage.close()
+
+    def run(self) -> int:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self.start())
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(signum, loop.stop)
+            loop.run_forever()
+            loop.run_until_complete(self.stop())
+        finally:
+            loop.close()
+        return 0
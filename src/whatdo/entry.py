@@ -28,32 +28,118 @@
 # POSSIBILITY OF SUCH DAMAGE.
 #
 
+import os
 import sys
-from typing import Type, List
+from typing import Type, List, Dict, Optional, Callable, TypeVar
 
-from .model import Timesheet
-from .adaptor import CommandLine, CsvStorage
-from .port import Timetracker, StorageInterface, Storage
+from .model import Timesheet, TimesheetInterface
+from .adaptor import CommandLine, STORAGE_INTERFACES, SUMMARY_CACHES
+from .port import Timetracker, StorageInterface, Storage, SummaryCacheInterface
 
 
 class Cli(object):
-    def __init__(self, storage_interface: Type[StorageInterface] = CsvStorage,
-                 timesheet: Type[Timesheet] = Timesheet, timetracker: Type[Timetracker] = Timetracker,
-                 command_line: Type[CommandLine] = CommandLine, storage: Type[Storage] = Storage) -> None:
+    def __init__(self, storage_interface: Optional[Type[StorageInterface]] = None,
+                 timesheet: Type[TimesheetInterface] = Timesheet, timetracker: Type[Timetracker] = Timetracker,
+                 command_line: Type[CommandLine] = CommandLine, storage: Type[Storage] = Storage,
+                 summary_cache: Optional[Type[SummaryCacheInterface]] = None) -> None:
         self.timesheet = timesheet()
+        if storage_interface is None:
+            name = os.environ.get('WHATDO_STORAGE', 'csv')
+            if name not in STORAGE_INTERFACES:
+                raise ValueError(f"Expected WHATDO_STORAGE to be one of {list(STORAGE_INTERFACES)} (got {name!r})")
+            storage_interface = STORAGE_INTERFACES[name]
         self.storage_interface = storage_interface()
-        self.timetracker = timetracker(self.timesheet)
-        self.command_line = command_line(self.timetracker)
         self.storage = storage(self.timesheet, self.storage_interface)
+        if summary_cache is None:
+            # Off unless a cache is configured
+            name = os.environ.get('WHATDO_SUMMARY_CACHE', '')
+            if name and name not in SUMMARY_CACHES:
+                raise ValueError(f"Expected WHATDO_SUMMARY_CACHE to be one of {list(SUMMARY_CACHES)} (got {name!r})")
+            summary_cache = SUMMARY_CACHES.get(name)
+        self.summary_cache = summary_cache() if summary_cache is not None else None
+        self.timetracker = timetracker(self.storage.timesheet, self.storage, self.summary_cache)
+        self.command_line = command_line(self.timetracker)
 
-    def run(self, args: List[str]) -> int:
-        self.storage.restore()
-        result: int = self.command_line(args)
-        self.storage.persist()
+    def run(self, args: List[str], directory: str = '') -> int:
+        """
+        Run a command line, timing its phases with --profile or WHATDO_PROFILE and profiling it with WHATDO_CPROFILE
+
+        WHATDO_PROFILE names a file to append timings to, or '-' for stderr, where --profile writes them otherwise.
+        WHATDO_CPROFILE names a file to save cProfile stats to. Relative paths in args are found in directory.
+        """
+        output = os.environ.get('WHATDO_PROFILE')
+        cprofile = os.environ.get('WHATDO_CPROFILE')
+        if args[:1] == ['--profile']:
+            args = args[1:]
+            output = output or '-'
+        if output is None and cprofile is None:
+            return self.execute(args, directory)
+        from .instrument import Instrument
+        return Instrument(self, output, cprofile).run(args, directory)
+
+    def execute(self, args: List[str], directory: str = '') -> int:
+        # Other runs wait, rather than storing over events added after this one read them
+        with self.storage_interface.lock():
+            result: int = self.command_line(args, directory)
+            self.storage.persist()
         return result
 
     def __call__(self) -> None:
         sys.exit(self.run(sys.argv[1:]))
 
 
-cli: Cli = Cli()
+class Convert(object):
+    """
+    Copy stored events from one storage format to another
+    """
+
+    def __init__(self, storage_interfaces: Dict[str, Type[StorageInterface]] = STORAGE_INTERFACES) -> None:
+        self.storage_interfaces = storage_interfaces
+
+    def run(self, args: List[str]) -> int:
+        from argparse import ArgumentParser
+        parser = ArgumentParser(description=self.__doc__)
+        parser.add_argument('source', choices=self.storage_interfaces)
+        parser.add_argument('destination', choices=self.storage_interfaces)
+        arguments = parser.parse_args(args)
+        if arguments.source == arguments.destination:
+            parser.error("source and destination must differ")
+        source = self.storage_interfaces[arguments.source]()
+        self.storage_interfaces[arguments.destination]().store(source.retrieve())
+        return 0
+
+    def __call__(self) -> None:
+        sys.exit(self.run(sys.argv[1:]))
+
+
+T = TypeVar('T')
+
+
+def configured(factory: Callable[[], T]) -> T:
+    """
+    Built from the environment, exiting with a usage error when it is misconfigured
+    """
+    try:
+        return factory()
+    except ValueError as error:
+        print(f"whatdo: {error}", file=sys.stderr)
+        sys.exit(2)
+
+
+def cli() -> None:
+    """
+    Console script, the Cli is only built when run rather than when imported
+    """
+    configured(Cli)()
+
+
+def convert() -> None:
+    Convert()()
+
+
+def daemon() -> None:
+    """
+    Console script, serving whatdo command lines forwarded from clients
+    """
+    from .daemon import Daemon
+    sys.exit(configured(Daemon).run())
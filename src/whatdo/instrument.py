@@ -0,0 +1,171 @@
+# coding: utf-8
+#
+# BSD 2-Clause License
+#
+# Copyright (c) 2018, Dylan Perry <dylan.perry@gmail.com>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+"""
+Timing of the phases of a run, only imported when asked for
+"""
+
+import json
+import sys
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+if TYPE_CHECKING:
+    from .entry import Cli
+
+T = TypeVar('T')
+
+
+class Instrument(object):
+    """
+    Run a Cli recording the time spent in each phase, the events read and written and the bytes the process read and
+    wrote, then write them as one JSON line
+
+    Phases are timed by wrapping methods of the Cli's parts for the run only, so nothing is slower when not
+    instrumented. Time in a phase excludes phases within it, such as restoring history for a summary, and time outside
+    every phase is 'other'. Bytes come from /proc/self/io where there is one. The whole run can also be profiled with
+    cProfile, saving stats to a file.
+    """
+
+    IO = '/proc/self/io'
+
+    def __init__(self, cli: 'Cli', output: Optional[str] = None, cprofile: Optional[str] = None) -> None:
+        self.cli = cli
+        # A path to append to, or '-' for stderr
+        self.output = output
+        self.cprofile = cprofile
+        self.phases: Dict[str, float] = {}
+        self.events = {'read': 0, 'written': 0}
+        # Time spent in phases within each running phase
+        self.nested: List[float] = []
+        self.wrapped: List[Tuple[object, str, Optional[object]]] = []
+
+    def run(self, args: List[str], directory: str = '') -> int:
+        self.install()
+        profiler = None
+        cprofile = self.cprofile
+        if cprofile is not None:
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+        io_start = self.io()
+        start = perf_counter()
+        try:
+            return self.cli.execute(args, directory)
+        finally:
+            total = perf_counter() - start
+            io_end = self.io()
+            if profiler is not None and cprofile is not None:
+                profiler.disable()
+                profiler.dump_stats(cprofile)
+            self.uninstall()
+            self.phases['other'] = total - sum(self.phases.values())
+            read, written = (None, None) if io_start is None or io_end is None else \
+                (io_end[0] - io_start[0], io_end[1] - io_start[1])
+            try:
+                self.emit({'args': args, 'seconds': total, 'phases': self.phases, 'events': self.events,
+                           'bytes': {'read': read, 'written': written}})
+            except OSError as error:
+                # Reported alongside, rather than in place of, how the run went
+                print(f"whatdo: could not write profile: {error}", file=sys.stderr)
+
+    def install(self) -> None:
+        storage, timetracker = self.cli.storage, self.cli.timetracker
+        self.wrap(storage.timesheet, 'restore', self.timed('restore', storage.timesheet.restore))
+        self.wrap(self.cli, 'command_line', self.timed('command', self.cli.command_line))
+        self.wrap(timetracker, 'task_summary', self.timed('summary', timetracker.task_summary))
+        self.wrap(timetracker, 'import_events', self.timed('import', timetracker.import_events))
+        self.wrap(storage, 'persist', self.timed('persist', storage.persist))
+        adaptor = storage.adaptor
+        self.wrap(adaptor, 'retrieve', self.reading(adaptor.retrieve))
+        self.wrap(adaptor, 'retrieve_range', self.reading(adaptor.retrieve_range))
+        self.wrap(adaptor, 'append', self.writing(adaptor.append))
+        self.wrap(adaptor, 'store', self.writing(adaptor.store))
+
+    def wrap(self, owner: object, name: str, replacement: object) -> None:
+        # Instance attributes are put back, methods are uncovered again
+        self.wrapped.append((owner, name, vars(owner).get(name)))
+        setattr(owner, name, replacement)
+
+    def uninstall(self) -> None:
+        for owner, name, original in reversed(self.wrapped):
+            if original is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+        self.wrapped.clear()
+
+    def timed(self, phase: str, function: Callable[..., T]) -> Callable[..., T]:
+        def timed_function(*args: Any, **kwargs: Any) -> T:
+            self.nested.append(0.0)
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                nested = self.nested.pop()
+                self.phases[phase] = self.phases.get(phase, 0.0) + elapsed - nested
+                if self.nested:
+                    self.nested[-1] += elapsed
+        return timed_function
+
+    def reading(self, function: Callable[..., Iterator[T]]) -> Callable[..., Iterator[T]]:
+        def counted(*args: Any, **kwargs: Any) -> Iterator[T]:
+            for record in function(*args, **kwargs):
+                self.events['read'] += 1
+                yield record
+        return counted
+
+    def writing(self, function: Callable[[Iterator[T]], None]) -> Callable[[Iterable[T]], None]:
+        def counted(records: Iterable[T]) -> None:
+            def count() -> Iterator[T]:
+                for record in records:
+                    self.events['written'] += 1
+                    yield record
+            function(count())
+        return counted
+
+    def io(self) -> Optional[Tuple[int, int]]:
+        """
+        Bytes read and written by the process so far, including those served from cache
+        """
+        try:
+            with open(self.IO) as io_file:
+                counters = dict(line.split(': ') for line in io_file)
+        except OSError:
+            return None
+        return int(counters['rchar']), int(counters['wchar'])
+
+    def emit(self, record: Dict[str, object]) -> None:
+        line = json.dumps(record) + '\n'
+        if self.output is None or self.output == '-':
+            sys.stderr.write(line)
+        else:
+            with open(self.output, 'a') as output_file:
+                output_file.write(line)
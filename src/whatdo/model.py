@@ -28,11 +28,18 @@
 # POSSIBILITY OF SUCH DAMAGE.
 #
 
-from datetime import datetime, timedelta
-from typing import List, Iterable
+from abc import abstractmethod
+from array import array
+from bisect import bisect_left, bisect_right
+from heapq import merge
+from operator import attrgetter
+from datetime import datetime, timedelta, date, time
+from typing import Any, NoReturn, List, Iterable, Dict, Iterator, Optional, Sequence, Union, overload, NamedTuple, Tuple
 
 
 class Task(object):
+    __slots__ = ('duration', 'what')
+
     def __init__(self, duration: timedelta, what: str) -> None:
         self.duration = duration
         self.what = what
@@ -42,6 +49,9 @@ class Task(object):
             return super().__eq__(other)
         return self.what == other.what
 
+    def __hash__(self) -> int:
+        return hash(self.what)
+
     def __add__(self, other: object) -> 'Task':
         if not isinstance(other, Task):
             raise TypeError(f"unsupported operand type(s) for +: '{type(self).__name__}' and '{type(other).__name__}'")
@@ -53,47 +63,401 @@ class Task(object):
         return f"{self.__class__.__name__}({repr(self.duration)}, {repr(self.what)})"
 
 
-class Event(object):
+class Event(NamedTuple):
     """
     An event, timestamp and generic description
     """
 
-    def __init__(self, when: datetime, what: str) -> None:
-        super().__init__()
-        self.when = when
-        self.what = what
-
-    def __eq__(self, other: object) -> bool:
-        if not isinstance(other, Event):
-            return super().__eq__(other)
-        return self.when == other.when and self.what == other.what
+    when: datetime
+    what: str
 
     def to_task(self, end: 'Event') -> Task:
         return Task(end.when - self.when, self.what)
 
 
 class TaskSummary(List[Task]):
+    """
+    Tasks grouped by what, in the order each was first seen
+    """
+
     def __init__(self, tasks: Iterable[Task]) -> None:
         super().__init__()
+        # Sum durations by what, rather than creating a Task for every merge
+        durations: Dict[str, timedelta] = {}
         for task in tasks:
-            try:
-                self[self.index(task)] += task
-            except ValueError:
-                self.append(task)
+            duration = durations.get(task.what)
+            durations[task.what] = task.duration if duration is None else duration + task.duration
+        self.extend(Task(duration, what) for what, duration in durations.items())
+
+
+def summarise(records: Iterable[Tuple[datetime, str]]) -> TaskSummary:
+    """
+    Tasks between consecutive records, holding only the previous record so any iterator can be summarised
+    """
+    durations: Dict[str, timedelta] = {}
+    records = iter(records)
+    for when, what in records:
+        break
+    else:
+        return TaskSummary(())
+    for end, following in records:
+        duration = durations.get(what)
+        durations[what] = end - when if duration is None else duration + (end - when)
+        when, what = end, following
+    return TaskSummary(Task(duration, what) for what, duration in durations.items())
+
+
+class TimesheetInterface(Sequence[Event]):
+    """
+    Collection of events, kept in chronological order so they can be searched by when
+    """
+
+    @abstractmethod
+    def append(self, item: Event) -> None:
+        pass
+
+    @abstractmethod
+    def truncate(self, lo: int) -> None:
+        """
+        Remove events from lo onwards
+        """
+
+    def merge(self, events: Iterable[Event]) -> int:
+        """
+        Add events in chronological order, returning the position of the first event moved or added
 
+        Events are sorted, which is linear for runs already in order, then merged with only those already held after
+        the earliest of them. Events at the same time as ones already held go after them.
+        """
+        added = list(events)
+        for item in added:
+            if not isinstance(item, Event):
+                raise TypeError(f"Expected item to be Event (got {type(item)})")
+        added.sort(key=attrgetter('when'))
+        lo = self.bisect_after(added[0].when) if added else len(self)
+        following = list(self[lo:])
+        self.truncate(lo)
+        for item in merge(following, added, key=attrgetter('when')):
+            self.append(item)
+        return lo
 
-class Timesheet(List[Event]):
+    def bisect(self, when: datetime, lo: int = 0, hi: Optional[int] = None) -> int:
+        """
+        Position of the first event at or after when
+        """
+        if hi is None:
+            hi = len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self[mid].when < when:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def bisect_after(self, when: datetime, lo: int = 0, hi: Optional[int] = None) -> int:
+        """
+        Position after the last event at or before when
+        """
+        if hi is None:
+            hi = len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if when < self[mid].when:
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+    def find_in_range(self, start: datetime = datetime.min, end: datetime = datetime.max,
+                      lo: int = 0, hi: Optional[int] = None) -> 'TimesheetView':
+        if hi is None:
+            hi = len(self)
+        lo = self.bisect(start, lo, hi)
+        return TimesheetView(self, lo, self.bisect(end, lo, hi))
+
+    def summarise(self, lo: int = 0, hi: Optional[int] = None) -> TaskSummary:
+        return summarise(map(self.__getitem__, range(len(self))[lo:hi]))
+
+
+class Timesheet(List[Event], TimesheetInterface):
     """
-    Collection of events
+    Collection of events, kept in chronological order
+
+    Back-dated events are inserted in place. List methods that would place events other than by when raise TypeError.
     """
 
+    def __init__(self, events: Iterable[Event] = ()) -> None:
+        super().__init__()
+        self.merge(events)
+
     def append(self, item: Event) -> None:
         if not isinstance(item, Event):
             raise TypeError(f"Expected item to be Event (got {type(item)})")
-        return super().append(item)
+        if self and item.when < self[-1].when:
+            super().insert(self.bisect_after(item.when), item)
+        else:
+            super().append(item)
+
+    def extend(self, events: Iterable[Event]) -> None:
+        self.merge(events)
+
+    def out_of_order(self, *args: Any, **kwargs: Any) -> NoReturn:
+        raise TypeError("Expected events to be added with append, extend or merge, which keep them in order")
+
+    # Each could leave events out of order
+    insert = __setitem__ = __iadd__ = __imul__ = sort = reverse = out_of_order
 
-    def find_in_range(self, start: datetime = datetime.min, end: datetime = datetime.max) -> 'Timesheet':
-        return Timesheet(event for event in self if start <= event.when < end)
+    def truncate(self, lo: int) -> None:
+        del self[lo:]
+
+
+class ColumnarTimesheet(TimesheetInterface):
+    """
+    Collection of events stored as columns, created as Event only when accessed, kept in chronological order
+
+    Times are microseconds since EPOCH, descriptions are positions in a table holding each distinct what once.
+    """
+
+    EPOCH = datetime(1970, 1, 1)
+    MICROSECOND = timedelta(microseconds=1)
+
+    def __init__(self, events: Iterable[Event] = ()) -> None:
+        super().__init__()
+        self.when = array('q')
+        self.what = array('I')
+        self.descriptions: List[str] = []
+        self.description_ids: Dict[str, int] = {}
+        self.merge(events)
+
+    def append(self, item: Event) -> None:
+        if not isinstance(item, Event):
+            raise TypeError(f"Expected item to be Event (got {type(item)})")
+        when = (item.when - self.EPOCH) // self.MICROSECOND
+        description_id = self.description_ids.get(item.what)
+        if description_id is None:
+            description_id = self.description_ids[item.what] = len(self.descriptions)
+            self.descriptions.append(item.what)
+        if self.when and when < self.when[-1]:
+            index = bisect_right(self.when, when)
+            self.when.insert(index, when)
+            self.what.insert(index, description_id)
+        else:
+            self.when.append(when)
+            self.what.append(description_id)
+
+    def truncate(self, lo: int) -> None:
+        del self.when[lo:]
+        del self.what[lo:]
+
+    def event(self, index: int) -> Event:
+        return Event(self.EPOCH + timedelta(microseconds=self.when[index]), self.descriptions[self.what[index]])
+
+    @overload
+    def __getitem__(self, index: int) -> Event:
+        pass
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[Event]:
+        pass
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Event, Sequence[Event]]:
+        if isinstance(index, slice):
+            return [self.event(i) for i in range(len(self))[index]]
+        return self.event(index)
+
+    def __len__(self) -> int:
+        return len(self.when)
+
+    def __iter__(self) -> Iterator[Event]:
+        return map(self.event, range(len(self)))
+
+    def bisect(self, when: datetime, lo: int = 0, hi: Optional[int] = None) -> int:
+        return bisect_left(self.when, (when - self.EPOCH) // self.MICROSECOND, lo, len(self) if hi is None else hi)
+
+    def bisect_after(self, when: datetime, lo: int = 0, hi: Optional[int] = None) -> int:
+        return bisect_right(self.when, (when - self.EPOCH) // self.MICROSECOND, lo, len(self) if hi is None else hi)
+
+    def summarise(self, lo: int = 0, hi: Optional[int] = None) -> TaskSummary:
+        # Sum durations per description in microseconds, without creating events
+        totals: Dict[int, int] = {}
+        when = self.when
+        what = self.what
+        for i in range(len(self))[lo:hi][:-1]:
+            totals[what[i]] = totals.get(what[i], 0) + when[i + 1] - when[i]
+        return TaskSummary(Task(timedelta(microseconds=duration), self.descriptions[description_id])
+                           for description_id, duration in totals.items())
+
+
+class TimesheetView(Sequence[Event]):
+    """
+    Read only window onto consecutive events of a timesheet, without copying them
+    """
+
+    def __init__(self, timesheet: TimesheetInterface, start: int, stop: int) -> None:
+        self.timesheet = timesheet
+        self.range = range(start, stop)
+
+    @overload
+    def __getitem__(self, index: int) -> Event:
+        pass
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[Event]:
+        pass
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Event, Sequence[Event]]:
+        if isinstance(index, slice):
+            selected = self.range[index]
+            if selected.step != 1:
+                return [self.timesheet[i] for i in selected]
+            return TimesheetView(self.timesheet, selected.start, selected.stop)
+        return self.timesheet[self.range[index]]
+
+    def __len__(self) -> int:
+        return len(self.range)
+
+    def __iter__(self) -> Iterator[Event]:
+        return map(self.timesheet.__getitem__, self.range)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return len(self) == len(other) and all(x == y for x, y in zip(self, other))
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({repr(list(self))})"
+
+    def find_in_range(self, start: datetime = datetime.min, end: datetime = datetime.max) -> 'TimesheetView':
+        return self.timesheet.find_in_range(start, end, self.range.start, self.range.stop)
 
     def summarise(self) -> TaskSummary:
-        return TaskSummary(x.to_task(y) for x, y in zip(self, self[1:]))
+        return self.timesheet.summarise(self.range.start, self.range.stop)
+
+
+class Rollup(object):
+    """
+    Task durations summed by the day, week, month and year they start in
+
+    A range is summarised from the few whole periods it covers, plus the events of partial days at either end. Each
+    period holds the total duration and number of tasks for each what.
+    """
+
+    def __init__(self, timesheet: TimesheetInterface) -> None:
+        self.timesheet = timesheet
+        self.periods: Dict[Tuple[str, date], Dict[str, Tuple[timedelta, int]]] = {}
+        self.last: Optional[Event] = None
+        self.build()
+
+    def build(self) -> None:
+        self.periods.clear()
+        self.last = None
+        for event in self.timesheet:
+            if self.last is not None:
+                self.count(self.last, event)
+            self.last = event
+
+    def append(self, event: Event) -> None:
+        """
+        Count the task ended by an event just appended to the timesheet
+
+        A back-dated event splits the task it was inserted into.
+        """
+        if self.last is not None and event.when < self.last.when:
+            timesheet = self.timesheet
+            # Inserted after events at the same time, the last of which is the one just appended
+            index = timesheet.bisect_after(event.when) - 1
+            following = timesheet[index + 1]
+            if index > 0:
+                self.count(timesheet[index - 1], following, -1)
+                self.count(timesheet[index - 1], event)
+            self.count(event, following)
+            return
+        if self.last is not None:
+            self.count(self.last, event)
+        self.last = event
+
+    @staticmethod
+    def containing(day: date) -> List[Tuple[str, date]]:
+        return [
+            ('day', day),
+            ('week', day - timedelta(days=day.weekday())),
+            ('month', day.replace(day=1)),
+            ('year', day.replace(month=1, day=1)),
+        ]
+
+    @staticmethod
+    def cover(start: date, end: date) -> Iterator[Tuple[str, date]]:
+        """
+        Fewest whole periods from start until end, weeks are only used within a month
+        """
+        while start < end:
+            next_month = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+            if start.day == 1 and start.month == 1 and start.year < end.year:
+                yield 'year', start
+                start = start.replace(year=start.year + 1)
+            elif start.day == 1 and next_month <= end:
+                yield 'month', start
+                start = next_month
+            elif start.weekday() == 0 and start + timedelta(days=7) <= min(end, next_month):
+                yield 'week', start
+                start += timedelta(days=7)
+            else:
+                yield 'day', start
+                start += timedelta(days=1)
+
+    @staticmethod
+    def add(totals: Dict[str, Tuple[timedelta, int]], what: str, duration: timedelta, tasks: int) -> None:
+        """
+        Add duration and number of tasks to totals, removing what once it has no tasks
+        """
+        total, count = totals.get(what, (timedelta(), 0))
+        if count + tasks:
+            totals[what] = (total + duration, count + tasks)
+        else:
+            del totals[what]
+
+    def count(self, start: Event, end: Event, tasks: int = 1) -> None:
+        duration = (end.when - start.when) * tasks
+        for period in self.containing(start.when.date()):
+            self.add(self.periods.setdefault(period, {}), start.what, duration, tasks)
+
+    def summarise(self, start: datetime = datetime.min, end: datetime = datetime.max) -> TaskSummary:
+        """
+        Same as summarising the events found in range
+
+        Tasks may be listed in a different order once back-dated events have been appended.
+        """
+        timesheet = self.timesheet
+        if not timesheet:
+            return timesheet.find_in_range(start, end).summarise()
+        # Periods outside the timesheet are empty
+        start = max(start, timesheet[0].when)
+        end = min(end, timesheet[-1].when + timedelta(microseconds=1))
+        if start.date() >= end.date():
+            return timesheet.find_in_range(start, end).summarise()
+        first_day = start.date() if start.time() == time() else start.date() + timedelta(days=1)
+        # Positions of the first event in range, in whole days, after whole days and after the range
+        lo = timesheet.bisect(start)
+        first = timesheet.bisect(datetime.combine(first_day, time()), lo)
+        last = timesheet.bisect(datetime.combine(end.date(), time()), first)
+        hi = timesheet.bisect(end, last)
+
+        totals: Dict[str, Tuple[timedelta, int]] = {}
+        self.add_events(totals, lo, first)
+        for period in self.cover(first_day, end.date()):
+            for what, (duration, tasks) in self.periods.get(period, {}).items():
+                self.add(totals, what, duration, tasks)
+        self.add_events(totals, last, hi)
+        # Tasks are counted by when they start, the last one in range ends after it
+        if lo < hi < len(timesheet):
+            self.add(totals, timesheet[hi - 1].what, timesheet[hi - 1].when - timesheet[hi].when, -1)
+        return TaskSummary(Task(duration, what) for what, (duration, _) in totals.items())
+
+    def add_events(self, totals: Dict[str, Tuple[timedelta, int]], lo: int, hi: int) -> None:
+        """
+        Add tasks started by events from lo to hi
+        """
+        timesheet = self.timesheet
+        for i in range(lo, min(hi, len(timesheet) - 1)):
+            self.add(totals, timesheet[i].what, timesheet[i + 1].when - timesheet[i].when, 1)
@@ -29,25 +29,102 @@
 #
 
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from datetime import datetime, date, time, timedelta
+from time import monotonic
+from heapq import merge
+from itertools import chain
+from operator import attrgetter, itemgetter
 
-from typing import Iterator, Tuple, List
+from typing import TYPE_CHECKING, Any, AsyncIterator, ContextManager, Iterator, Tuple, List, Iterable, NamedTuple, \
+    Optional, Callable, Sequence, Union, overload
 
-from .model import Timesheet, Event
+from .model import TimesheetInterface, TimesheetView, TaskSummary, Event, Rollup, summarise
+
+if TYPE_CHECKING:
+    import asyncio
 
 
 class Timetracker(object):
-    def __init__(self, timesheet: Timesheet) -> None:
+    def __init__(self, timesheet: TimesheetInterface, storage: Optional['Storage'] = None,
+                 summary_cache: Optional['SummaryCacheInterface'] = None, rollup: Optional[Rollup] = None) -> None:
         super().__init__()
         self.timesheet = timesheet
+        # Summaries are streamed from storage when given, so history need not be restored
+        self.storage = storage
+        self.summary_cache = summary_cache
+        # Summaries are combined from period totals when given, for trackers that stay running
+        self.rollup = rollup
 
     def log_event(self, what: str) -> None:
-        self.timesheet.append(Event(datetime.now(), what))
+        event = Event(datetime.now(), what)
+        self.timesheet.append(event)
+        if self.rollup is not None:
+            self.rollup.append(event)
+        if self.summary_cache is not None:
+            self.summary_cache.invalidate(event.when.date())
+
+    def import_events(self, records: Iterable[Tuple[datetime, str]]) -> int:
+        """
+        Merge records into the timesheet in one pass, returning how many were added
+
+        Records are all read into memory first, so nothing is merged if reading any of them fails.
+        """
+        events = [Event(record[0], record[1]) for record in records]
+        size = len(self.timesheet)
+        lo = self.timesheet.merge(events)
+        if self.rollup is not None:
+            if lo < size:
+                self.rollup.build()
+            else:
+                for event in self.timesheet[lo:]:
+                    self.rollup.append(event)
+        if self.summary_cache is not None:
+            for day in sorted({event.when.date() for event in events}):
+                self.summary_cache.invalidate(day)
+        return len(events)
 
     def task_summary_by_day(self, day: date) -> List[Tuple[float, str]]:
-        tasks = self.timesheet.find_in_range(datetime.combine(day, time()),
-                                             datetime.combine(day + timedelta(days=1), time())).summarise()
-        return [(task.duration.total_seconds() / 3600.0, task.what) for task in tasks]
+        if self.summary_cache is not None:
+            cached = self.summary_cache.get(day)
+            if cached is not None:
+                return cached
+        start = datetime.combine(day, time())
+        end = datetime.combine(day + timedelta(days=1), time())
+        summary = [(task.duration.total_seconds() / 3600.0, task.what) for task in self.task_summary(start, end)]
+        if self.summary_cache is not None:
+            self.summary_cache.put(day, summary)
+        return summary
+
+    def task_summary(self, start: datetime, end: datetime) -> TaskSummary:
+        if self.rollup is not None:
+            return self.rollup.summarise(start, end)
+        if self.storage is None or self.storage.timesheet.restored:
+            # The timesheet summarises in its own way, such as from columns
+            return self.timesheet.find_in_range(start, end).summarise()
+        return summarise(self.storage.records(start, end))
+
+
+class SummaryCacheInterface(ABC):
+    """
+    Daily summaries kept between runs, so reporting on a day does not read its events again
+    """
+
+    @abstractmethod
+    def get(self, day: date) -> Optional[List[Tuple[float, str]]]:
+        pass
+
+    @abstractmethod
+    def put(self, day: date, summary: List[Tuple[float, str]]) -> None:
+        pass
+
+    @abstractmethod
+    def invalidate(self, day: date) -> None:
+        """
+        Forget the summary of a day an event was added to, and of the latest summarised day before it
+
+        An event can follow the last event of any earlier day, and so end its last task.
+        """
 
 
 class StorageInterface(ABC):
@@ -59,15 +136,523 @@ class StorageInterface(ABC):
     def retrieve(self) -> Iterator[Tuple[datetime, str]]:
         pass
 
+    def retrieve_range(self, start: datetime = datetime.min,
+                       end: datetime = datetime.max) -> Iterator[Tuple[datetime, str]]:
+        """
+        Records from start until end
+
+        Adaptors that can seek by time should override this, the default filters everything.
+        """
+        return (record for record in self.retrieve() if start <= record[0] < end)
+
+    def append(self, records: Iterable[Tuple[datetime, str]]) -> None:
+        """
+        Add records after those already stored
+
+        Adaptors that can write incrementally should override this, the default rewrites everything.
+        """
+        self.store(chain(list(self.retrieve()), records))
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        """
+        Keep other processes from changing stored records until released
+
+        Adaptors storing records other processes can change should override this, the default does nothing.
+        """
+        yield
+
+    def sync(self) -> None:
+        """
+        Force records written so far on to disk
+
+        Adaptors writing files should override this, the default leaves it to the operating system.
+        """
+
+
+class NoLock(object):
+    """
+    Stands in for a lock while events are only changed and persisted from one thread
+    """
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc_info: object) -> None:
+        pass
+
 
-class Storage(object):
-    def __init__(self, timesheet: Timesheet, adaptor: StorageInterface) -> None:
+class LazyTimesheet(TimesheetInterface):
+    """
+    Timesheet restored the first time it is read, events appended before then are held aside
+
+    Events are added, restored and persisted while holding lock, and added is called after each is appended.
+    """
+
+    def __init__(self, timesheet: TimesheetInterface, restore: Callable[[TimesheetInterface], None]) -> None:
+        super().__init__()
         self.timesheet = timesheet
+        self.restore = restore
+        self.added: Optional[Callable[[], None]] = None
+        self.lock: ContextManager[Any] = NoLock()
+        self.restored = False
+        self.logged: List[Event] = []
+        # Position of the earliest event moved or removed since restored, events before it are unchanged
+        self.changed: Optional[int] = None
+
+    def load(self) -> TimesheetInterface:
+        if not self.restored:
+            with self.lock:
+                if not self.restored:
+                    # Left unrestored if restoring fails, to be tried again
+                    self.restore(self.timesheet)
+                    self.restored = True
+                    for event in self.logged:
+                        self.append(event)
+                    self.logged.clear()
+        return self.timesheet
+
+    def append(self, item: Event) -> None:
+        with self.lock:
+            if self.restored:
+                timesheet = self.timesheet
+                if timesheet and isinstance(item, Event) and item.when < timesheet[-1].when:
+                    # Back-dated, so the events after it move along
+                    self.move(timesheet.bisect_after(item.when))
+                timesheet.append(item)
+            elif not isinstance(item, Event):
+                raise TypeError(f"Expected item to be Event (got {type(item)})")
+            else:
+                self.logged.append(item)
+        if self.added is not None:
+            self.added()
+
+    def truncate(self, lo: int) -> None:
+        with self.lock:
+            timesheet = self.load()
+            if lo < len(timesheet):
+                self.move(lo)
+            timesheet.truncate(lo)
+
+    def merge(self, events: Iterable[Event]) -> int:
+        # Persisting part way through would see events truncated and not yet merged back
+        with self.lock:
+            return super().merge(events)
+
+    def move(self, lo: int) -> None:
+        self.changed = lo if self.changed is None else min(self.changed, lo)
+
+    @overload
+    def __getitem__(self, index: int) -> Event:
+        pass
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[Event]:
+        pass
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Event, Sequence[Event]]:
+        return self.load()[index]
+
+    def __len__(self) -> int:
+        return len(self.load())
+
+    def __iter__(self) -> Iterator[Event]:
+        return iter(self.load())
+
+    def bisect(self, when: datetime, lo: int = 0, hi: Optional[int] = None) -> int:
+        return self.load().bisect(when, lo, hi)
+
+    def bisect_after(self, when: datetime, lo: int = 0, hi: Optional[int] = None) -> int:
+        return self.load().bisect_after(when, lo, hi)
+
+    def find_in_range(self, start: datetime = datetime.min, end: datetime = datetime.max,
+                      lo: int = 0, hi: Optional[int] = None) -> TimesheetView:
+        return self.load().find_in_range(start, end, lo, hi)
+
+    def summarise(self, lo: int = 0, hi: Optional[int] = None) -> TaskSummary:
+        return self.load().summarise(lo, hi)
+
+
+class Write(NamedTuple):
+    """
+    Records taken from a LazyTimesheet to persist, with what is needed to mark them written or give them back
+    """
+    # Everything, rather than appended
+    store: bool
+    records: List[Tuple[datetime, str]]
+    restored: bool
+    changed: Optional[int]
+    # Timesheet length, or logged events, once written
+    length: int
+
+
+class PersistMixin(object):
+    """
+    What a storage of a LazyTimesheet writes, only the events added since the last restore or persist unless stored
+    events were moved
+
+    A write is taken while events cannot be added, then marked written, or given back to be written next time if
+    writing fails.
+    """
+
+    timesheet: LazyTimesheet
+    # Events before this position are known to be held by the adaptor
+    persisted: int
+
+    def load_records(self, timesheet: TimesheetInterface, records: Iterable[Tuple[datetime, str]]) -> None:
+        for record in records:
+            timesheet.append(Event(record[0], record[1]))
+        self.persisted = len(timesheet)
+
+    def logged_in_range(self, start: datetime, end: datetime) -> List[Event]:
+        return sorted((event for event in self.timesheet.logged if start <= event.when < end), key=attrgetter('when'))
+
+    def take(self) -> Write:
+        timesheet = self.timesheet
+        if not timesheet.restored:
+            records = [(event.when, event.what) for event in timesheet.logged]
+            return Write(False, records, False, None, len(records))
+        changed, timesheet.changed = timesheet.changed, None
+        events = timesheet.timesheet
+        length = len(events)
+        store = changed is not None and changed < self.persisted
+        records = [(event.when, event.what) for event in events[0 if store else self.persisted:length]]
+        return Write(store, records, True, changed, length)
+
+    def written(self, write: Write) -> None:
+        if write.restored:
+            self.persisted = write.length
+        else:
+            del self.timesheet.logged[:write.length]
+
+    def give_back(self, write: Write) -> None:
+        if write.changed is not None:
+            self.timesheet.move(write.changed)
+
+
+class Storage(PersistMixin):
+    def __init__(self, timesheet: TimesheetInterface, adaptor: StorageInterface) -> None:
+        # Handed out in place of timesheet, so history is only restored when something reads it
+        self.timesheet = LazyTimesheet(timesheet, self.load)
         self.adaptor = adaptor
+        self.persisted = 0
 
     def restore(self) -> None:
-        for record in self.adaptor.retrieve():
-            self.timesheet.append(Event(record[0], record[1]))
+        self.timesheet.load()
+
+    def load(self, timesheet: TimesheetInterface) -> None:
+        self.load_records(timesheet, self.adaptor.retrieve())
+
+    def records(self, start: datetime = datetime.min, end: datetime = datetime.max) -> Iterator[Tuple[datetime, str]]:
+        """
+        Stored and logged records within a range, read one at a time from the adaptor unless already restored
+        """
+        if self.timesheet.restored:
+            return iter(self.timesheet.find_in_range(start, end))
+        return merge(self.adaptor.retrieve_range(start, end), self.logged_in_range(start, end), key=itemgetter(0))
+
+    def persist(self) -> None:
+        """
+        Write only the events added since the last restore or persist, or everything if stored events were moved
+
+        Once restored, what is written is taken while holding the timesheet lock and written after releasing it, so
+        events can be added while writing. Logged events are written holding it, as restoring reads what they go to.
+        """
+        with self.timesheet.lock:
+            write = self.take()
+            if not write.restored:
+                self.write(write)
+                return
+        self.write(write)
+
+    def write(self, write: Write) -> None:
+        try:
+            if write.store:
+                self.adaptor.store(iter(write.records))
+            elif write.records:
+                self.adaptor.append(write.records)
+        except BaseException:
+            with self.timesheet.lock:
+                self.give_back(write)
+            raise
+        self.written(write)
+
+    def flush(self) -> None:
+        self.persist()
+
+    def close(self) -> None:
+        """
+        Persist and sync before the storage is discarded
+        """
+        self.persist()
+        self.adaptor.sync()
+
+
+class WriteBehindStorage(Storage):
+    """
+    Storage persisting added events in groups from a background thread
+
+    A group is written once max_events are waiting, or max_delay seconds after the first of them, so no more events
+    than that are lost if the process stops. sync is when the adaptor forces writes on to disk: 'never', on 'flush'
+    and close, or after every 'group'. A group that fails to write is tried again with the next, and the error is
+    raised by the next flush or close.
+    """
+
+    SYNC = ('never', 'flush', 'group')
+
+    def __init__(self, timesheet: TimesheetInterface, adaptor: StorageInterface, max_events: int = 1000,
+                 max_delay: float = 1.0, sync: str = 'flush') -> None:
+        if sync not in self.SYNC:
+            raise ValueError(f"Expected sync to be one of {self.SYNC} (got {sync!r})")
+        # Only needed when writing behind
+        import threading
+        super().__init__(timesheet, adaptor)
+        self.max_events = max_events
+        self.max_delay = max_delay
+        self.sync = sync
+        self.timesheet.lock = threading.RLock()
+        self.timesheet.added = self.added
+        self.condition = threading.Condition()
+        # Events added since the last group was taken, and when the first of them was
+        self.waiting = 0
+        self.first: Optional[float] = None
+        self.flushes = 0
+        self.flushed = 0
+        self.closed = False
+        self.error: Optional[Exception] = None
+        self.writer = threading.Thread(target=self.write_behind, name='whatdo-write-behind', daemon=True)
+        self.writer.start()
+
+    def added(self) -> None:
+        with self.condition:
+            self.waiting += 1
+            if self.first is None:
+                self.first = monotonic()
+                # Wakes the writer to wait for max_delay
+                self.condition.notify()
+            elif self.waiting >= self.max_events:
+                self.condition.notify()
+
+    def due(self) -> bool:
+        return self.closed or self.flushes > self.flushed or self.waiting >= self.max_events or \
+            (self.first is not None and monotonic() - self.first >= self.max_delay)
+
+    def write_behind(self) -> None:
+        with self.condition:
+            while True:
+                while not self.due():
+                    self.condition.wait(None if self.first is None else self.first + self.max_delay - monotonic())
+                flushes, closed = self.flushes, self.closed
+                self.waiting, self.first = 0, None
+                sync = self.sync == 'group' or (self.sync == 'flush' and (flushes > self.flushed or closed))
+                # Events can be added while the group is written
+                self.condition.release()
+                try:
+                    super().persist()
+                    if sync:
+                        self.adaptor.sync()
+                except Exception as error:
+                    self.error = error
+                    failed = True
+                else:
+                    failed = False
+                finally:
+                    self.condition.acquire()
+                if failed and self.first is None:
+                    # The group is still waiting, try again after max_delay
+                    self.first = monotonic()
+                self.flushed = flushes
+                self.condition.notify_all()
+                if closed:
+                    return
+
+    def records(self, start: datetime = datetime.min, end: datetime = datetime.max) -> Iterator[Tuple[datetime, str]]:
+        # Logged events move to the adaptor while being read, once restored they are only read from the timesheet
+        self.restore()
+        return super().records(start, end)
 
     def persist(self) -> None:
-        self.adaptor.store((record.when, record.what) for record in self.timesheet)
+        self.flush()
+
+    def flush(self) -> None:
+        """
+        Write waiting events now, returning once they are written
+        """
+        with self.condition:
+            if self.writer.is_alive():
+                self.flushes += 1
+                flushes = self.flushes
+                self.condition.notify_all()
+                while self.flushed < flushes and self.writer.is_alive():
+                    self.condition.wait()
+            else:
+                # Closed
+                super().persist()
+            self.raise_error()
+
+    def close(self) -> None:
+        """
+        Write waiting events and stop the writer
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.writer.join()
+        with self.condition:
+            self.raise_error()
+
+    def raise_error(self) -> None:
+        error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+
+class AsyncStorageInterface(ABC):
+    """
+    Storage for use from asyncio, awaited rather than blocking the event loop
+    """
+
+    @abstractmethod
+    async def store(self, records: Iterable[Tuple[datetime, str]]) -> None:
+        pass
+
+    @abstractmethod
+    def retrieve(self) -> AsyncIterator[Tuple[datetime, str]]:
+        pass
+
+    @abstractmethod
+    def retrieve_range(self, start: datetime = datetime.min,
+                       end: datetime = datetime.max) -> AsyncIterator[Tuple[datetime, str]]:
+        pass
+
+    @abstractmethod
+    async def append(self, records: Iterable[Tuple[datetime, str]]) -> None:
+        pass
+
+    async def sync(self) -> None:
+        """
+        Force records written so far on to disk
+        """
+
+    async def close(self) -> None:
+        """
+        Release anything held between calls, such as threads
+        """
+
+
+class AsyncStorage(PersistMixin):
+    """
+    Storage restored and persisted by awaiting an AsyncStorageInterface
+
+    As Storage, events added before restoring are held aside, and only those added since the last persist are written
+    unless stored events were moved. Restore must be awaited before the timesheet is read, as reading cannot wait.
+    """
+
+    def __init__(self, timesheet: TimesheetInterface, adaptor: AsyncStorageInterface) -> None:
+        self.timesheet = LazyTimesheet(timesheet, self.load)
+        self.adaptor = adaptor
+        self.persisted = 0
+        self.retrieved: Optional[List[Tuple[datetime, str]]] = None
+        # Restores and persists take turns, created when first needed so it belongs to the running loop
+        self.lock: Optional['asyncio.Lock'] = None
+
+    def turn(self) -> 'asyncio.Lock':
+        if self.lock is None:
+            import asyncio
+            self.lock = asyncio.Lock()
+        return self.lock
+
+    def load(self, timesheet: TimesheetInterface) -> None:
+        if self.retrieved is None:
+            raise RuntimeError("Expected restore to be awaited before the timesheet is read")
+        self.load_records(timesheet, self.retrieved)
+        self.retrieved = None
+
+    async def restore(self) -> None:
+        async with self.turn():
+            if not self.timesheet.restored:
+                self.retrieved = [record async for record in self.adaptor.retrieve()]
+                self.timesheet.load()
+
+    async def records(self, start: datetime = datetime.min,
+                      end: datetime = datetime.max) -> AsyncIterator[Tuple[datetime, str]]:
+        """
+        Stored and logged records within a range, read one at a time from the adaptor unless already restored
+        """
+        if self.timesheet.restored:
+            for event in self.timesheet.find_in_range(start, end):
+                yield event
+            return
+        logged = self.logged_in_range(start, end)
+        i = 0
+        async for record in self.adaptor.retrieve_range(start, end):
+            while i < len(logged) and logged[i].when < record[0]:
+                yield logged[i]
+                i += 1
+            yield record
+        for event in logged[i:]:
+            yield event
+
+    async def persist(self) -> None:
+        """
+        Write only the events added since the last restore or persist, or everything if stored events were moved
+
+        Events can be added while writing, so what is written is taken before and marked persisted after.
+        """
+        async with self.turn():
+            write = self.take()
+            try:
+                if write.store:
+                    await self.adaptor.store(write.records)
+                elif write.records:
+                    await self.adaptor.append(write.records)
+            except BaseException:
+                self.give_back(write)
+                raise
+            self.written(write)
+
+    async def close(self) -> None:
+        """
+        Persist and sync before the storage is discarded, then close the adaptor
+        """
+        await self.persist()
+        await self.adaptor.sync()
+        await self.adaptor.close()
+
+
+class AsyncTimetracker(object):
+    """
+    Timetracker for use from asyncio, persisting events as they are logged or imported
+    """
+
+    def __init__(self, timesheet: TimesheetInterface, storage: Optional[AsyncStorage] = None) -> None:
+        self.timesheet = timesheet
+        self.storage = storage
+
+    async def log_event(self, what: str) -> None:
+        self.timesheet.append(Event(datetime.now(), what))
+        if self.storage is not None:
+            await self.storage.persist()
+
+    async def import_events(self, records: Iterable[Tuple[datetime, str]]) -> int:
+        """
+        Merge records into the timesheet in one pass, returning how many were added
+        """
+        events = [Event(record[0], record[1]) for record in records]
+        if self.storage is not None:
+            # Merging reads the timesheet
+            await self.storage.restore()
+        self.timesheet.merge(events)
+        if self.storage is not None:
+            await self.storage.persist()
+        return len(events)
+
+    async def task_summary_by_day(self, day: date) -> List[Tuple[float, str]]:
+        start = datetime.combine(day, time())
+        end = datetime.combine(day + timedelta(days=1), time())
+        return [(task.duration.total_seconds() / 3600.0, task.what) for task in await self.task_summary(start, end)]
+
+    async def task_summary(self, start: datetime, end: datetime) -> TaskSummary:
+        if self.storage is None or self.storage.timesheet.restored:
+            return self.timesheet.find_in_range(start, end).summarise()
+        return summarise([record async for record in self.storage.records(start, end)])
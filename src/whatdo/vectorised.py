@@ -0,0 +1,79 @@
+# coding: utf-8
+#
+# BSD 2-Clause License
+#
+# Copyright (c) 2018, Dylan Perry <dylan.perry@gmail.com>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+"""
+Summaries with NumPy, for ranges large enough that the per-event loops of the model dominate
+
+Events are held as they are in ColumnarTimesheet, int64 microseconds and codes into a table of descriptions, so
+summarising needs no conversion. NumPy is optional. Without it, or for ranges too small to gain from it, the pure
+Python summary is used, giving the same tasks in the same order.
+"""
+
+from datetime import timedelta
+from typing import Any, Optional, Sequence
+
+from .model import ColumnarTimesheet, Task, TaskSummary
+
+try:
+    import numpy
+    HAVE_NUMPY = True
+except ImportError:
+    HAVE_NUMPY = False
+
+# Events below which the pure Python summaries are faster, see benchmarks/bench_vectorised.py
+THRESHOLD = 500
+
+
+def summarise_codes(times: Any, codes: Any, descriptions: Sequence[str]) -> TaskSummary:
+    """
+    Tasks between consecutive times, grouped by code, in the order each description was first seen
+    """
+    if len(times) < 2:
+        return TaskSummary(())
+    starts = codes[:-1]
+    # Exact while a task totals less than 2 ** 53 microseconds, over 285 years
+    totals = numpy.bincount(starts, weights=numpy.diff(times), minlength=len(descriptions))
+    seen, first = numpy.unique(starts, return_index=True)
+    return TaskSummary(Task(timedelta(microseconds=int(totals[code])), descriptions[code])
+                       for code in seen[numpy.argsort(first)].tolist())
+
+
+class VectorisedTimesheet(ColumnarTimesheet):
+    """
+    ColumnarTimesheet summarising its columns in place with NumPy, without creating events
+    """
+
+    def summarise(self, lo: int = 0, hi: Optional[int] = None) -> TaskSummary:
+        indices = range(len(self))[lo:hi]
+        if not HAVE_NUMPY or len(indices) < THRESHOLD:
+            return super().summarise(lo, hi)
+        # Views of the arrays, which cannot grow until these are released
+        times = numpy.frombuffer(self.when, dtype=numpy.int64)[indices.start:indices.stop]
+        codes = numpy.frombuffer(self.what, dtype=f"u{self.what.itemsize}")[indices.start:indices.stop]
+        return summarise_codes(times, codes, self.descriptions)
@@ -27,12 +27,13 @@
 # ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 #
+import asyncio
 from datetime import datetime
 from unittest.mock import MagicMock
 
 from pytest import fixture
 
-from whatdo.model import Timesheet, Event
+from whatdo.model import Timesheet, Event, ColumnarTimesheet
 from whatdo.port import StorageInterface
 
 
@@ -41,6 +42,18 @@ def storage_adaptor_mock():
     return MagicMock(spec=StorageInterface)
 
 
+@fixture(scope='function')
+def run():
+    def run_until_complete(coroutine):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+    return run_until_complete
+
+
 @fixture(scope='function')
 def empty_timesheet():
     return Timesheet()
@@ -62,6 +75,11 @@ def bttf_timesheet():
     return timesheet
 
 
+@fixture(scope='function')
+def bttf_columnar_timesheet(bttf_timesheet):
+    return ColumnarTimesheet(bttf_timesheet)
+
+
 @fixture(scope='function')
 def dup_timesheet():
     timesheet = Timesheet()
@@ -27,15 +27,33 @@
 # ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 #
-from datetime import datetime, timezone
+import os
+import threading
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime, timezone, timedelta, date
 from unittest.mock import MagicMock, mock_open, patch
 
-from pytest import raises
+from pytest import raises, fixture
 
-from whatdo.adaptor import CommandLine, MemoryStorage, CsvStorage
+from whatdo.adaptor import CommandLine, MemoryStorage, CsvStorage, DatetimeConversionMixin, OffsetCache, utc_offset, \
+    local_offset, BinaryStorage, SqliteStorage, MemorySummaryCache, FileSummaryCache, ImportFile, MonthlyCsvStorage, \
+    YearlyCsvStorage, ThreadedStorage
 from whatdo.port import Timetracker
 
 
+@fixture
+def new_york_timezone(monkeypatch):
+    monkeypatch.setenv('TZ', 'America/New_York')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
 def test_command_line_initialise_success():
     """Can initialise CommandLine with Timetracker port"""
 
@@ -77,6 +95,24 @@ def test_command_line_call_with_one_argument_invokes_log_event():
     timetracker.log_event.assert_called_with('one')
 
 
+def test_command_line_parse_words_without_parser():
+    # noinspection PyTypeChecker
+    command_line = CommandLine(MagicMock(spec=Timetracker))
+
+    assert 'Eat a potato' == command_line.parse(['Eat', 'a', 'potato'])
+    assert command_line.parser is None
+
+
+def test_command_line_parse_options_reuses_parser():
+    # noinspection PyTypeChecker
+    command_line = CommandLine(MagicMock(spec=Timetracker))
+
+    assert '-1 potato' == command_line.parse(['--', '-1', 'potato'])
+    parser = command_line.parser
+    assert 'a potato' == command_line.parse(['--', 'a', 'potato'])
+    assert parser is command_line.parser
+
+
 def test_command_line_call_with_today_argument_produces_summary(capsys):
     timetracker = MagicMock(spec=Timetracker)
     # noinspection PyTypeChecker
@@ -89,6 +125,133 @@ def test_command_line_call_with_today_argument_produces_summary(capsys):
     assert '2h\tStuff and things' in out
 
 
+def test_command_line_call_with_import_option_imports_file(capsys, tmp_path):
+    path = tmp_path / 'events.csv'
+    path.write_text('1985-10-26T09:21:00.000000,Destination Time\n')
+    timetracker = MagicMock(spec=Timetracker)
+    timetracker.import_events.side_effect = lambda records: len(list(records))
+    # noinspection PyTypeChecker
+    command_line = CommandLine(timetracker)
+
+    assert 0 == command_line(['--import', str(path)])
+    (out, _) = capsys.readouterr()
+    assert 'Imported 1 events' in out
+
+
+def test_command_line_call_with_import_option_finds_relative_path_in_directory(capsys, tmp_path):
+    (tmp_path / 'events.csv').write_text('1985-10-26T09:21:00.000000,Destination Time\n')
+    timetracker = MagicMock(spec=Timetracker)
+    timetracker.import_events.side_effect = lambda records: len(list(records))
+    # noinspection PyTypeChecker
+    command_line = CommandLine(timetracker)
+
+    assert 0 == command_line(['--import', 'events.csv'], str(tmp_path))
+    (out, _) = capsys.readouterr()
+    assert 'Imported 1 events' in out
+
+
+def test_command_line_call_logs_events_starting_with_import():
+    timetracker = MagicMock(spec=Timetracker)
+    # noinspection PyTypeChecker
+    command_line = CommandLine(timetracker)
+
+    assert 0 == command_line(['import', 'taxes'])
+    assert 0 == command_line(['--', '--import', 'taxes'])
+
+    assert [(('import taxes',),), (('--import taxes',),)] == timetracker.log_event.call_args_list
+    timetracker.import_events.assert_not_called()
+
+
+def test_command_line_call_with_import_option_and_words_will_exit():
+    # noinspection PyTypeChecker
+    command_line = CommandLine(MagicMock(spec=Timetracker))
+
+    with raises(SystemExit):
+        command_line(['--import', 'events.csv', 'taxes'])
+
+
+def test_command_line_call_with_import_option_reports_bad_file(capsys, tmp_path):
+    timetracker = MagicMock(spec=Timetracker)
+    timetracker.import_events.side_effect = lambda records: len(list(records))
+    # noinspection PyTypeChecker
+    command_line = CommandLine(timetracker)
+
+    assert 1 == command_line(['--import', str(tmp_path / 'missing.csv')])
+    (_, err) = capsys.readouterr()
+    assert 'missing.csv' in err
+
+
+def test_command_line_call_with_import_option_reports_oversized_field(capsys, tmp_path):
+    timetracker = MagicMock(spec=Timetracker)
+    timetracker.import_events.side_effect = lambda records: len(list(records))
+    path = tmp_path / 'big.csv'
+    path.write_text('1985-10-26T09:21:00.000000,' + 'x' * 200000 + '\n')
+    # noinspection PyTypeChecker
+    command_line = CommandLine(timetracker)
+
+    assert 1 == command_line(['--import', str(path)])
+    (_, err) = capsys.readouterr()
+    assert err.startswith(f"whatdo: {path}:1: field larger than field limit")
+
+
+def test_offset_cache_matches_offset_across_transitions(new_york_timezone):
+    for offset in (utc_offset, local_offset):
+        cache = OffsetCache(offset)
+        # Spring forward and fall back, then back again out of order
+        for start in (datetime(2018, 3, 10), datetime(2018, 11, 3), datetime(2018, 3, 10)):
+            for minutes in range(0, 2 * 24 * 60, 5):
+                when = start + timedelta(minutes=minutes)
+                assert offset(when) == cache(when)
+        assert 3 == len(cache.pieces)
+
+
+def test_offset_cache_forgets_pieces_when_timezone_changes(monkeypatch):
+    cache = OffsetCache(utc_offset)
+    when = datetime(2018, 7, 1, 16)
+    monkeypatch.setenv('TZ', 'UTC')
+    time.tzset()
+    try:
+        assert timedelta() == cache(when)
+
+        monkeypatch.setenv('TZ', 'America/New_York')
+        time.tzset()
+
+        assert timedelta(hours=-4) == cache(when)
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+
+def test_offset_cache_covers_limits_of_datetime(new_york_timezone):
+    conversion = DatetimeConversionMixin()
+
+    for when in (datetime.min, datetime(1, 1, 1, 12), datetime(9999, 12, 31, 12)):
+        assert when == conversion.to_datetime(conversion.from_datetime(when))
+        assert when == conversion.epoch_to_datetime(conversion.datetime_to_epoch(when))
+
+
+def test_datetime_conversion_round_trips_local_time(new_york_timezone):
+    conversion = DatetimeConversionMixin()
+
+    assert '2018-07-01T16:00:00.000001' == conversion.from_datetime(datetime(2018, 7, 1, 12, 0, 0, 1))
+    assert datetime(2018, 7, 1, 12, 0, 0, 1) == conversion.to_datetime('2018-07-01T16:00:00.000001')
+
+
+def test_datetime_conversion_falls_back_to_strptime():
+    with raises(ValueError):
+        DatetimeConversionMixin().to_datetime('1985-10-26 01:21')
+
+
+def test_datetime_conversion_epoch_round_trips():
+    conversion = DatetimeConversionMixin()
+    when = datetime(1985, 10, 26, 1, 21, 0, 1)
+
+    assert when == conversion.epoch_to_datetime(conversion.datetime_to_epoch(when))
+    start, end, local_epoch = conversion.epoch_piece(conversion.datetime_to_epoch(when))
+    assert start <= conversion.datetime_to_epoch(when) < end
+    assert when == local_epoch + timedelta(microseconds=conversion.datetime_to_epoch(when))
+
+
 def test_memory_storage_initialise_success():
     """Can initialise a MemoryStorage adaptor"""
 
@@ -125,37 +288,106 @@ def test_memory_storage_retrieve_records():
     assert i == len(test_data) - 1
 
 
+def test_memory_storage_append_records():
+    memory_storage = MemoryStorage()
+    memory_storage.store(iter([(datetime(1985, 10, 26, 1, 21), 'Destination Time')]))
+    memory_storage.append([(datetime(1985, 10, 26, 1, 22), 'Present Time')])
+
+    assert [record[1] for record in memory_storage.retrieve()] == ['Destination Time', 'Present Time']
+
+
 def test_csv_storage_initialise_success():
     csv_storage = CsvStorage()
     assert isinstance(csv_storage, CsvStorage)
 
 
-def test_csv_storage_store_opens_file():
+def test_csv_storage_store_replaces_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
     test_data = [
-        (datetime(1985, 10, 26, 1, 21), 'Destination Time'),
-        (datetime(1985, 10, 26, 1, 22), 'Present Time'),
-        (datetime(1985, 10, 26, 1, 20), 'Last Time Departed'),
+        (datetime(1985, 10, 26, 1, 21, tzinfo=timezone.utc), 'Destination Time'),
+        (datetime(1985, 10, 26, 1, 22, tzinfo=timezone.utc), 'Present Time'),
     ]
 
     csv_storage = CsvStorage()
-    with patch('whatdo.adaptor.open', mock_open()) as open_:
-        csv_storage.store(test_data)
+    csv_storage.store(iter(test_data))
+    csv_storage.store(iter(test_data[1:]))
+
+    assert b'1985-10-26T01:22:00.000000,Present Time\r\n' == (tmp_path / 'timesheet.csv').read_bytes()
+    assert not (tmp_path / 'timesheet.csv.tmp').exists()
+
+
+def test_csv_storage_interrupted_store_keeps_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    csv_storage = CsvStorage()
+    csv_storage.store(iter([(datetime(1985, 10, 26, 1, 21), 'Destination Time')]))
 
-    open_.assert_called_once_with('timesheet.csv', 'w')
+    def interrupted():
+        yield datetime(1985, 10, 26, 1, 22), 'Present Time'
+        raise KeyboardInterrupt()
 
+    with raises(KeyboardInterrupt):
+        csv_storage.store(interrupted())
 
-def test_csv_storage_store_writes_record():
+    assert ['Destination Time'] == [record[1] for record in csv_storage.retrieve()]
+    assert not (tmp_path / 'timesheet.csv.tmp').exists()
+
+
+def test_csv_storage_append_adds_records(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
     test_data = [(datetime(1985, 10, 26, 1, 21, tzinfo=timezone.utc), 'Destination Time'), ]
 
+    CsvStorage().append(test_data)
+    CsvStorage().append(test_data)
+
+    assert b'1985-10-26T01:21:00.000000,Destination Time\r\n' * 2 == (tmp_path / 'timesheet.csv').read_bytes()
+
+
+def test_csv_storage_append_cuts_off_unfinished_row(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'timesheet.csv').write_bytes(b'1985-10-26T01:21:00.000000,Destination Time\r\n1985-10-26T01:2')
     csv_storage = CsvStorage()
-    with patch('whatdo.adaptor.open', mock_open()) as open_:
-        csv_storage.store(test_data)
 
-    handle = open_()
-    handle.write.assert_called_once_with('1985-10-26T01:21:00.000000,Destination Time\r\n')
+    assert ['Destination Time'] == [record[1] for record in csv_storage.retrieve()]
+    csv_storage.append([(datetime(1985, 10, 26, 1, 22, tzinfo=timezone.utc), 'Present Time')])
+
+    assert ['Destination Time', 'Present Time'] == [record[1] for record in csv_storage.retrieve()]
+
 
+def test_csv_storage_lock_excludes_other_processes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    code = "import fcntl, os; fcntl.flock(os.open('timesheet.csv.lock', os.O_RDWR), fcntl.LOCK_EX | fcntl.LOCK_NB)"
 
-def test_csv_storage_retrieve_succeeds_with_missing_file():
+    with CsvStorage().lock():
+        assert 0 != subprocess.run([sys.executable, '-c', code], stderr=subprocess.DEVNULL).returncode
+    assert 0 == subprocess.run([sys.executable, '-c', code]).returncode
+
+
+def test_csv_storage_lock_is_held_until_every_thread_releases_it(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    code = "import fcntl, os; fcntl.flock(os.open('timesheet.csv.lock', os.O_RDWR), fcntl.LOCK_EX | fcntl.LOCK_NB)"
+    csv_storage = CsvStorage()
+    locked, release = threading.Event(), threading.Event()
+
+    def hold():
+        with csv_storage.lock():
+            locked.set()
+            release.wait(5.0)
+    holder = threading.Thread(target=hold)
+    holder.start()
+    locked.wait(5.0)
+    with csv_storage.lock():
+        pass
+    held = subprocess.run([sys.executable, '-c', code], stderr=subprocess.DEVNULL).returncode
+    release.set()
+    holder.join()
+
+    assert 0 != held
+    assert csv_storage.lock_fd is None
+    assert 0 == subprocess.run([sys.executable, '-c', code]).returncode
+
+
+def test_csv_storage_retrieve_succeeds_with_missing_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
     csv_storage = CsvStorage()
     with patch('whatdo.adaptor.open') as open_:
         open_.side_effect = FileNotFoundError('Boom')
@@ -164,7 +396,8 @@ def test_csv_storage_retrieve_succeeds_with_missing_file():
     open_.assert_called_once_with('timesheet.csv', 'r')
 
 
-def test_csv_storage_retrieve_opens_file():
+def test_csv_storage_retrieve_opens_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
     csv_storage = CsvStorage()
     with patch('whatdo.adaptor.open', mock_open()) as open_:
         list(csv_storage.retrieve())
@@ -172,7 +405,8 @@ def test_csv_storage_retrieve_opens_file():
     open_.assert_called_once_with('timesheet.csv', 'r')
 
 
-def test_csv_storage_retrieve_reads_record():
+def test_csv_storage_retrieve_reads_record(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
     csv_data = '1985-10-26T01:21:00.000000,Destination Time\r\n'
 
     csv_storage = CsvStorage()
@@ -185,3 +419,525 @@ def test_csv_storage_retrieve_reads_record():
     # We need to make the a non timezone aware datetime for comparison
     assert test_data[0] == (datetime(1985, 10, 26, 1, 21, tzinfo=timezone.utc).astimezone(tz=None).replace(tzinfo=None),
                             'Destination Time')
+
+
+def test_csv_storage_uses_root(tmp_path, monkeypatch):
+    monkeypatch.setenv('WHATDO_ROOT', str(tmp_path))
+
+    CsvStorage().append([(datetime(1985, 10, 26, 1, 21), 'Destination Time')])
+
+    assert (tmp_path / 'timesheet.csv').exists()
+    assert ['timesheet.csv.lock'] == [path.name for path in tmp_path.glob('*.lock')]
+
+
+def test_csv_storage_unknown_shard_fails(tmp_path):
+    with raises(ValueError):
+        CsvStorage(str(tmp_path / 'timesheet.csv'), shard='week')
+
+
+def test_monthly_csv_storage_append_writes_shard(tmp_path):
+    csv_storage = MonthlyCsvStorage(str(tmp_path / 'timesheet.csv'))
+
+    csv_storage.append([(datetime(1985, 10, 26, 1, 21), 'Destination Time')])
+    csv_storage.append([(datetime(1985, 10, 27, 1, 21), 'Present Time'), (datetime(1985, 11, 5, 6, 15), 'Dropped')])
+
+    assert ['timesheet-1985-10.csv', 'timesheet-1985-11.csv'] == sorted(path.name for path in tmp_path.glob('*.csv'))
+    assert ['Destination Time', 'Present Time', 'Dropped'] == [record[1] for record in csv_storage.retrieve()]
+
+
+def test_yearly_csv_storage_store_removes_stale_shards(tmp_path):
+    csv_storage = YearlyCsvStorage(str(tmp_path / 'timesheet.csv'))
+    csv_storage.store(iter([(datetime(1955, 11, 5, 6, 15), 'Dropped'), (datetime(1985, 10, 26, 1, 21), 'Arrived')]))
+
+    csv_storage.store(iter([(datetime(1985, 10, 26, 1, 21), 'Arrived')]))
+
+    assert ['timesheet-1985.csv'] == [path.name for path in tmp_path.glob('*.csv')]
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def test_monthly_csv_storage_sync_forces_appended_shards_to_disk(tmp_path):
+    csv_storage = MonthlyCsvStorage(str(tmp_path / 'timesheet.csv'))
+    csv_storage.store(iter([(datetime(1985, month, 15), f"Month {month}") for month in range(1, 13)]))
+    csv_storage.append([(datetime(1985, 12, 16), 'Appended')])
+
+    with patch('whatdo.adaptor.sync_file') as sync_file:
+        csv_storage.sync()
+        csv_storage.sync()
+
+    sync_file.assert_called_once_with(str(tmp_path / 'timesheet-1985-12.csv'))
+
+
+def test_monthly_csv_storage_retrieve_range_opens_overlapping_shards(tmp_path):
+    csv_storage = MonthlyCsvStorage(str(tmp_path / 'timesheet.csv'))
+    csv_storage.store(iter([(datetime(1985, month, 15), f"Month {month}") for month in range(1, 13)]))
+    # Another storage's shards beside these are ignored
+    (tmp_path / 'other-1985-06.csv').write_text('1985-06-15T00:00:00.000000,Other\n')
+
+    with patch('whatdo.adaptor.open', wraps=open) as open_:
+        records = list(csv_storage.retrieve_range(datetime(1985, 3, 20), datetime(1985, 6, 1)))
+
+    assert ['Month 4', 'Month 5'] == [record[1] for record in records]
+    assert ['timesheet-1985-03.csv', 'timesheet-1985-04.csv', 'timesheet-1985-05.csv'] == \
+        [os.path.basename(call[0][0]) for call in open_.call_args_list]
+
+
+def test_csv_storage_parallel_retrieve_matches_serial(tmp_path, monkeypatch):
+    monkeypatch.setattr(CsvStorage, 'PARALLEL_SIZE', 0)
+    path = str(tmp_path / 'timesheet.csv')
+    test_data = [(datetime(1985, 10, 26, 1, minute), f"Task {minute % 7}") for minute in range(60)]
+    test_data[30] = (test_data[30][0], 'Split\n1985-10-26, over "lines"')
+    CsvStorage(path).store(iter(test_data))
+    with open(path, 'a') as output_file:
+        output_file.write('1985-10-26T02:00:00.000000,Unfini')
+
+    assert test_data == list(CsvStorage(path, workers=3).retrieve())
+
+
+def test_csv_storage_parallel_retrieve_shares_one_pool_between_shards(tmp_path, monkeypatch):
+    monkeypatch.setattr(CsvStorage, 'PARALLEL_SIZE', 0)
+    path = str(tmp_path / 'timesheet.csv')
+    test_data = [(datetime(1985, month, 26, 1, minute), f"Task {minute}") for month in (9, 10) for minute in range(9)]
+    MonthlyCsvStorage(path).store(iter(test_data))
+
+    with patch('concurrent.futures.ProcessPoolExecutor', wraps=ProcessPoolExecutor) as executor:
+        assert test_data == list(MonthlyCsvStorage(path, workers=2).retrieve())
+
+    executor.assert_called_once()
+    assert 'forkserver' == executor.call_args[0][1].get_start_method()
+
+
+def test_csv_storage_chunk_starts_at_rows(tmp_path):
+    path = tmp_path / 'timesheet.csv'
+    CsvStorage(str(path)).store(iter([(datetime(1985, 10, 26, 1, minute), 'Time') for minute in range(60)]))
+    data = path.read_bytes()
+
+    starts = CsvStorage(str(path), workers=4).chunk_starts(str(path), len(data))
+
+    assert 4 == len(starts)
+    assert all(CsvStorage.RECORD_START.match(data[start:]) for start in starts)
+
+
+def test_csv_storage_workers_from_environment(monkeypatch):
+    monkeypatch.setenv('WHATDO_WORKERS', '4')
+    assert 4 == CsvStorage().workers
+
+    with raises(ValueError):
+        CsvStorage(workers=0)
+
+
+def test_binary_storage_retrieve_succeeds_with_missing_file(tmp_path):
+    assert [] == list(BinaryStorage(str(tmp_path / 'timesheet.dat')).retrieve())
+
+
+def test_binary_storage_retrieve_succeeds_with_empty_file(tmp_path):
+    (tmp_path / 'timesheet.dat').touch()
+
+    assert [] == list(BinaryStorage(str(tmp_path / 'timesheet.dat')).retrieve())
+
+
+def test_binary_storage_append_to_empty_file(tmp_path):
+    (tmp_path / 'timesheet.dat').touch()
+    binary_storage = BinaryStorage(str(tmp_path / 'timesheet.dat'))
+
+    binary_storage.append([(datetime(1985, 10, 26, 1, 21), 'Destination Time')])
+
+    assert [(datetime(1985, 10, 26, 1, 21), 'Destination Time')] == list(binary_storage.retrieve())
+
+
+def test_binary_storage_retrieve_closes_mapping(tmp_path):
+    binary_storage = BinaryStorage(str(tmp_path / 'timesheet.dat'))
+    binary_storage.store(iter([(datetime(1985, 10, 26, 1, 21), 'Destination Time'),
+                               (datetime(1985, 10, 26, 1, 22), 'Present Time')]))
+    maps = []
+    map_file = binary_storage.map
+
+    def mapped():
+        maps.append(map_file())
+        return maps[-1]
+
+    with patch.object(binary_storage, 'map', side_effect=mapped):
+        assert 2 == len(list(binary_storage.retrieve()))
+        records = binary_storage.retrieve_range(datetime(1985, 10, 26))
+        next(records)
+        records.close()
+
+    assert [True, True] == [data.closed for data in maps]
+
+
+def test_binary_storage_retrieve_stored_records(tmp_path):
+    test_data = [
+        (datetime(1985, 10, 26, 1, 21), 'Destination Time'),
+        (datetime(1985, 10, 26, 1, 22), 'Present Time'),
+        (datetime(1985, 10, 26, 1, 20), 'Last Time Departed'),
+    ]
+
+    binary_storage = BinaryStorage(str(tmp_path / 'timesheet.dat'))
+    binary_storage.store(iter(test_data))
+
+    assert test_data == list(binary_storage.retrieve())
+
+
+def test_binary_storage_append_records(tmp_path):
+    binary_storage = BinaryStorage(str(tmp_path / 'timesheet.dat'))
+    binary_storage.append([(datetime(1985, 10, 26, 1, 21), 'Destination Time')])
+    binary_storage.append([(datetime(1985, 10, 26, 1, 22), 'Present Time'),
+                           (datetime(1985, 10, 26, 1, 23), 'Destination Time')])
+
+    assert ['Destination Time', 'Present Time', 'Destination Time'] == \
+        [record[1] for record in binary_storage.retrieve()]
+    # Each description is held once, in the table after the records
+    data = (tmp_path / 'timesheet.dat').read_bytes()
+    assert ['Destination Time', 'Present Time'] == binary_storage.read_table(data, binary_storage.read_header(data)[1])
+
+
+def test_binary_storage_append_reuses_free_space(tmp_path):
+    binary_storage = BinaryStorage(str(tmp_path / 'timesheet.dat'))
+    binary_storage.store(iter([(datetime(1985, 10, 26, 1, 21), 'Destination Time'),
+                               (datetime(1985, 10, 26, 1, 22), 'Present Time')]))
+    # The old table is left free for records
+    binary_storage.append([(datetime(1985, 10, 26, 1, 23), 'Back in Time')])
+    size = (tmp_path / 'timesheet.dat').stat().st_size
+
+    binary_storage.append([(datetime(1985, 10, 26, 1, 24), 'Present Time')])
+
+    assert size == (tmp_path / 'timesheet.dat').stat().st_size
+    assert ['Destination Time', 'Present Time', 'Back in Time', 'Present Time'] == \
+        [record[1] for record in binary_storage.retrieve()]
+
+
+def test_binary_storage_interrupted_append_keeps_records(tmp_path):
+    binary_storage = BinaryStorage(str(tmp_path / 'timesheet.dat'))
+    binary_storage.append([(datetime(1985, 10, 26, 1, 21), 'Destination Time')])
+
+    write_header = binary_storage.write_header
+
+    # Interrupted after writing the new table, then after writing the records over the old one
+    for headers in (0, 1):
+        def interrupted(*args, written=[]):
+            if len(written) == headers:
+                raise KeyboardInterrupt()
+            written.append(args)
+            write_header(*args)
+
+        with patch.object(binary_storage, 'write_header', side_effect=interrupted), raises(KeyboardInterrupt):
+            binary_storage.append([(datetime(1985, 10, 26, 1, 22), 'Present Time')])
+
+        assert ['Destination Time'] == [record[1] for record in binary_storage.retrieve()]
+    binary_storage.append([(datetime(1985, 10, 26, 1, 22), 'Present Time')])
+    assert ['Destination Time', 'Present Time'] == [record[1] for record in binary_storage.retrieve()]
+
+
+def test_binary_storage_lock_excludes_other_processes(tmp_path):
+    code = "import fcntl, os; fcntl.flock(os.open('timesheet.dat.lock', os.O_RDWR), fcntl.LOCK_EX | fcntl.LOCK_NB)"
+
+    with BinaryStorage(str(tmp_path / 'timesheet.dat')).lock():
+        assert 0 != subprocess.run([sys.executable, '-c', code], cwd=str(tmp_path),
+                                   stderr=subprocess.DEVNULL).returncode
+
+
+def test_binary_storage_sync_forces_file_to_disk(tmp_path):
+    storage = BinaryStorage(str(tmp_path / 'timesheet.dat'))
+    storage.sync()
+    storage.store(iter([(datetime(1985, 10, 26, 1, 21), 'Destination Time')]))
+
+    with patch('os.fsync') as fsync:
+        storage.sync()
+    fsync.assert_called_once()
+
+
+def test_binary_storage_retrieve_other_file_fails(tmp_path):
+    (tmp_path / 'timesheet.dat').write_bytes(b'1985-10-26T01:21:00.000000,Destination Time\r\n')
+
+    with raises(ValueError):
+        list(BinaryStorage(str(tmp_path / 'timesheet.dat')).retrieve())
+
+
+def test_binary_storage_records_whether_ordered(tmp_path):
+    binary_storage = BinaryStorage(str(tmp_path / 'timesheet.dat'))
+    binary_storage.store(iter([(datetime(1985, 10, 26, 1, 21), 'Destination Time')]))
+    binary_storage.append([(datetime(1985, 10, 26, 1, 22), 'Present Time')])
+    assert BinaryStorage.ORDERED == binary_storage.read_header((tmp_path / 'timesheet.dat').read_bytes())[2]
+
+    binary_storage.append([(datetime(1985, 10, 26, 1, 20), 'Last Time Departed')])
+    assert 0 == binary_storage.read_header((tmp_path / 'timesheet.dat').read_bytes())[2]
+    assert ['Destination Time', 'Present Time', 'Last Time Departed'] == \
+        [record[1] for record in binary_storage.retrieve()]
+
+
+def test_binary_storage_retrieve_range_seeks_by_time(tmp_path):
+    test_data = [
+        (datetime(1985, 10, 25, 23, 0), 'Yesterday'),
+        (datetime(1985, 10, 26, 1, 21), 'Destination Time'),
+        (datetime(1985, 10, 26, 1, 22), 'Present Time'),
+        (datetime(1985, 10, 27, 9, 0), 'Tomorrow'),
+    ]
+    binary_storage = BinaryStorage(str(tmp_path / 'timesheet.dat'))
+    binary_storage.store(iter(test_data))
+
+    decode = binary_storage.decode
+    decoded = []
+
+    # Without holding on to the records, which are unmapped once retrieved
+    def decode_range(*args):
+        decoded.append(args[4:])
+        return decode(*args)
+
+    with patch.object(binary_storage, 'decode', decode_range):
+        records = list(binary_storage.retrieve_range(datetime(1985, 10, 26), datetime(1985, 10, 27)))
+
+    assert test_data[1:3] == records
+    assert [(1, 3)] == decoded
+
+
+def test_binary_storage_retrieve_range_filters_unordered(tmp_path):
+    binary_storage = BinaryStorage(str(tmp_path / 'timesheet.dat'))
+    binary_storage.store(iter([
+        (datetime(1985, 10, 26, 1, 22), 'Present Time'),
+        (datetime(1985, 10, 25, 23, 0), 'Yesterday'),
+        (datetime(1985, 10, 26, 1, 21), 'Destination Time'),
+    ]))
+
+    assert ['Present Time', 'Destination Time'] == \
+        [record[1] for record in binary_storage.retrieve_range(start=datetime(1985, 10, 26))]
+
+
+def test_sqlite_storage_retrieve_stored_records(tmp_path):
+    test_data = [
+        (datetime(1985, 10, 26, 1, 21), 'Destination Time'),
+        (datetime(1985, 10, 26, 1, 22), 'Present Time'),
+        (datetime(1985, 10, 26, 1, 20), 'Last Time Departed'),
+    ]
+
+    sqlite_storage = SqliteStorage(str(tmp_path / 'timesheet.sqlite'))
+    sqlite_storage.store(iter(test_data))
+    sqlite_storage.store(iter(test_data))
+
+    assert test_data == list(sqlite_storage.retrieve())
+
+
+def test_sqlite_storage_append_records(tmp_path):
+    sqlite_storage = SqliteStorage(str(tmp_path / 'timesheet.sqlite'))
+    sqlite_storage.append([(datetime(1985, 10, 26, 1, 21), 'Destination Time')])
+    sqlite_storage.append([(datetime(1985, 10, 26, 1, 22), 'Present Time')])
+
+    assert ['Destination Time', 'Present Time'] == [record[1] for record in sqlite_storage.retrieve()]
+
+
+def test_sqlite_storage_retrieve_range_uses_index(tmp_path):
+    sqlite_storage = SqliteStorage(str(tmp_path / 'timesheet.sqlite'))
+    sqlite_storage.store(iter([
+        (datetime(1985, 10, 25, 23, 0), 'Yesterday'),
+        (datetime(1985, 10, 26, 1, 21), 'Destination Time'),
+        (datetime(1985, 10, 27, 9, 0), 'Tomorrow'),
+    ]))
+
+    records = list(sqlite_storage.retrieve_range(datetime(1985, 10, 26), datetime(1985, 10, 27)))
+
+    assert [(datetime(1985, 10, 26, 1, 21), 'Destination Time')] == records
+    sql, parameters = sqlite_storage.select_range(datetime(1985, 10, 26), datetime(1985, 10, 27))
+    with closing(sqlite_storage.connect()) as connection:
+        plan = [row[-1] for row in connection.execute(f"EXPLAIN QUERY PLAN {sql}", parameters)]
+        assert 'wal' == connection.execute('PRAGMA journal_mode').fetchone()[0]
+    # Seeks the range by index, then sorts only the events in it back into the order they were added
+    assert any(step.startswith('SEARCH') and 'event_when' in step for step in plan)
+    assert not any(step.startswith('SCAN') for step in plan)
+
+
+def test_sqlite_storage_retrieve_missing_database_leaves_it_missing(tmp_path):
+    sqlite_storage = SqliteStorage(str(tmp_path / 'timesheet.sqlite'))
+
+    assert [] == list(sqlite_storage.retrieve())
+    assert [] == list(sqlite_storage.retrieve_range(datetime(1985, 10, 26)))
+    assert not (tmp_path / 'timesheet.sqlite').exists()
+
+
+def test_sqlite_storage_initialises_schema_once(tmp_path):
+    sqlite_storage = SqliteStorage(str(tmp_path / 'timesheet.sqlite'))
+    sqlite_storage.append([(datetime(1985, 10, 26, 1, 21), 'Destination Time')])
+
+    with patch('sqlite3.connect') as connect:
+        sqlite_storage.append([(datetime(1985, 10, 26, 1, 22), 'Present Time')])
+
+    statements = [call[0][0] for call in connect.return_value.execute.call_args_list]
+    assert not [statement for statement in statements if statement.startswith(('PRAGMA', 'CREATE'))]
+
+
+def test_memory_summary_cache_invalidates_day_and_latest_earlier_day():
+    summary_cache = MemorySummaryCache()
+    for day in (date(1985, 10, 24), date(1985, 10, 25), date(1985, 10, 26), date(1985, 10, 27)):
+        summary_cache.put(day, [(1.0, 'Stuff')])
+
+    summary_cache.invalidate(date(1985, 10, 26))
+
+    assert [(1.0, 'Stuff')] == summary_cache.get(date(1985, 10, 24))
+    assert summary_cache.get(date(1985, 10, 25)) is None
+    assert summary_cache.get(date(1985, 10, 26)) is None
+    assert [(1.0, 'Stuff')] == summary_cache.get(date(1985, 10, 27))
+
+
+def test_file_summary_cache_get_missing_day(tmp_path):
+    assert FileSummaryCache(str(tmp_path / 'timesheet.cache')).get(date(1985, 10, 26)) is None
+
+
+def test_file_summary_cache_get_put_summary(tmp_path):
+    summary_cache = FileSummaryCache(str(tmp_path / 'timesheet.cache'))
+    summary_cache.put(date(1985, 10, 26), [(1 / 60, 'Destination Time')])
+
+    assert [(1 / 60, 'Destination Time')] == summary_cache.get(date(1985, 10, 26))
+
+
+def test_file_summary_cache_get_truncated_summary_misses(tmp_path):
+    summary_cache = FileSummaryCache(str(tmp_path / 'timesheet.cache'))
+    summary_cache.put(date(1985, 10, 26), [(1 / 60, 'Destination Time')])
+    (tmp_path / 'timesheet.cache' / '1985-10-26.json').write_text('[[0.016')
+
+    assert summary_cache.get(date(1985, 10, 26)) is None
+
+
+def test_file_summary_cache_interrupted_put_keeps_summary(tmp_path):
+    summary_cache = FileSummaryCache(str(tmp_path / 'timesheet.cache'))
+    summary_cache.put(date(1985, 10, 26), [(1 / 60, 'Destination Time')])
+
+    with patch('json.dump', side_effect=KeyboardInterrupt()), raises(KeyboardInterrupt):
+        summary_cache.put(date(1985, 10, 26), [(2 / 60, 'Present Time')])
+
+    assert [(1 / 60, 'Destination Time')] == summary_cache.get(date(1985, 10, 26))
+    assert ['1985-10-26.json'] == os.listdir(tmp_path / 'timesheet.cache')
+
+
+def test_file_summary_cache_invalidates_day_and_latest_earlier_day(tmp_path):
+    summary_cache = FileSummaryCache(str(tmp_path / 'timesheet.cache'))
+    summary_cache.invalidate(date(1985, 10, 26))
+    for day in (date(1985, 10, 24), date(1985, 10, 25), date(1985, 10, 27)):
+        summary_cache.put(day, [(1.0, 'Stuff')])
+
+    summary_cache.invalidate(date(1985, 10, 26))
+
+    assert ['1985-10-24.json', '1985-10-27.json'] == sorted(os.listdir(tmp_path / 'timesheet.cache'))
+
+
+def test_import_file_reads_csv_records(tmp_path):
+    path = tmp_path / 'events.csv'
+    path.write_text('1985-10-26T09:21:00.000000,Destination Time\n\n1985-10-26T09:22:00.000000,"Present, Time"\n')
+
+    records = list(ImportFile(str(path)))
+
+    assert [DatetimeConversionMixin().from_datetime(record[0]) for record in records] == \
+        ['1985-10-26T09:21:00.000000', '1985-10-26T09:22:00.000000']
+    assert ['Destination Time', 'Present, Time'] == [record[1] for record in records]
+
+
+def test_import_file_reads_json_lines_records(tmp_path):
+    path = tmp_path / 'events.jsonl'
+    path.write_text('{"when": "1985-10-26T09:21:00.000000", "what": "Destination Time"}\n')
+
+    assert ['Destination Time'] == [record[1] for record in ImportFile(str(path))]
+
+
+def test_import_file_reports_line_of_bad_record(tmp_path):
+    path = tmp_path / 'events.jsonl'
+    path.write_text('{"when": "1985-10-26T09:21:00.000000", "what": "Destination Time"}\n'
+                    '{"when": "yesterday", "what": "Present Time"}\n')
+
+    with raises(ValueError, match='events.jsonl:2:'):
+        list(ImportFile(str(path)))
+
+
+def test_import_file_rejects_unterminated_quote(tmp_path):
+    path = tmp_path / 'events.csv'
+    path.write_text('1985-10-26T09:21:00.000000,Destination Time\n1985-10-26T09:22:00.000000,"Present Time\n')
+
+    with raises(ValueError, match='events.csv:2:'):
+        list(ImportFile(str(path)))
+
+
+def test_import_file_rejects_missing_what(tmp_path):
+    path = tmp_path / 'events.csv'
+    path.write_text('1985-10-26T09:21:00.000000\n')
+
+    with raises(ValueError, match='events.csv:1: expected when and what'):
+        list(ImportFile(str(path)))
+
+
+def test_threaded_storage_round_trip(bttf_timesheet, run):
+    storage = ThreadedStorage(MemoryStorage())
+    storage.BATCH = 2
+
+    async def round_trip():
+        await storage.store(iter(bttf_timesheet[:3]))
+        await storage.append(iter(bttf_timesheet[3:]))
+        await storage.sync()
+        everything = [record async for record in storage.retrieve()]
+        day = [record async for record in storage.retrieve_range(datetime(1985, 10, 26), datetime(1985, 10, 27))]
+        return everything, day
+
+    everything, day = run(round_trip())
+
+    assert list(bttf_timesheet) == everything
+    assert list(bttf_timesheet.find_in_range(datetime(1985, 10, 26), datetime(1985, 10, 27))) == day
+
+
+def test_threaded_storage_reads_in_another_thread(bttf_timesheet, run):
+    threads = []
+
+    class ThreadRecordingStorage(MemoryStorage):
+        def retrieve(self):
+            threads.append(threading.current_thread())
+            return super().retrieve()
+
+    adaptor = ThreadRecordingStorage()
+    adaptor.store(iter(bttf_timesheet))
+    storage = ThreadedStorage(adaptor)
+
+    async def retrieve():
+        return [record async for record in storage.retrieve()]
+
+    assert list(bttf_timesheet) == run(retrieve())
+    assert threads and threading.current_thread() not in threads
+
+
+def test_threaded_storage_closes_abandoned_retrieve(bttf_timesheet, run):
+    closed = []
+
+    class ClosingStorage(MemoryStorage):
+        def retrieve(self):
+            try:
+                yield from super().retrieve()
+            finally:
+                closed.append(True)
+
+    adaptor = ClosingStorage()
+    adaptor.store(iter(bttf_timesheet))
+    storage = ThreadedStorage(adaptor)
+    storage.BATCH = 1
+
+    async def first():
+        records = storage.retrieve()
+        try:
+            async for record in records:
+                return record
+        finally:
+            await records.aclose()
+
+    assert bttf_timesheet[0] == run(first())
+    assert [True] == closed
+
+
+def test_threaded_storage_close_shuts_down_only_its_own_pool(bttf_timesheet, run):
+    given = ThreadPoolExecutor(1)
+    owning, sharing = ThreadedStorage(MemoryStorage()), ThreadedStorage(MemoryStorage(), given)
+
+    async def store_and_close():
+        for storage in (owning, sharing):
+            await storage.store(iter(bttf_timesheet))
+        owned = owning.executor
+        for storage in (owning, sharing):
+            await storage.close()
+        return owned
+
+    owned = run(store_and_close())
+
+    with raises(RuntimeError):
+        owned.submit(len, [])
+    assert 0 == given.submit(len, []).result()
+    given.shutdown()
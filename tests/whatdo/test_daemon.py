@@ -0,0 +1,123 @@
+# coding: utf-8
+#
+# BSD 2-Clause License
+#
+# Copyright (c) 2018, Dylan Perry <dylan.perry@gmail.com>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+
+import asyncio
+import json
+import os
+import stat
+from threading import Thread
+
+from pytest import fixture
+
+from whatdo.adaptor import MemoryStorage
+from whatdo.client import Client
+from whatdo.daemon import Daemon, DaemonCli
+from whatdo.entry import Cli
+
+
+@fixture
+def daemon(tmp_path):
+    daemon = Daemon(Cli(storage_interface=MemoryStorage), str(tmp_path / 'whatdo.sock'))
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(daemon.start())
+    thread = Thread(target=loop.run_forever)
+    thread.start()
+    yield daemon
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.run_until_complete(daemon.stop())
+    loop.close()
+
+
+def test_daemon_execute_captures_output():
+    daemon = Daemon(Cli(storage_interface=MemoryStorage))
+
+    assert (0, '', '') == daemon.execute(['Eat', 'a', 'potato'])
+    status, _, err = daemon.execute([])
+    assert 2 == status
+    assert 'usage' in err
+
+
+def test_daemon_cli_leaves_persisting_to_storage():
+    cli = DaemonCli(storage_interface=MemoryStorage)
+
+    assert 0 == cli.run(['Eat', 'a', 'potato'])
+    assert 0 == len(cli.storage_interface)
+    cli.storage.close()
+    assert 1 == len(cli.storage_interface)
+
+
+def test_daemon_logs_events_from_client(daemon, capsys):
+    client = Client(daemon.path)
+
+    assert 0 == client(['Eat', 'a', 'potato'])
+    assert 0 == client(['today'])
+    assert 1 == len(daemon.cli.storage.timesheet)
+
+
+def test_daemon_profiles_for_client(daemon, capsys):
+    assert 0 == Client(daemon.path)(['--profile', 'today'])
+    (_, err) = capsys.readouterr()
+    assert ['today'] == json.loads(err)['args']
+
+
+def test_daemon_socket_is_owner_only(daemon):
+    assert 0o600 == stat.S_IMODE(os.stat(daemon.path).st_mode)
+    assert ['whatdo.sock'] == os.listdir(os.path.dirname(daemon.path))
+
+
+def test_daemon_imports_relative_to_client_directory(daemon, capsys, tmp_path, monkeypatch):
+    client_directory = tmp_path / 'client'
+    client_directory.mkdir()
+    (client_directory / 'events.csv').write_text('1985-10-26T09:21:00.000000,Destination Time\n')
+    monkeypatch.chdir(client_directory)
+
+    assert 0 == Client(daemon.path)(['--import', 'events.csv'])
+    (out, _) = capsys.readouterr()
+    assert 'Imported 1 events' in out
+
+
+def test_daemon_reports_errors_to_client(daemon, capsys):
+    assert 2 == Client(daemon.path)([])
+    (_, err) = capsys.readouterr()
+    assert 'usage' in err
+
+
+def test_daemon_stop_persists_and_removes_socket(tmp_path):
+    cli = Cli(storage_interface=MemoryStorage)
+    daemon = Daemon(cli, str(tmp_path / 'whatdo.sock'))
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(daemon.start())
+    daemon.execute(['Eat', 'a', 'potato'])
+    loop.run_until_complete(daemon.stop())
+    loop.close()
+
+    assert 1 == len(cli.storage_interface)
+    assert not os.path.exists(daemon.path)
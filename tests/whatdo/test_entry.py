@@ -28,12 +28,17 @@
 # POSSIBILITY OF SUCH DAMAGE.
 #
 
+import os
+import subprocess
 import sys
+from datetime import datetime, date, time
+from unittest.mock import patch
 
 from pytest import raises
 
-from whatdo.adaptor import MemoryStorage
-from whatdo.entry import Cli
+from whatdo.adaptor import MemoryStorage, CsvStorage, BinaryStorage, MemorySummaryCache, MonthlyCsvStorage, \
+    FileSummaryCache
+from whatdo.entry import Cli, Convert, cli
 
 
 def test_cli_empty_arguments_returns_nonzero(monkeypatch):
@@ -56,3 +61,110 @@ def test_cli_arguments_returns_zero(monkeypatch):
     with raises(SystemExit) as exit_:
         cli()
         assert exit_ == 0
+
+
+def test_cli_log_event_does_not_restore():
+    """Logging an event appends to storage without reading history"""
+
+    cli = Cli(storage_interface=MemoryStorage)
+    cli.storage_interface.store(iter([(datetime(1985, 10, 26, 1, 21), 'Destination Time')]))
+
+    with patch.object(cli.storage_interface, 'retrieve') as retrieve:
+        assert 0 == cli.run(['Present', 'Time'])
+
+    retrieve.assert_not_called()
+    assert 2 == len(cli.storage_interface)
+
+
+def test_cli_today_does_not_restore(capsys):
+    """Reporting reads history from storage without restoring it into the timesheet"""
+
+    cli = Cli(storage_interface=MemoryStorage)
+    cli.storage_interface.store(iter([
+        (datetime.combine(date.today(), time(9)), 'Stuff'),
+        (datetime.combine(date.today(), time(10)), 'Things'),
+    ]))
+
+    assert 0 == cli.run(['today'])
+
+    assert 0 == len(cli.timesheet)
+    assert '1h\tStuff' in capsys.readouterr()[0]
+
+
+def test_convert_copies_csv_to_binary(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    test_data = [(datetime(1985, 10, 26, 1, 21), 'Destination Time'), (datetime(1985, 10, 26, 1, 22), 'Present Time')]
+    CsvStorage().store(iter(test_data))
+
+    assert 0 == Convert().run(['csv', 'binary'])
+
+    assert test_data == list(BinaryStorage().retrieve())
+
+
+def test_convert_shards_csv_by_month(tmp_path, monkeypatch):
+    monkeypatch.setenv('WHATDO_ROOT', str(tmp_path))
+    test_data = [(datetime(1985, 10, 26, 1, 21), 'Destination Time'), (datetime(1985, 11, 5, 6, 15), 'Dropped')]
+    CsvStorage().store(iter(test_data))
+
+    assert 0 == Convert().run(['csv', 'csv-month'])
+
+    assert test_data == list(MonthlyCsvStorage().retrieve())
+    assert (tmp_path / 'timesheet-1985-11.csv').exists()
+
+
+def test_convert_to_same_storage_fails():
+    with raises(SystemExit):
+        Convert().run(['csv', 'csv'])
+
+
+def test_cli_summary_cache_is_configurable():
+    assert Cli(storage_interface=MemoryStorage).summary_cache is None
+    cli = Cli(storage_interface=MemoryStorage, summary_cache=MemorySummaryCache)
+
+    assert 0 == cli.run(['today'])
+
+    assert [] == cli.summary_cache.get(date.today())
+
+
+def test_cli_storage_is_configurable_by_environment(monkeypatch):
+    monkeypatch.setenv('WHATDO_STORAGE', 'csv-year')
+    assert isinstance(Cli().storage_interface, CsvStorage)
+    assert 'year' == Cli().storage_interface.shard
+
+    monkeypatch.setenv('WHATDO_STORAGE', 'paper')
+    with raises(ValueError):
+        Cli()
+
+
+def test_cli_summary_cache_is_configurable_by_environment(monkeypatch):
+    assert Cli().summary_cache is None
+
+    monkeypatch.setenv('WHATDO_SUMMARY_CACHE', 'file')
+    assert isinstance(Cli().summary_cache, FileSummaryCache)
+    assert Cli().timetracker.summary_cache is not None
+
+    monkeypatch.setenv('WHATDO_SUMMARY_CACHE', 'abacus')
+    with raises(ValueError):
+        Cli()
+
+
+def test_cli_unknown_storage_is_usage_error(monkeypatch, capsys):
+    monkeypatch.setenv('WHATDO_STORAGE', 'paper')
+
+    with raises(SystemExit) as exit_:
+        cli()
+
+    assert 2 == exit_.value.code
+    assert capsys.readouterr().err.startswith("whatdo: Expected WHATDO_STORAGE")
+
+
+def test_entry_import_leaves_slow_modules_unloaded():
+    """Importing the console scripts neither builds a Cli nor loads modules only some commands need"""
+
+    unloaded = {'argparse', 'json', 'mmap', 'sqlite3', 'struct'}
+    code = f"import sys, whatdo.entry; print(sorted({unloaded!r} & set(sys.modules)))"
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    result = subprocess.run([sys.executable, '-c', code], stdout=subprocess.PIPE, universal_newlines=True,
+                            env=environment, check=True)
+
+    assert '[]' == result.stdout.strip()
@@ -0,0 +1,100 @@
+# coding: utf-8
+#
+# BSD 2-Clause License
+#
+# Copyright (c) 2018, Dylan Perry <dylan.perry@gmail.com>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+
+import json
+import pstats
+from unittest.mock import patch
+
+from pytest import raises
+
+from whatdo.adaptor import MemoryStorage
+from whatdo.entry import Cli
+
+
+def test_cli_profile_writes_phases_to_stderr(capsys):
+    cli = Cli(storage_interface=MemoryStorage)
+    cli.run(['Destination Time'])
+    capsys.readouterr()
+
+    assert 0 == cli.run(['--profile', 'today'])
+
+    (_, err) = capsys.readouterr()
+    timing = json.loads(err)
+    assert ['today'] == timing['args']
+    assert {'summary', 'command', 'persist', 'other'} <= set(timing['phases'])
+    assert timing['seconds'] >= timing['phases']['summary']
+    assert {'read', 'written'} == set(timing['bytes'])
+
+
+def test_cli_profile_environment_appends_to_file(tmp_path, monkeypatch):
+    monkeypatch.setenv('WHATDO_PROFILE', str(tmp_path / 'profile.jsonl'))
+    cli = Cli(storage_interface=MemoryStorage)
+
+    cli.run(['Destination Time'])
+    cli.run(['Present Time'])
+
+    lines = (tmp_path / 'profile.jsonl').read_text().splitlines()
+    assert [1, 1] == [json.loads(line)['events']['written'] for line in lines]
+
+
+def test_cli_cprofile_saves_stats(tmp_path, monkeypatch):
+    monkeypatch.setenv('WHATDO_CPROFILE', str(tmp_path / 'whatdo.prof'))
+
+    Cli(storage_interface=MemoryStorage).run(['Destination Time'])
+
+    assert pstats.Stats(str(tmp_path / 'whatdo.prof')).total_calls > 0
+
+
+def test_cli_profile_reports_unwritable_output_after_error(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv('WHATDO_PROFILE', str(tmp_path))
+    cli = Cli(storage_interface=MemoryStorage)
+
+    with patch.object(cli.storage, 'persist', side_effect=RuntimeError('Disk full')), raises(RuntimeError):
+        cli.run(['Destination Time'])
+    (_, err) = capsys.readouterr()
+    assert err.startswith('whatdo: could not write profile: ')
+
+
+def test_cli_profile_leaves_cli_as_it_was(capsys):
+    cli = Cli(storage_interface=MemoryStorage)
+    command_line = cli.command_line
+
+    cli.run(['--profile', 'Destination Time'])
+
+    assert command_line is cli.command_line
+    assert 'persist' not in vars(cli.storage)
+    assert 'retrieve' not in vars(cli.storage_interface)
+
+
+def test_cli_without_profile_is_not_instrumented():
+    with patch('whatdo.instrument.Instrument') as instrument:
+        assert 0 == Cli(storage_interface=MemoryStorage).run(['Destination Time'])
+
+    instrument.assert_not_called()
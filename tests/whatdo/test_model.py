@@ -28,11 +28,12 @@
 # POSSIBILITY OF SUCH DAMAGE.
 #
 
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from random import Random
 
 from pytest import raises
 
-from whatdo.model import Event, Timesheet, Task, TaskSummary
+from whatdo.model import Event, Timesheet, Task, TaskSummary, ColumnarTimesheet, Rollup, summarise
 
 
 def test_event_created():
@@ -52,6 +53,18 @@ def test_event_properties_match():
     assert what == event.what
 
 
+def test_event_is_immutable():
+    event = Event(datetime(1985, 10, 26, 1, 22), 'Something happened')
+    with raises(AttributeError):
+        # noinspection PyPropertyAccess
+        event.what = 'Something else'
+
+
+def test_events_equal_by_value_are_hashed_equally():
+    assert hash(Event(datetime(1985, 10, 26, 1, 22), 'Present Time')) == \
+        hash(Event(datetime(1985, 10, 26, 1, 22), 'Present Time'))
+
+
 def test_timesheet_append_event_succeeds(empty_timesheet):
     """Can append an event to a timesheet"""
 
@@ -92,6 +105,61 @@ def test_bttf_timesheet_find_none_returns_equivalent_timesheet(bttf_timesheet):
     assert bttf_timesheet == events
 
 
+def test_timesheet_append_inserts_back_dated_event_in_order(bttf_timesheet):
+    bttf_timesheet.append(Event(datetime(1955, 11, 12, 22, 4), 'Clock Tower'))
+
+    assert ['Arrival', 'Lightning Strike', 'Clock Tower', 'Last Time Departed'] == \
+        [event.what for event in bttf_timesheet[:4]]
+
+
+def test_timesheet_list_methods_cannot_reorder_events(bttf_timesheet):
+    events = list(bttf_timesheet)
+    arrival = bttf_timesheet[0]
+
+    for reorder in (lambda: bttf_timesheet.insert(len(bttf_timesheet), arrival),
+                    lambda: bttf_timesheet.__setitem__(-1, arrival),
+                    lambda: bttf_timesheet.__iadd__([arrival]),
+                    lambda: bttf_timesheet.__imul__(2),
+                    lambda: bttf_timesheet.sort(key=lambda event: event.what),
+                    bttf_timesheet.reverse):
+        with raises(TypeError):
+            reorder()
+
+    assert events == bttf_timesheet
+
+
+def test_timesheet_created_from_unordered_events_is_ordered(bttf_timesheet):
+    timesheet = Timesheet(reversed(bttf_timesheet))
+
+    assert list(bttf_timesheet) == timesheet
+
+
+def test_bttf_timesheet_find_does_not_copy_events(bttf_timesheet):
+    events = bttf_timesheet.find_in_range(datetime(1985, 10, 26), datetime(1985, 10, 27))
+
+    assert 4 == len(events)
+    assert bttf_timesheet[2] is events[0]
+    assert bttf_timesheet[5] is events[-1]
+
+
+def test_bttf_timesheet_find_within_range_narrows(bttf_timesheet):
+    events = bttf_timesheet.find_in_range(start=datetime(1985, 10, 26)).find_in_range(end=datetime(1985, 10, 26, 1, 22))
+
+    assert [event.what for event in events] == ['Last Time Departed', 'Destination Time']
+
+
+def test_back_dated_timesheet_find_returns_matching_events(bttf_timesheet):
+    bttf_timesheet.append(Event(datetime(1985, 10, 26, 1, 0), 'Late Entry'))
+    events = bttf_timesheet.find_in_range(datetime(1985, 10, 26), datetime(1985, 10, 26, 1, 21))
+
+    assert [event.what for event in events] == ['Late Entry', 'Last Time Departed']
+
+
+def test_timesheet_range_summarise_gives_tasks_within_range(bttf_timesheet):
+    tasks = bttf_timesheet.find_in_range(start=datetime(1985, 10, 26)).summarise()
+    assert ['Last Time Departed', 'Destination Time', 'Present Time'] == [task.what for task in tasks]
+
+
 def test_timesheet_summarise_gives_task_list(empty_timesheet):
     # For an arbitrary value of now
     empty_timesheet.append(Event(datetime(2018, 8, 31, 18, 50), 'Now'))
@@ -119,11 +187,31 @@ def test_timesheet_summarise_groups_by_what(dup_timesheet):
     assert 1 == len(tasks)
 
 
+def test_summarise_reads_records_from_iterator(bttf_timesheet):
+    tasks = summarise((event.when, event.what) for event in bttf_timesheet)
+    assert [(task.duration, task.what) for task in bttf_timesheet.summarise()] == \
+        [(task.duration, task.what) for task in tasks]
+
+
+def test_summarise_single_record_gives_no_tasks():
+    assert 0 == len(summarise(iter([(datetime(2018, 8, 31, 18, 50), 'Now')])))
+
+
 def test_task_created():
     task = Task(timedelta(hours=1), 'Something happened')
     assert isinstance(task, Task)
 
 
+def test_task_has_no_instance_dict():
+    with raises(AttributeError):
+        # noinspection PyUnresolvedReferences
+        Task(timedelta(hours=1), 'Something happened').__dict__
+
+
+def test_equal_tasks_are_hashed_equally():
+    assert hash(Task(timedelta(hours=1), 'This')) == hash(Task(timedelta(hours=5), 'This'))
+
+
 def test_task_add_task_with_same_what_adds_duration():
     task = Task(timedelta(hours=1), 'This') + Task(timedelta(hours=5), 'This')
     assert Task(timedelta(hours=6), 'This') == task
@@ -155,3 +243,154 @@ def test_task_summary_summarise_duration():
     ])
     assert Task(timedelta(hours=3), 'Refactoring') == task_summary[0]
     assert timedelta(hours=3) == task_summary[0].duration
+
+
+def test_task_summary_keeps_first_seen_order():
+    task_summary = TaskSummary([
+        Task(timedelta(hours=1), 'Refactoring'),
+        Task(timedelta(hours=2), 'Testing'),
+        Task(timedelta(hours=3), 'Refactoring'),
+    ])
+    assert ['Refactoring', 'Testing'] == [task.what for task in task_summary]
+    assert timedelta(hours=4) == task_summary[0].duration
+
+
+def test_columnar_timesheet_append_other_fails():
+    with raises(TypeError):
+        # noinspection PyTypeChecker
+        ColumnarTimesheet().append("Boom")
+
+
+def test_columnar_timesheet_stores_descriptions_once(dup_timesheet):
+    timesheet = ColumnarTimesheet(dup_timesheet)
+    assert ['Implement Task grouping', 'Complete Task grouping'] == timesheet.descriptions
+    assert 3 == len(timesheet)
+
+
+def test_columnar_timesheet_creates_equal_events(bttf_timesheet, bttf_columnar_timesheet):
+    assert list(bttf_timesheet) == list(bttf_columnar_timesheet)
+    assert bttf_timesheet[-1] == bttf_columnar_timesheet[-1]
+
+
+def test_columnar_timesheet_find_start_returns_partial_timesheet(bttf_columnar_timesheet):
+    events = bttf_columnar_timesheet.find_in_range(start=datetime(1985, 10, 26, 1, 21))
+
+    assert 3 == len(events)
+    assert 'Destination Time' == events[0].what
+
+
+def test_columnar_timesheet_summarise_matches_timesheet(bttf_timesheet, bttf_columnar_timesheet):
+    tasks = bttf_columnar_timesheet.summarise()
+
+    assert [(task.duration, task.what) for task in bttf_timesheet.summarise()] == \
+        [(task.duration, task.what) for task in tasks]
+
+
+def test_columnar_timesheet_range_summarise_matches_timesheet(bttf_timesheet, bttf_columnar_timesheet):
+    start = datetime(1985, 10, 26)
+    tasks = bttf_columnar_timesheet.find_in_range(start).summarise()
+
+    assert [(task.duration, task.what) for task in bttf_timesheet.find_in_range(start).summarise()] == \
+        [(task.duration, task.what) for task in tasks]
+
+
+def years_of_events(seed: int = 1985) -> Timesheet:
+    random = Random(seed)
+    timesheet = Timesheet()
+    when = datetime(1985, 10, 26)
+    while when < datetime(1988, 1, 1):
+        timesheet.append(Event(when, random.choice(['Plutonium', 'Flux capacitor', 'Hoverboard'])))
+        when += timedelta(minutes=random.choice([1, 45, 600, 3000, 20000]))
+    return timesheet
+
+
+def test_rollup_summarise_matches_range_summarise():
+    timesheet = years_of_events()
+    rollup = Rollup(timesheet)
+    random = Random(1955)
+
+    for _ in range(200):
+        start = datetime(1985, 10, 1) + timedelta(minutes=random.randrange(3 * 366 * 24 * 60))
+        end = start + timedelta(minutes=random.choice([30, 2000, 60000, 600000]))
+
+        assert [(task.duration, task.what) for task in timesheet.find_in_range(start, end).summarise()] == \
+            [(task.duration, task.what) for task in rollup.summarise(start, end)]
+
+
+def test_rollup_summarise_without_range_matches_summarise(bttf_timesheet):
+    assert [(task.duration, task.what) for task in bttf_timesheet.summarise()] == \
+        [(task.duration, task.what) for task in Rollup(bttf_timesheet).summarise()]
+
+
+def test_rollup_append_counts_new_task():
+    timesheet = years_of_events()
+    rollup = Rollup(timesheet)
+    event = Event(timesheet[-1].when + timedelta(hours=1), 'Hoverboard')
+    timesheet.append(event)
+    rollup.append(event)
+
+    start = datetime(1985, 10, 26)
+    assert [(task.duration, task.what) for task in timesheet.find_in_range(start).summarise()] == \
+        [(task.duration, task.what) for task in rollup.summarise(start)]
+
+
+def test_rollup_cover_uses_fewest_periods():
+    periods = list(Rollup.cover(date(1985, 10, 19), date(1988, 1, 1)))
+
+    assert [('day', date(1985, 10, 19)), ('day', date(1985, 10, 20)), ('week', date(1985, 10, 21)),
+            ('day', date(1985, 10, 28)), ('day', date(1985, 10, 29)), ('day', date(1985, 10, 30)),
+            ('day', date(1985, 10, 31)), ('month', date(1985, 11, 1)), ('month', date(1985, 12, 1)),
+            ('year', date(1986, 1, 1)), ('year', date(1987, 1, 1))] == periods
+
+
+def test_timesheet_merge_adds_events_in_order(bttf_timesheet):
+    lo = bttf_timesheet.merge([
+        Event(datetime(2015, 10, 21, 16, 29), 'Hill Valley'),
+        Event(datetime(1955, 11, 12, 18, 0), 'Enchantment Under the Sea'),
+    ])
+
+    assert 1 == lo
+    assert [event.when for event in bttf_timesheet] == sorted(event.when for event in bttf_timesheet)
+    assert 8 == len(bttf_timesheet)
+
+
+def test_timesheet_merge_after_last_event_moves_nothing(bttf_timesheet):
+    lo = bttf_timesheet.merge([Event(datetime(2015, 10, 21, 16, 29), 'Hill Valley')])
+
+    assert 6 == lo
+    assert 'Hill Valley' == bttf_timesheet[-1].what
+
+
+def test_timesheet_merge_other_fails_without_change(bttf_timesheet):
+    with raises(TypeError):
+        # noinspection PyTypeChecker
+        bttf_timesheet.merge([Event(datetime(1955, 11, 12, 18, 0), 'Enchantment Under the Sea'), "Boom"])
+    assert 6 == len(bttf_timesheet)
+
+
+def test_columnar_timesheet_merge_matches_timesheet(bttf_timesheet, bttf_columnar_timesheet):
+    events = [Event(datetime(1985, 10, 26, 1, 21), 'Einstein'), Event(datetime(1955, 11, 5, 6, 0), 'Arrival')]
+    bttf_timesheet.merge(events)
+    bttf_columnar_timesheet.merge(events)
+
+    assert list(bttf_timesheet) == list(bttf_columnar_timesheet)
+
+
+def test_columnar_timesheet_append_inserts_back_dated_event_in_order(bttf_timesheet, bttf_columnar_timesheet):
+    event = Event(datetime(1955, 11, 12, 22, 4), 'Clock Tower')
+    bttf_timesheet.append(event)
+    bttf_columnar_timesheet.append(event)
+
+    assert list(bttf_timesheet) == list(bttf_columnar_timesheet)
+
+
+def test_rollup_append_splits_task_at_back_dated_event():
+    timesheet = years_of_events()
+    rollup = Rollup(timesheet)
+    for event in (Event(datetime(1986, 6, 1, 12), 'Hoverboard'), Event(datetime(1985, 1, 1), 'Plutonium')):
+        timesheet.append(event)
+        rollup.append(event)
+
+    start = datetime(1984, 10, 26)
+    assert {task.what: task.duration for task in timesheet.find_in_range(start).summarise()} == \
+        {task.what: task.duration for task in rollup.summarise(start)}
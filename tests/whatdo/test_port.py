@@ -28,12 +28,17 @@
 # POSSIBILITY OF SUCH DAMAGE.
 #
 
-from datetime import date, datetime
+import asyncio
+import time
+from threading import Thread
+from datetime import date, datetime, timedelta
+from unittest.mock import MagicMock
 
-from pytest import approx
+from pytest import approx, raises
 
-from whatdo.model import Timesheet, Event
-from whatdo.port import Storage, Timetracker
+from whatdo.model import Timesheet, Event, Rollup
+from whatdo.port import Storage, StorageInterface, Timetracker, SummaryCacheInterface, WriteBehindStorage, \
+    AsyncStorageInterface, AsyncStorage, AsyncTimetracker
 
 
 def test_create_timetracker():
@@ -72,12 +77,10 @@ def test_create_storage(empty_timesheet, storage_adaptor_mock):
 def test_storage_persist_succeeds(empty_timesheet, storage_adaptor_mock):
     """Storage port can persist data"""
 
-    empty_timesheet.append(Event(datetime(1985, 10, 26, 1, 21), 'Destination Time'))
     storage = Storage(empty_timesheet, storage_adaptor_mock)
+    storage.timesheet.append(Event(datetime(1985, 10, 26, 1, 21), 'Destination Time'))
     storage.persist()
-    storage_adaptor_mock.store.assert_called_once()
-    first_argument = storage_adaptor_mock.store.call_args[0][0]
-    assert (datetime(1985, 10, 26, 1, 21), 'Destination Time') == next(first_argument)
+    storage_adaptor_mock.append.assert_called_once_with([(datetime(1985, 10, 26, 1, 21), 'Destination Time')])
 
 
 def test_storage_init_retrieves_records(empty_timesheet, storage_adaptor_mock):
@@ -89,3 +92,478 @@ def test_storage_init_retrieves_records(empty_timesheet, storage_adaptor_mock):
     Storage(empty_timesheet, storage_adaptor_mock).restore()
     storage_adaptor_mock.retrieve.assert_called_once()
     assert 3 == len(empty_timesheet)
+
+
+def test_storage_timesheet_restores_when_read(empty_timesheet, storage_adaptor_mock):
+    storage_adaptor_mock.retrieve.return_value = iter([(datetime(1985, 10, 26, 1, 21), 'Destination Time')])
+    storage = Storage(empty_timesheet, storage_adaptor_mock)
+
+    storage.timesheet.append(Event(datetime(1985, 10, 26, 1, 22), 'Present Time'))
+    storage_adaptor_mock.retrieve.assert_not_called()
+
+    assert ['Destination Time', 'Present Time'] == [event.what for event in storage.timesheet]
+    storage_adaptor_mock.retrieve.assert_called_once()
+
+
+def test_storage_persist_without_restore_writes_logged_events(empty_timesheet, storage_adaptor_mock):
+    storage = Storage(empty_timesheet, storage_adaptor_mock)
+    storage.timesheet.append(Event(datetime(1985, 10, 26, 1, 22), 'Present Time'))
+    storage.persist()
+    storage.persist()
+
+    storage_adaptor_mock.retrieve.assert_not_called()
+    storage_adaptor_mock.store.assert_not_called()
+    storage_adaptor_mock.append.assert_called_once_with([(datetime(1985, 10, 26, 1, 22), 'Present Time')])
+
+
+def test_storage_persist_after_restore_writes_only_new_events(empty_timesheet, storage_adaptor_mock):
+    storage_adaptor_mock.retrieve.return_value = iter([(datetime(1985, 10, 26, 1, 21), 'Destination Time')])
+    storage = Storage(empty_timesheet, storage_adaptor_mock)
+    storage.restore()
+    storage.timesheet.append(Event(datetime(1985, 10, 26, 1, 22), 'Present Time'))
+    storage.persist()
+    storage_adaptor_mock.append.assert_called_once_with([(datetime(1985, 10, 26, 1, 22), 'Present Time')])
+    storage_adaptor_mock.store.assert_not_called()
+
+
+def test_storage_persist_without_new_events_does_nothing(empty_timesheet, storage_adaptor_mock):
+    Storage(empty_timesheet, storage_adaptor_mock).persist()
+    storage_adaptor_mock.append.assert_not_called()
+
+
+def test_storage_interface_default_append_rewrites_records():
+    class ListStorage(StorageInterface):
+        def __init__(self) -> None:
+            self.data = [(datetime(1985, 10, 26, 1, 21), 'Destination Time')]
+
+        def store(self, records):
+            self.data = list(records)
+
+        def retrieve(self):
+            return iter(self.data)
+
+    storage = ListStorage()
+    storage.append([(datetime(1985, 10, 26, 1, 22), 'Present Time')])
+    assert [(datetime(1985, 10, 26, 1, 21), 'Destination Time'),
+            (datetime(1985, 10, 26, 1, 22), 'Present Time')] == storage.data
+    assert [(datetime(1985, 10, 26, 1, 22), 'Present Time')] == \
+        list(storage.retrieve_range(start=datetime(1985, 10, 26, 1, 22)))
+
+
+def test_storage_records_streams_stored_and_logged_records(empty_timesheet, storage_adaptor_mock):
+    storage_adaptor_mock.retrieve_range.return_value = iter([
+        (datetime(1985, 10, 26, 1, 21), 'Destination Time'),
+    ])
+    storage = Storage(empty_timesheet, storage_adaptor_mock)
+    storage.timesheet.append(Event(datetime(1985, 10, 25, 23, 0), 'Yesterday'))
+    storage.timesheet.append(Event(datetime(1985, 10, 26, 1, 22), 'Present Time'))
+
+    records = list(storage.records(datetime(1985, 10, 26), datetime(1985, 10, 27)))
+
+    storage_adaptor_mock.retrieve_range.assert_called_once_with(datetime(1985, 10, 26), datetime(1985, 10, 27))
+    storage_adaptor_mock.retrieve.assert_not_called()
+    assert [(datetime(1985, 10, 26, 1, 21), 'Destination Time'), (datetime(1985, 10, 26, 1, 22), 'Present Time')] == \
+        records
+
+
+def test_timetracker_task_summary_day_streams_from_storage(empty_timesheet, storage_adaptor_mock):
+    storage_adaptor_mock.retrieve_range.return_value = iter([
+        (datetime(1985, 10, 26, 1, 21), 'Destination Time'),
+        (datetime(1985, 10, 26, 1, 22), 'Present Time'),
+    ])
+    timetracker = Timetracker(empty_timesheet, Storage(empty_timesheet, storage_adaptor_mock))
+    tasks = timetracker.task_summary_by_day(date(1985, 10, 26))
+    assert [(approx(1 / 60), 'Destination Time')] == tasks
+    assert 0 == len(empty_timesheet)
+
+
+def test_timetracker_task_summary_day_restores_lazy_timesheet(empty_timesheet, storage_adaptor_mock):
+    storage_adaptor_mock.retrieve.return_value = iter([(datetime(1985, 10, 26, 1, 21), 'Destination Time')])
+    storage = Storage(empty_timesheet, storage_adaptor_mock)
+    timetracker = Timetracker(storage.timesheet)
+    storage.timesheet.append(Event(datetime(1985, 10, 26, 1, 22), 'Present Time'))
+
+    tasks = timetracker.task_summary_by_day(date(1985, 10, 26))
+
+    assert [(approx(1 / 60), 'Destination Time')] == tasks
+    assert 2 == len(empty_timesheet)
+
+
+def test_timetracker_task_summary_day_uses_cached_summary(empty_timesheet):
+    summary_cache = MagicMock(spec=SummaryCacheInterface)
+    summary_cache.get.return_value = [(2.0, 'Stuff and things')]
+    timetracker = Timetracker(empty_timesheet, summary_cache=summary_cache)
+
+    assert [(2.0, 'Stuff and things')] == timetracker.task_summary_by_day(date(1985, 10, 26))
+    summary_cache.get.assert_called_once_with(date(1985, 10, 26))
+    summary_cache.put.assert_not_called()
+
+
+def test_timetracker_task_summary_day_caches_summary(bttf_timesheet):
+    summary_cache = MagicMock(spec=SummaryCacheInterface)
+    summary_cache.get.return_value = None
+    timetracker = Timetracker(bttf_timesheet, summary_cache=summary_cache)
+
+    tasks = timetracker.task_summary_by_day(date(1985, 10, 26))
+
+    summary_cache.put.assert_called_once_with(date(1985, 10, 26), tasks)
+
+
+def test_timetracker_log_event_invalidates_cached_summary(empty_timesheet):
+    summary_cache = MagicMock(spec=SummaryCacheInterface)
+    timetracker = Timetracker(empty_timesheet, summary_cache=summary_cache)
+
+    timetracker.log_event("We are doing a thing")
+
+    summary_cache.invalidate.assert_called_once_with(empty_timesheet[0].when.date())
+
+
+def test_timetracker_task_summary_after_restore_summarises_timesheet(bttf_timesheet, storage_adaptor_mock):
+    storage_adaptor_mock.retrieve.return_value = iter(bttf_timesheet)
+    storage = Storage(Timesheet(), storage_adaptor_mock)
+    storage.restore()
+    timetracker = Timetracker(storage.timesheet, storage)
+
+    summary = timetracker.task_summary(datetime(1985, 10, 26), datetime(1985, 10, 27))
+
+    storage_adaptor_mock.retrieve_range.assert_not_called()
+    assert ['Last Time Departed', 'Destination Time', 'Present Time'] == [task.what for task in summary]
+
+
+def test_timetracker_log_event_updates_rollup(bttf_timesheet):
+    rollup = Rollup(bttf_timesheet)
+    timetracker = Timetracker(bttf_timesheet, rollup=rollup)
+
+    timetracker.log_event("We are doing a thing")
+
+    day = bttf_timesheet[-2].when.date()
+    assert Timetracker(bttf_timesheet).task_summary_by_day(day) == timetracker.task_summary_by_day(day)
+
+
+def test_timetracker_import_events_merges_records(bttf_timesheet):
+    rollup = Rollup(bttf_timesheet)
+    timetracker = Timetracker(bttf_timesheet, rollup=rollup)
+
+    assert 2 == timetracker.import_events([
+        (datetime(1985, 10, 26, 1, 30), 'Libyans'),
+        (datetime(1955, 11, 12, 18, 0), 'Enchantment Under the Sea'),
+    ])
+
+    assert 8 == len(bttf_timesheet)
+    assert sorted(event.when for event in bttf_timesheet) == [event.when for event in bttf_timesheet]
+    day = date(1985, 10, 26)
+    assert Timetracker(bttf_timesheet).task_summary_by_day(day) == timetracker.task_summary_by_day(day)
+
+
+def test_storage_persist_after_merge_before_stored_events_writes_everything(empty_timesheet, storage_adaptor_mock):
+    storage_adaptor_mock.retrieve.return_value = iter([(datetime(1985, 10, 26, 1, 21), 'Destination Time')])
+    stored = []
+    storage_adaptor_mock.store.side_effect = stored.extend
+    storage = Storage(empty_timesheet, storage_adaptor_mock)
+    storage.timesheet.merge([Event(datetime(1985, 10, 26, 1, 20), 'Last Time Departed')])
+    storage.persist()
+
+    assert [(datetime(1985, 10, 26, 1, 20), 'Last Time Departed'),
+            (datetime(1985, 10, 26, 1, 21), 'Destination Time')] == stored
+    storage_adaptor_mock.append.assert_not_called()
+
+
+def test_storage_persist_after_merge_after_stored_events_writes_only_new_events(empty_timesheet,
+                                                                                storage_adaptor_mock):
+    storage_adaptor_mock.retrieve.return_value = iter([(datetime(1985, 10, 26, 1, 21), 'Destination Time')])
+    storage = Storage(empty_timesheet, storage_adaptor_mock)
+    storage.timesheet.merge([Event(datetime(1985, 10, 26, 1, 22), 'Present Time')])
+    storage.persist()
+
+    storage_adaptor_mock.append.assert_called_once_with([(datetime(1985, 10, 26, 1, 22), 'Present Time')])
+    storage_adaptor_mock.store.assert_not_called()
+
+
+def test_storage_persist_after_back_dated_event_writes_everything(empty_timesheet, storage_adaptor_mock):
+    storage_adaptor_mock.retrieve.return_value = iter([(datetime(1985, 10, 26, 1, 21), 'Destination Time')])
+    stored = []
+    storage_adaptor_mock.store.side_effect = stored.extend
+    storage = Storage(empty_timesheet, storage_adaptor_mock)
+    storage.timesheet.append(Event(datetime(1985, 10, 26, 1, 20), 'Last Time Departed'))
+    storage.restore()
+    storage.persist()
+
+    assert [(datetime(1985, 10, 26, 1, 20), 'Last Time Departed'),
+            (datetime(1985, 10, 26, 1, 21), 'Destination Time')] == stored
+
+
+def test_storage_records_merges_back_dated_logged_records(empty_timesheet, storage_adaptor_mock):
+    storage_adaptor_mock.retrieve_range.return_value = iter([(datetime(1985, 10, 26, 1, 21), 'Destination Time')])
+    storage = Storage(empty_timesheet, storage_adaptor_mock)
+    storage.timesheet.append(Event(datetime(1985, 10, 26, 1, 22), 'Present Time'))
+    storage.timesheet.append(Event(datetime(1985, 10, 26, 1, 20), 'Last Time Departed'))
+
+    assert ['Last Time Departed', 'Destination Time', 'Present Time'] == \
+        [record[1] for record in storage.records()]
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.001)
+    return condition()
+
+
+def test_write_behind_storage_writes_group_of_max_events(empty_timesheet, storage_adaptor_mock):
+    storage = WriteBehindStorage(empty_timesheet, storage_adaptor_mock, max_events=2, max_delay=60)
+    storage.timesheet.append(Event(datetime(1985, 10, 26, 1, 21), 'Destination Time'))
+    storage.timesheet.append(Event(datetime(1985, 10, 26, 1, 22), 'Present Time'))
+
+    assert wait_for(lambda: storage_adaptor_mock.append.called)
+    storage_adaptor_mock.append.assert_called_once_with([(datetime(1985, 10, 26, 1, 21), 'Destination Time'),
+                                                         (datetime(1985, 10, 26, 1, 22), 'Present Time')])
+    storage.close()
+
+
+def test_write_behind_storage_writes_after_max_delay(empty_timesheet, storage_adaptor_mock):
+    storage = WriteBehindStorage(empty_timesheet, storage_adaptor_mock, max_events=100, max_delay=0.01)
+    storage.timesheet.append(Event(datetime(1985, 10, 26, 1, 21), 'Destination Time'))
+
+    assert wait_for(lambda: storage_adaptor_mock.append.called)
+    storage.close()
+
+
+def test_write_behind_storage_flush_writes_and_syncs(empty_timesheet, storage_adaptor_mock):
+    storage = WriteBehindStorage(empty_timesheet, storage_adaptor_mock, max_events=100, max_delay=60)
+    storage.timesheet.append(Event(datetime(1985, 10, 26, 1, 21), 'Destination Time'))
+    storage.flush()
+
+    storage_adaptor_mock.append.assert_called_once_with([(datetime(1985, 10, 26, 1, 21), 'Destination Time')])
+    storage_adaptor_mock.sync.assert_called_once()
+    storage.close()
+
+
+def test_write_behind_storage_close_writes_and_stops(empty_timesheet, storage_adaptor_mock):
+    storage = WriteBehindStorage(empty_timesheet, storage_adaptor_mock, max_events=100, max_delay=60, sync='never')
+    storage.timesheet.append(Event(datetime(1985, 10, 26, 1, 21), 'Destination Time'))
+    storage.close()
+
+    assert not storage.writer.is_alive()
+    storage_adaptor_mock.append.assert_called_once()
+    storage_adaptor_mock.sync.assert_not_called()
+
+
+def test_write_behind_storage_flush_raises_write_error(empty_timesheet, storage_adaptor_mock):
+    storage_adaptor_mock.append.side_effect = OSError("Disk full")
+    storage = WriteBehindStorage(empty_timesheet, storage_adaptor_mock)
+    storage.timesheet.append(Event(datetime(1985, 10, 26, 1, 21), 'Destination Time'))
+
+    with raises(OSError):
+        storage.flush()
+    # The group is still unwritten
+    with raises(OSError):
+        storage.close()
+
+
+def test_write_behind_storage_writes_failed_group_with_next(empty_timesheet, storage_adaptor_mock):
+    storage_adaptor_mock.append.side_effect = [OSError("Disk full"), None]
+    storage = WriteBehindStorage(empty_timesheet, storage_adaptor_mock, max_delay=60)
+    storage.timesheet.append(Event(datetime(1985, 10, 26, 1, 21), 'Destination Time'))
+    with raises(OSError):
+        storage.flush()
+
+    storage.timesheet.append(Event(datetime(1985, 10, 26, 1, 22), 'Present Time'))
+    storage.close()
+
+    storage_adaptor_mock.append.assert_called_with([(datetime(1985, 10, 26, 1, 21), 'Destination Time'),
+                                                    (datetime(1985, 10, 26, 1, 22), 'Present Time')])
+
+
+def test_storage_persist_after_failed_write_writes_events_again(empty_timesheet, storage_adaptor_mock):
+    storage_adaptor_mock.retrieve.return_value = iter([])
+    storage_adaptor_mock.append.side_effect = [OSError("Disk full"), None]
+    storage = Storage(empty_timesheet, storage_adaptor_mock)
+    storage.restore()
+    storage.timesheet.append(Event(datetime(1985, 10, 26, 1, 21), 'Destination Time'))
+    with raises(OSError):
+        storage.persist()
+
+    storage.persist()
+
+    storage_adaptor_mock.append.assert_called_with([(datetime(1985, 10, 26, 1, 21), 'Destination Time')])
+
+
+def test_write_behind_storage_adds_events_while_writing(empty_timesheet, storage_adaptor_mock):
+    storage_adaptor_mock.retrieve.return_value = iter([])
+    storage = WriteBehindStorage(empty_timesheet, storage_adaptor_mock, max_delay=60)
+    storage.restore()
+    added = []
+
+    def append(records):
+        adding = Thread(target=storage.timesheet.append, args=(Event(datetime(1985, 10, 26, 1, 22), 'Present Time'),))
+        adding.start()
+        adding.join(5.0)
+        added.append(not adding.is_alive())
+    storage_adaptor_mock.append.side_effect = append
+    storage.timesheet.append(Event(datetime(1985, 10, 26, 1, 21), 'Destination Time'))
+    storage.flush()
+    storage_adaptor_mock.append.side_effect = None
+    storage.close()
+
+    assert added[0]
+    storage_adaptor_mock.append.assert_called_with([(datetime(1985, 10, 26, 1, 22), 'Present Time')])
+
+
+def test_storage_close_persists_and_syncs(empty_timesheet, storage_adaptor_mock):
+    storage = Storage(empty_timesheet, storage_adaptor_mock)
+    storage.timesheet.append(Event(datetime(1985, 10, 26, 1, 21), 'Destination Time'))
+    storage.close()
+
+    storage_adaptor_mock.append.assert_called_once_with([(datetime(1985, 10, 26, 1, 21), 'Destination Time')])
+    storage_adaptor_mock.sync.assert_called_once()
+
+
+def test_write_behind_storage_unknown_sync_fails(empty_timesheet, storage_adaptor_mock):
+    with raises(ValueError):
+        WriteBehindStorage(empty_timesheet, storage_adaptor_mock, sync='sometimes')
+
+
+class ListAsyncStorage(AsyncStorageInterface):
+    def __init__(self, records=()):
+        self.records = list(records)
+        self.calls = []
+
+    async def store(self, records):
+        self.calls.append('store')
+        await asyncio.sleep(0)
+        self.records = list(records)
+
+    async def retrieve(self):
+        for record in list(self.records):
+            await asyncio.sleep(0)
+            yield record
+
+    async def retrieve_range(self, start=datetime.min, end=datetime.max):
+        self.calls.append('retrieve_range')
+        async for record in self.retrieve():
+            if start <= record[0] < end:
+                yield record
+
+    async def append(self, records):
+        self.calls.append('append')
+        records = list(records)
+        # Let other coroutines add events part way through
+        await asyncio.sleep(0)
+        self.records.extend(records)
+
+    async def sync(self):
+        self.calls.append('sync')
+
+    async def close(self):
+        self.calls.append('close')
+
+
+def test_async_storage_timesheet_needs_restore(bttf_timesheet, run):
+    storage = AsyncStorage(Timesheet(), ListAsyncStorage(bttf_timesheet))
+
+    with raises(RuntimeError):
+        len(storage.timesheet)
+    run(storage.restore())
+
+    assert list(bttf_timesheet) == list(storage.timesheet)
+
+
+def test_async_storage_persist_writes_only_new_events(bttf_timesheet, run):
+    adaptor = ListAsyncStorage(bttf_timesheet)
+    storage = AsyncStorage(Timesheet(), adaptor)
+    storage.timesheet.append(Event(datetime(2015, 10, 21, 16, 29), 'Hill Valley'))
+
+    async def persist_restore_persist():
+        await storage.persist()
+        await storage.restore()
+        storage.timesheet.append(Event(datetime(2015, 10, 21, 19, 28), 'Back'))
+        await storage.persist()
+
+    run(persist_restore_persist())
+
+    assert ['append', 'append'] == adaptor.calls
+    assert list(bttf_timesheet) + [(datetime(2015, 10, 21, 16, 29), 'Hill Valley'),
+                                   (datetime(2015, 10, 21, 19, 28), 'Back')] == adaptor.records
+
+
+def test_async_storage_persist_after_back_dated_event_stores_everything(bttf_timesheet, run):
+    adaptor = ListAsyncStorage(bttf_timesheet)
+    storage = AsyncStorage(Timesheet(), adaptor)
+    run(storage.restore())
+    storage.timesheet.append(Event(datetime(1955, 11, 6), 'Doc'))
+
+    run(storage.persist())
+
+    assert ['store'] == adaptor.calls
+    assert sorted(adaptor.records) == adaptor.records
+    assert len(bttf_timesheet) + 1 == len(adaptor.records)
+
+
+def test_async_storage_persist_keeps_events_added_while_writing(bttf_timesheet, run):
+    adaptor = ListAsyncStorage()
+    storage = AsyncStorage(Timesheet(), adaptor)
+    run(storage.restore())
+    storage.timesheet.append(bttf_timesheet[0])
+
+    async def add_while_persisting():
+        persisting = asyncio.ensure_future(storage.persist())
+        await asyncio.sleep(0)
+        storage.timesheet.append(bttf_timesheet[1])
+        await persisting
+        await storage.persist()
+
+    run(add_while_persisting())
+
+    assert list(bttf_timesheet[:2]) == adaptor.records
+
+
+def test_async_storage_records_merges_logged_without_restoring(bttf_timesheet, run):
+    storage = AsyncStorage(Timesheet(), ListAsyncStorage(bttf_timesheet))
+    storage.timesheet.append(Event(datetime(1985, 10, 26, 1, 21, 30), 'Logged'))
+
+    async def records():
+        return [record async for record in storage.records(datetime(1985, 10, 26), datetime(1985, 10, 27))]
+
+    assert ['Last Time Departed', 'Destination Time', 'Logged', 'Present Time', 'Escape'] == \
+        [record[1] for record in run(records())]
+    assert not storage.timesheet.restored
+
+
+def test_async_timetracker_log_event_persists(bttf_timesheet, run):
+    adaptor = ListAsyncStorage(bttf_timesheet)
+    storage = AsyncStorage(Timesheet(), adaptor)
+    timetracker = AsyncTimetracker(storage.timesheet, storage)
+
+    run(timetracker.log_event('Now'))
+
+    assert 'Now' == adaptor.records[-1][1]
+
+
+def test_async_timetracker_task_summary_by_day_matches_timetracker(bttf_timesheet, run):
+    day = date(1985, 10, 26)
+    storage = AsyncStorage(Timesheet(), ListAsyncStorage(bttf_timesheet))
+    timetracker = AsyncTimetracker(storage.timesheet, storage)
+
+    assert Timetracker(bttf_timesheet).task_summary_by_day(day) == run(timetracker.task_summary_by_day(day))
+    run(storage.restore())
+    assert Timetracker(bttf_timesheet).task_summary_by_day(day) == run(timetracker.task_summary_by_day(day))
+
+
+def test_async_timetracker_import_events_restores_and_persists(bttf_timesheet, run):
+    adaptor = ListAsyncStorage(bttf_timesheet[2:])
+    storage = AsyncStorage(Timesheet(), adaptor)
+    timetracker = AsyncTimetracker(storage.timesheet, storage)
+
+    assert 2 == run(timetracker.import_events(bttf_timesheet[:2]))
+
+    assert list(bttf_timesheet) == adaptor.records
+
+
+def test_async_storage_close_persists_syncs_and_closes_adaptor(run):
+    adaptor = ListAsyncStorage()
+    storage = AsyncStorage(Timesheet(), adaptor)
+    storage.timesheet.append(Event(datetime(2015, 10, 21, 16, 29), 'Hill Valley'))
+
+    run(storage.close())
+
+    assert ['append', 'sync', 'close'] == adaptor.calls
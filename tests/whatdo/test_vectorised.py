@@ -0,0 +1,76 @@
+# coding: utf-8
+#
+# BSD 2-Clause License
+#
+# Copyright (c) 2018, Dylan Perry <dylan.perry@gmail.com>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+
+from datetime import datetime, timedelta
+
+from pytest import importorskip, fixture
+
+from whatdo import vectorised
+from whatdo.model import Event, Timesheet
+from whatdo.vectorised import VectorisedTimesheet
+
+
+@fixture
+def always_vectorised(monkeypatch):
+    importorskip('numpy')
+    monkeypatch.setattr(vectorised, 'THRESHOLD', 0)
+
+
+def test_vectorised_timesheet_summarise_matches_timesheet(always_vectorised, dup_timesheet):
+    timesheet = VectorisedTimesheet(dup_timesheet)
+
+    assert list(dup_timesheet.summarise()) == list(timesheet.summarise())
+    assert [task.duration for task in dup_timesheet.summarise()] == [task.duration for task in timesheet.summarise()]
+
+
+def test_vectorised_timesheet_summarise_range(always_vectorised, bttf_timesheet):
+    timesheet = VectorisedTimesheet(bttf_timesheet)
+
+    for lo, hi in ((0, None), (2, 5), (3, 4), (4, 4)):
+        summary = timesheet.summarise(lo, hi)
+        assert [(task.duration, task.what) for task in bttf_timesheet.summarise(lo, hi)] == \
+            [(task.duration, task.what) for task in summary]
+
+
+def test_vectorised_timesheet_grows_after_summarise(always_vectorised, bttf_timesheet):
+    timesheet = VectorisedTimesheet(bttf_timesheet)
+    timesheet.summarise()
+
+    timesheet.append(Event(datetime(1985, 10, 26, 1, 36), 'Home'))
+
+    assert timedelta(minutes=1) == timesheet.summarise()[-1].duration
+
+
+def test_vectorised_timesheet_without_numpy_summarises_in_python(monkeypatch, bttf_timesheet):
+    monkeypatch.setattr(vectorised, 'HAVE_NUMPY', False)
+    monkeypatch.setattr(vectorised, 'THRESHOLD', 0)
+
+    assert [(task.duration, task.what) for task in Timesheet(bttf_timesheet).summarise()] == \
+        [(task.duration, task.what) for task in VectorisedTimesheet(bttf_timesheet).summarise()]